@@ -9,7 +9,9 @@ import json
 from langchain_mistralai import ChatMistralAI
 from langchain_core.prompts import ChatPromptTemplate
 from dotenv import load_dotenv
+from llm_json import strip_fences
 import textwrap
+from functools import lru_cache
 
 load_dotenv()
 
@@ -384,8 +386,9 @@ def plot_financial_kpis(ticker_symbol: str) -> dict:
 # SECTION 2 : VISUALISATIONS STRATÉGIQUES (IA)
 # ═══════════════════════════════════════════════════════════════
 
+@lru_cache(maxsize=1)
 def get_llm():
-    """Initialise le LLM Mistral"""
+    """Initialise le LLM Mistral (instance et pool de connexions HTTP partagés entre les appels)"""
     return ChatMistralAI(
         model="mistral-small",
         temperature=0.2,
@@ -415,12 +418,7 @@ def generate_swot_data(company: str):
     
     try:
         # Nettoyage basique pour s'assurer que c'est du JSON
-        content = response.content.strip()
-        if content.startswith("```json"):
-            content = content.replace("```json", "").replace("```", "")
-        if content.startswith("```"):
-            content = content.replace("```", "")
-        return json.loads(content)
+        return json.loads(strip_fences(response.content))
     except Exception as e:
         print(f"Erreur parsing JSON SWOT : {e}")
         return None
@@ -561,10 +559,7 @@ def generate_bcg_data(company: str):
     response = chain.invoke({"company": company})
     
     try:
-        content = response.content.strip()
-        if content.startswith("```json"):
-            content = content.replace("```json", "").replace("```", "")
-        return json.loads(content)
+        return json.loads(strip_fences(response.content))
     except Exception as e:
         print(f"Erreur parsing JSON BCG : {e}")
         return []
@@ -638,10 +633,7 @@ def generate_pestel_data(company: str):
     response = chain.invoke({"company": company})
     
     try:
-        content = response.content.strip()
-        if content.startswith("```json"):
-            content = content.replace("```json", "").replace("```", "")
-        return json.loads(content)
+        return json.loads(strip_fences(response.content))
     except Exception as e:
         print(f"Erreur parsing JSON PESTEL : {e}")
         return None
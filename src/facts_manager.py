@@ -1,7 +1,8 @@
 
 import json
 import os
-from typing import List, Dict, Any, Optional
+import sys
+from typing import List, Dict, Any, Optional, Iterable
 from datetime import datetime
 import pandas as pd
 
@@ -63,9 +64,19 @@ class FactsManager:
             filtered = [f for f in filtered if f.get("key") == key]
         return filtered
         
+    def get_facts_map(self, keys: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Returns the first fact for each requested key, in a single pass over the facts."""
+        keys_set = set(keys)
+        facts_map = {}
+        for f in self.facts:
+            key = f.get("key")
+            if key in keys_set and key not in facts_map:
+                facts_map[key] = f
+        return facts_map
+
     def get_all_keys(self) -> List[str]:
         """Returns a list of all unique keys in the facts database."""
-        return list(set([f.get("key") for f in self.facts if f.get("key")]))
+        return list(set([sys.intern(f["key"]) for f in self.facts if f.get("key")]))
 
     def get_fact_value(self, key: str, default: Any = None) -> Any:
         """Helper to get a single fact value by key."""
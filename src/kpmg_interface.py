@@ -1673,7 +1673,7 @@ Fiabilité: {conf}""".strip()
                         year=year,
                         market_sizing_context=sizing_ctx,
                         segmentation_context=seg_ctx,
-                        competitive_context=str(analysis.get('context_summary', {}))
+                        competitive_context=analysis.get('context_summary', {})
                     )
                     
                     trends_html = ""
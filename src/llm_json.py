@@ -0,0 +1,32 @@
+"""
+LLM JSON - Nettoyage des réponses JSON des modèles
+==================================================
+
+Règles communes de retrait du bloc Markdown ```json ... ``` qui entoure parfois
+les réponses LLM, partagées par les générateurs stratégiques et les visualisations.
+
+Usage:
+    from llm_json import strip_fences
+    data = json.loads(strip_fences(response.content))
+"""
+
+import re
+
+# Bloc Markdown ```json ... ``` englobant la réponse LLM, retiré en une seule passe :
+# balise ouvrante reconnue en tête de réponse, balise fermante seulement en fin
+# (des ``` présents dans une valeur JSON ne coupent pas le contenu ; réponse tronquée tolérée).
+_FENCE_RE = re.compile(r"\A```(?:json|JSON)?")
+
+def strip_fences(text: str) -> str:
+    """
+    Contenu d'une réponse LLM sans le bloc ```json ... ``` éventuel.
+    Les espaces autour du JSON sont laissés au parseur (qui les ignore) : une réponse déjà
+    propre, cas courant en mode JSON, est renvoyée sans copie.
+    """
+    if text[:1].isspace():
+        text = text.lstrip()
+    if match := _FENCE_RE.match(text):
+        text = text[match.end():].rstrip()
+        if text.endswith("```"):
+            text = text[:-3]
+    return text
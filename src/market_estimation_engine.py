@@ -2,11 +2,30 @@ from dataclasses import dataclass, field
 from typing import List, Optional, Dict, Any, Union, Callable
 import facts_manager
 import pandas as pd
+import numpy as np
 import re
+import ast
+import sys
 
 import difflib
+from functools import lru_cache
+from contextlib import contextmanager
 
-@dataclass
+_SAFE_FORMULA_RE = re.compile(r'^[\d\.\s\+\-\*\/\(\)]+$')
+_TRI_COUNT_RE = re.compile(r"\/ (\d+)")
+
+# Confidence caps applied when max sensitivity exceeds 15% / 30%
+_SENSITIVITY_CONFIDENCE_CAPS = ("MEDIUM", "LOW")
+
+# Below this many tested variables, top-3 selection uses a plain sort instead of NumPy partitioning
+_SMALL_SENSITIVITY_N = 32
+
+@lru_cache(maxsize=128)
+def _bucket_confidence(base_confidence: str, bucket: int) -> str:
+    """Adjusted confidence for a sensitivity bucket (0: base, 1: > 15%, 2: > 30%)."""
+    return ((base_confidence.upper(),) + _SENSITIVITY_CONFIDENCE_CAPS)[bucket]
+
+@dataclass(slots=True)
 class EstimationStrategy:
     id: str
     name: str # e.g. "Bottom-up by User Base"
@@ -17,7 +36,11 @@ class EstimationStrategy:
     market_reality_applied: bool = False # NEW: Track if reality factor was used
     # Future: add fallback_proxies logic
 
-@dataclass
+    def __post_init__(self):
+        # Fact keys are compared on every solve: intern them for pointer-equal lookups
+        self.required_inputs = {sys.intern(k): sys.intern(v) for k, v in self.required_inputs.items()}
+
+@dataclass(slots=True)
 class EstimationResult:
     value: float
     formula_used: str
@@ -28,7 +51,7 @@ class EstimationResult:
     reality_factor: float = 1.0 # NEW
     market_friction_details: str = "" # NEW
 
-@dataclass
+@dataclass(slots=True)
 class EstimationComponent:
     id: str
     name: str
@@ -48,6 +71,17 @@ class EstimationComponent:
     methodology_text: str = "" # NEW: Carries the explanation to UI
     strategic_narrative: str = "" # NEW: "So What?" analysis
     reality_score: str = "" # NEW: Displayable friction score
+    selected_strategy: Optional[EstimationStrategy] = None # Strategy behind estimated_value (sensitivity shortcut)
+
+def _compute_sensitivities(base_value: float, values_low: np.ndarray, values_high: np.ndarray):
+    """
+    Numeric sensitivity kernel (arrays only, no Python objects).
+    Returns (deltas_low_pct, deltas_high_pct, scores) where score = mean absolute delta.
+    """
+    deltas_low = (values_low - base_value) / base_value * 100
+    deltas_high = (values_high - base_value) / base_value * 100
+    scores = (np.abs(deltas_low) + np.abs(deltas_high)) / 2
+    return deltas_low, deltas_high, scores
 
 class MarketEstimationEngine:
     def __init__(self, facts_mgr):
@@ -64,6 +98,9 @@ class MarketEstimationEngine:
             "price_modules": ["modules_revenue", "avg_module_price"],
             "price_services": ["service_fees", "implementation_cost"]
         }
+        self.fuzzy_mappings = {sys.intern(k): [sys.intern(a) for a in v] for k, v in self.fuzzy_mappings.items()}
+        # (score, details) of the market reality factor, only set for the duration of one estimation run
+        self._reality_factor_cache = None
 
     def _find_best_fuzzy_match(self, key: str) -> Optional[str]:
         """Attempts to find a key in facts_mgr that approximately matches the requested key."""
@@ -83,11 +120,15 @@ class MarketEstimationEngine:
             
         return None
 
-    def _get_fact(self, key: str) -> Optional[Dict]:
-        """Helper to get full fact object with Fuzzy Logic fallback"""
+    def _get_fact(self, key: str, facts_map: Optional[Dict[str, Dict]] = None) -> Optional[Dict]:
+        """Helper to get full fact object with Fuzzy Logic fallback.
+        facts_map: optional pre-fetched exact matches (see FactsManager.get_facts_map)"""
         # 1. Exact Match
-        facts = self.facts_mgr.get_facts(key=key)
-        if facts: return facts[0]
+        if facts_map is not None:
+            if key in facts_map: return facts_map[key]
+        else:
+            facts = self.facts_mgr.get_facts(key=key)
+            if facts: return facts[0]
         
         # 2. Fuzzy Match
         fuzzy_key = self._find_best_fuzzy_match(key)
@@ -98,9 +139,9 @@ class MarketEstimationEngine:
             
         return None
 
-    def _get_fact_val_and_meta(self, key: str) -> (float, str, str):
+    def _get_fact_val_and_meta(self, key: str, facts_map: Optional[Dict[str, Dict]] = None) -> (float, str, str):
         """Returns value, confidence, and source type for a key"""
-        f = self._get_fact(key)
+        f = self._get_fact(key, facts_map)
         if f and f.get("value") is not None:
             return f.get("value"), f.get("confidence", "low"), f.get("source_type", "Unknown")
         return None, "none", "missing"
@@ -118,12 +159,13 @@ class MarketEstimationEngine:
 
         if overrides is None: overrides = {}
 
-        # 1. Fetch Inputs
+        # 1. Fetch Inputs (exact matches in one pass over the facts)
+        facts_map = self.facts_mgr.get_facts_map(strategy.required_inputs.values())
         for var_name, fact_key in strategy.required_inputs.items():
             # Check for override (Multiplier)
             # The override keys map to canonical fact keys (e.g., 'average_price')
             
-            val, conf, src_type = self._get_fact_val_and_meta(fact_key)
+            val, conf, src_type = self._get_fact_val_and_meta(fact_key, facts_map)
             
             if val is None:
                 missing.append(fact_key)
@@ -170,7 +212,7 @@ class MarketEstimationEngine:
         # 2. Evaluate Formula
         formula_filled = strategy.formula_template.format(**inputs)
         
-        if not re.match(r'^[\d\.\s\+\-\*\/\(\)]+$', formula_filled):
+        if not _SAFE_FORMULA_RE.match(formula_filled):
              return EstimationResult(None, strategy.formula_template, "Formula Error", "low", [], [])
         
         try:
@@ -194,7 +236,7 @@ class MarketEstimationEngine:
         friction_details = ""
         
         if strategy.market_reality_applied:
-            reality_factor, friction_details = self._calculate_market_reality_factor()
+            reality_factor, friction_details = self._get_market_reality_factor()
             value = value * reality_factor
             details.append(f"Reality Factor ({reality_factor:.0%})")
             
@@ -209,6 +251,32 @@ class MarketEstimationEngine:
             market_friction_details=friction_details
         )
 
+    @contextmanager
+    def _reality_factor_run(self):
+        """
+        Memoizes the market reality factor for one estimation run (facts don't change within it).
+        Outside a run, direct component calls recompute it from the current facts.
+        A nested run (sensitivity re-solving the triangulation through get_all_estimations)
+        reuses the open memo and leaves it in place: only the outermost run clears it.
+        """
+        if self._reality_factor_cache is not None:
+            yield
+            return
+        self._reality_factor_cache = self._calculate_market_reality_factor()
+        try:
+            yield
+        finally:
+            self._reality_factor_cache = None
+
+    def _get_market_reality_factor(self) -> (float, str):
+        """
+        Reality factor of the current run if memoized, otherwise computed from the facts.
+        Overrides never apply: the factor reads facts that are not strategy inputs.
+        """
+        if self._reality_factor_cache is None:
+            return self._calculate_market_reality_factor()
+        return self._reality_factor_cache
+
     def _calculate_market_reality_factor(self) -> (float, str):
         """
         Calculates a 'Market Reality' friction coefficient (0 to 1).
@@ -352,9 +420,11 @@ class MarketEstimationEngine:
     def _run_component_solver(self, id, name, strategies, role, color, overrides) -> EstimationComponent:
         best_res = None
         best_strat = None
+        default_res = None
         
         for strat in strategies:
             res = self._solve_strategy(strat, overrides)
+            if default_res is None: default_res = res
             
             if res.value is not None:
                 if best_res is None:
@@ -367,10 +437,8 @@ class MarketEstimationEngine:
         
         if best_res is None or best_res.value is None:
              default_strat = strategies[0]
-             missing = []
-             for k, v in default_strat.required_inputs.items():
-                 if self._get_fact_val_and_meta(v)[0] is None:
-                     missing.append(v)
+             # _solve_strategy already resolved the default strategy's inputs
+             missing = default_res.missing_inputs
              
              return EstimationComponent(
                 id=id, name=name, role=role,
@@ -400,6 +468,7 @@ class MarketEstimationEngine:
             calculation_breakdown=f"{best_res.calculation_details}",
             methodology_text=best_strat.methodology_explanation,
             reality_score=best_res.market_friction_details,
+            selected_strategy=best_strat,
             strategic_narrative=self._generate_micro_narrative(best_strat, best_res)
         )
 
@@ -429,8 +498,8 @@ class MarketEstimationEngine:
         if not valid:
             return EstimationComponent("comp_tria", "4. Triangulation", "Synthèse décisionnelle", "Moyenne des approches", [], "", None, "EUR", "low", "empty", "#9C27B0")
             
-        vals = [c.estimated_value for c in valid]
-        avg = sum(vals) / len(vals)
+        vals = np.fromiter((c.estimated_value for c in valid), dtype=np.float64, count=len(valid))
+        avg = float(vals.mean())
         
         details = " + ".join([f"{c.estimated_value:,.0f}" for c in valid])
         details = f"({details}) / {len(valid)}"
@@ -452,18 +521,23 @@ class MarketEstimationEngine:
         )
 
     def get_all_estimations(self, overrides: Dict[str, float] = None) -> List[EstimationComponent]:
-        c1 = self.get_macro_estimation(overrides)
-        c2 = self.get_demand_estimation(overrides)
-        c3 = self.get_supply_estimation(overrides)
+        with self._reality_factor_run():
+            c1 = self.get_macro_estimation(overrides)
+            c2 = self.get_demand_estimation(overrides)
+            c3 = self.get_supply_estimation(overrides)
         c4 = self.get_triangulated_estimation([c1, c2, c3])
         return [c1, c2, c3, c4]
+
+    def get_all_estimations_by_id(self, overrides: Dict[str, float] = None) -> Dict[str, EstimationComponent]:
+        """Same as get_all_estimations, indexed by component id."""
+        return {c.id: c for c in self.get_all_estimations(overrides)}
         
     def determine_best_method(self, overrides: Dict[str, float] = None) -> EstimationComponent:
         all_comps = self.get_all_estimations(overrides)
         macro, demand, supply, triangulation = all_comps[0], all_comps[1], all_comps[2], all_comps[3]
         
         if triangulation.status == "complete" and triangulation.estimated_value is not None:
-             match = re.search(r"\/ (\d+)", triangulation.method_description)
+             match = _TRI_COUNT_RE.search(triangulation.method_description)
              if match and int(match.group(1)) >= 2:
                  return triangulation
 
@@ -484,27 +558,26 @@ class MarketEstimationEngine:
                  usage_map[f_key].append(comp.name.split(".")[0])
         
         all_facts = self.facts_mgr.facts
-        data = []
-        for f in all_facts:
-            key = f.get("key")
-            val_display = f['value']
-            if isinstance(val_display, (int, float)) and val_display > 1000:
-                val_display = f"{val_display:,.0f}"
-            
-            used_in = ", ".join(usage_map.get(key, []))
-            if not used_in: used_in = "-"
-            
-            data.append({
-                "Variable / Fact": key.replace("_", " ").title(),
-                "Valeur": f"{val_display} {f.get('unit','')}",
-                "Source": f.get("source", "N/A"),
-                "Type": f.get("source_type", "N/A"),
-                "Confiance": f.get("confidence", "low").upper(),
-                "Utilisé dans": used_in
-            })
-            
-        if not data: return pd.DataFrame()
-        return pd.DataFrame(data).sort_values(by="Utilisé dans", ascending=False)
+        if not all_facts: return pd.DataFrame()
+
+        # One vectorized pass over the fact base (dtype=object keeps raw values intact)
+        df = pd.DataFrame(all_facts, dtype=object).reindex(
+            columns=["key", "value", "unit", "source", "source_type", "confidence"]
+        )
+        values = df["value"]
+        is_num = values.map(lambda v: isinstance(v, (int, float)))
+        is_big = is_num & (pd.to_numeric(values.where(is_num), errors="coerce") > 1000)
+        val_display = values.map(str).mask(is_big, values[is_big].map("{:,.0f}".format))
+
+        table = pd.DataFrame({
+            "Variable / Fact": df["key"].str.replace("_", " ").str.title(),
+            "Valeur": val_display.str.cat(df["unit"].fillna(""), sep=" "),
+            "Source": df["source"].fillna("N/A"),
+            "Type": df["source_type"].fillna("N/A"),
+            "Confiance": df["confidence"].fillna("low").str.upper(),
+            "Utilisé dans": df["key"].map({k: ", ".join(v) for k, v in usage_map.items()}).fillna("-")
+        })
+        return table.sort_values(by="Utilisé dans", ascending=False)
         
     def get_waterfall_data(self, base_tam: float) -> pd.DataFrame:
         """
@@ -543,10 +616,63 @@ class MarketEstimationEngine:
         else:
              return "Marché équilibré : Ciblage cohérent avec le potentiel macro."
 
+    def _factor_exponent(self, strategy: EstimationStrategy, fact_key: str) -> Optional[int]:
+        """
+        Returns the exponent of `fact_key` in the strategy formula when it enters as a pure
+        multiplicative factor (+1) or divisor (-1), 0 when absent, None when not a monomial term.
+        Multipliers on such inputs scale the result analytically (value * m ** exponent).
+        """
+        var_names = [var for var, key in strategy.required_inputs.items() if key == fact_key]
+        if not var_names:
+            return 0
+        if len(var_names) > 1:
+            return None
+        target = var_names[0]
+        
+        expr = ast.parse(strategy.formula_template.format(**{v: v for v in strategy.required_inputs}), mode="eval").body
+        
+        def factors(node, sign):
+            if isinstance(node, ast.BinOp) and isinstance(node.op, (ast.Mult, ast.Div)):
+                yield from factors(node.left, sign)
+                yield from factors(node.right, -sign if isinstance(node.op, ast.Div) else sign)
+            else:
+                yield node, sign
+        
+        exponent = 0
+        for node, sign in factors(expr, 1):
+            if isinstance(node, ast.Name) and node.id == target:
+                exponent += sign
+            elif any(isinstance(n, ast.Name) and n.id == target for n in ast.walk(node)):
+                return None
+        return exponent
+
+    def _evaluate_component_value(self, base_result: EstimationComponent, overrides: Dict[str, float]) -> Optional[float]:
+        """Re-solves only the component matching base_result (full pipeline only for triangulation)."""
+        solvers = {
+            "comp_macro": self.get_macro_estimation,
+            "comp_demand": self.get_demand_estimation,
+            "comp_supply": self.get_supply_estimation
+        }
+        solver = solvers.get(base_result.id)
+        if solver is not None:
+            comp = solver(overrides)
+        else:
+            comp = self.get_all_estimations_by_id(overrides).get(base_result.id)
+        return comp.estimated_value if comp else None
+
+    def _resolve_sensitivity_scenarios(self, base_result: EstimationComponent, var: Dict[str, Any]):
+        """Re-solves the -20% / +20% scenarios of one variable. Returns (value_low, value_high)."""
+        return (
+            self._evaluate_component_value(base_result, {var["key"]: 0.8}),
+            self._evaluate_component_value(base_result, {var["key"]: 1.2})
+        )
+
     def perform_sensitivity_analysis(
         self, 
         base_result: EstimationComponent,
-        hypotheses: List[Dict[str, Any]] = None
+        hypotheses: List[Dict[str, Any]] = None,
+        detailed: bool = True,
+        early_exit_threshold: Optional[float] = None
     ) -> Dict[str, Any]:
         """
         Teste l'impact de variations ±20% sur chaque hypothèse/variable clé.
@@ -554,15 +680,28 @@ class MarketEstimationEngine:
         Args:
             base_result: Composant d'estimation de référence
             hypotheses: Liste des hypothèses à tester (si fournie par LLM)
+            detailed: Si False, ne construit pas le détail par variable ("tests" = None)
+            early_exit_threshold: Si défini, saute les re-calculs moteur dès que 3 variables
+                analytiques sont connues et qu'une dépasse ce seuil (en %, 30 minimum : au-delà
+                de 30, la confiance est LOW quelles que soient les variables non testées)
+            
+        Raises:
+            ValueError: si early_exit_threshold est inférieur à 30
             
         Returns:
             {
                 "base_value": float,
-                "tests": List[Dict],
+                "tests": List[Dict] | None,
                 "most_sensitive_variables": List[str],
-                "confidence_adjusted": str
+                "confidence_adjusted": str,
+                "early_terminated": bool  # si True, "tests", "most_sensitive_variables" et
+                                          # "max_sensitivity_score" ne portent que sur les variables
+                                          # analytiques (re-calculs moteur sautés)
             }
         """
+        if early_exit_threshold is not None and early_exit_threshold < 30:
+            raise ValueError(f"early_exit_threshold must be >= 30 (got {early_exit_threshold})")
+        
         if base_result.estimated_value is None:
             return {
                 "base_value": None,
@@ -600,84 +739,101 @@ class MarketEstimationEngine:
                 })
         
         tests_results = []
-        sensitivity_scores = {}
         
-        for var in test_variables:
-            if not var["base_value"]:
-                continue
-            
-            # Test -20%
-            override_low = {var["key"]: 0.8}  # Multiplier 0.8
-            comps_low = self.get_all_estimations(overrides=override_low)
-            
-            # Re-identifier le composant équivalent à base_result
-            comp_low = next((c for c in comps_low if c.id == base_result.id), None)
-            value_low = comp_low.estimated_value if comp_low else None
-            
-            # Test +20%
-            override_high = {var["key"]: 1.2}  # Multiplier 1.2
-            comps_high = self.get_all_estimations(overrides=override_high)
-            comp_high = next((c for c in comps_high if c.id == base_result.id), None)
-            value_high = comp_high.estimated_value if comp_high else None
-            
-            if value_low and value_high:
-                delta_low_pct = ((value_low - base_value) / base_value) * 100
-                delta_high_pct = ((value_high - base_value) / base_value) * 100
-                
-                # Score de sensibilité = amplitude de variation moyenne
-                sensitivity_score = (abs(delta_low_pct) + abs(delta_high_pct)) / 2
-                sensitivity_scores[var["name"]] = sensitivity_score
-                
-                # Classification
-                if sensitivity_score > 30:
-                    sensitivity_class = "CRITICAL"
-                elif sensitivity_score > 15:
-                    sensitivity_class = "HIGH"
-                elif sensitivity_score > 5:
-                    sensitivity_class = "MEDIUM"
-                else:
-                    sensitivity_class = "LOW"
-                
+        # Structure de tableaux parallèles : var_names[i] <-> scores[i]
+        pending = [var for var in test_variables if var["base_value"]]
+        var_names = [var["name"] for var in pending]
+        exponents = np.array([
+            np.nan if exp is None else exp
+            for exp in (
+                self._factor_exponent(base_result.selected_strategy, var["key"])
+                if base_result.selected_strategy is not None else None
+                for var in pending
+            )
+        ], dtype=np.float64)
+        
+        # Scénarios -20% / +20% (Multiplier 0.8 / 1.2), vectorisés sur toutes les variables
+        # Gradient analytique : la variable est un facteur (ou diviseur) pur de la formule
+        analytic = ~np.isnan(exponents)
+        values_low = np.full(len(pending), np.nan)
+        values_high = np.full(len(pending), np.nan)
+        values_low[analytic] = base_value * 0.8 ** exponents[analytic]
+        values_high[analytic] = base_value * 1.2 ** exponents[analytic]
+        
+        # Variables à re-calculer par le moteur (hors gradient analytique)
+        resolve_idx = np.flatnonzero(~analytic)
+        
+        # Arrêt anticipé : une variable analytique > 30% sature déjà la confiance (LOW),
+        # les variables non testées ne peuvent plus la dégrader
+        early_terminated = False
+        if early_exit_threshold is not None and len(resolve_idx):
+            _, _, analytic_scores = _compute_sensitivities(float(base_value), values_low[analytic], values_high[analytic])
+            analytic_valid = (values_low[analytic] != 0) & (values_high[analytic] != 0)
+            if analytic_valid.sum() >= 3 and (analytic_scores[analytic_valid] > early_exit_threshold).any():
+                resolve_idx = resolve_idx[:0]
+                early_terminated = True
+        
+        # Re-calculs séquentiels (solveur Python pur, tenu par le GIL : des threads n'apportent rien)
+        # Facteur de réalité calculé une fois pour tous les re-calculs, oublié ensuite
+        with self._reality_factor_run():
+            resolved = [self._resolve_sensitivity_scenarios(base_result, pending[i]) for i in resolve_idx]
+        for i, (value_low, value_high) in zip(resolve_idx, resolved):
+            values_low[i] = np.nan if value_low is None else value_low
+            values_high[i] = np.nan if value_high is None else value_high
+        
+        # Un scénario sans valeur (ou nul) exclut la variable
+        valid = (values_low != 0) & (values_high != 0) & ~np.isnan(values_low) & ~np.isnan(values_high)
+        deltas_low, deltas_high, scores = _compute_sensitivities(float(base_value), values_low, values_high)
+        
+        valid_idx = np.flatnonzero(valid)
+        if detailed:
+            classes = np.select([scores > 30, scores > 15, scores > 5], ["CRITICAL", "HIGH", "MEDIUM"], default="LOW")
+            for i in valid_idx.tolist():
+                var = pending[i]
                 tests_results.append({
-                    "hypothesis": var["name"],
+                    "hypothesis": var_names[i],
                     "base": var["base_value"],
                     "unit": var["unit"],
                     "low_scenario": {
                         "value": var["base_value"] * 0.8,
-                        "result": value_low,
-                        "delta_pct": round(delta_low_pct, 1)
+                        "result": float(values_low[i]),
+                        "delta_pct": round(float(deltas_low[i]), 1)
                     },
                     "high_scenario": {
                         "value": var["base_value"] * 1.2,
-                        "result": value_high,
-                        "delta_pct": round(delta_high_pct, 1)
+                        "result": float(values_high[i]),
+                        "delta_pct": round(float(deltas_high[i]), 1)
                     },
-                    "sensitivity_score": sensitivity_class
+                    "sensitivity_score": str(classes[i])
                 })
         
-        # Identifier les variables les plus sensibles
-        most_sensitive = sorted(
-            sensitivity_scores.items(), 
-            key=lambda x: x[1], 
-            reverse=True
-        )[:3]
-        most_sensitive_names = [name for name, _ in most_sensitive]
-        
-        # Ajuster confiance si haute sensibilité
-        max_sensitivity = most_sensitive[0][1] if most_sensitive else 0
-        
-        if max_sensitivity > 30:
+        # Identifier les variables les plus sensibles (score décroissant, ordre d'origine si ex-aequo)
+        if len(valid_idx) <= _SMALL_SENSITIVITY_N:
+            # Cas courant (quelques drivers) : un tri Python évite le coût d'appel NumPy
+            score_list = scores.tolist()
+            top_idx = sorted(valid_idx.tolist(), key=score_list.__getitem__, reverse=True)[:3] # clé C, tri stable
+        else:
+            # Sélection partielle O(n)
+            candidates = valid_idx
+            third_best = np.partition(scores[candidates], -3)[-3]
+            candidates = candidates[scores[candidates] >= third_best] # garde les ex-aequo du 3e rang
+            top_idx = candidates[np.lexsort((candidates, -scores[candidates]))][:3].tolist()
+        most_sensitive_names = [var_names[i] for i in top_idx]
+        max_sensitivity = float(scores[top_idx[0]]) if top_idx else 0
+        
+        # Ajuster confiance si haute sensibilité (arrêt anticipé : sensibilité > 30% déjà établie)
+        if early_terminated:
             confidence_adjusted = "LOW"
-        elif max_sensitivity > 15:
-            confidence_adjusted = "MEDIUM"
         else:
-            confidence_adjusted = base_result.confidence.upper()
+            confidence_adjusted = _bucket_confidence(base_result.confidence, (max_sensitivity > 15) + (max_sensitivity > 30))
+        max_sensitivity_rounded = round(max_sensitivity, 1) if top_idx else 0
         
         return {
             "base_value": base_value,
-            "tests": tests_results,
+            "tests": tests_results if detailed else None,
             "most_sensitive_variables": most_sensitive_names,
             "confidence_adjusted": confidence_adjusted,
-            "max_sensitivity_score": round(max_sensitivity, 1) if most_sensitive else 0
+            "max_sensitivity_score": max_sensitivity_rounded,
+            "early_terminated": early_terminated
         }
 
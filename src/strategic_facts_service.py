@@ -3,11 +3,12 @@ Strategic FACTS Service - Centralized Strategic Analysis Generator
 ===================================================================
 
 Ce module centralise la génération d'analyses stratégiques (SWOT, BCG, PESTEL)
-en un seul appel LLM, enrichi par les données financières réelles.
+via trois appels LLM concurrents, enrichis par les données financières réelles.
 
 Architecture:
-- Singleton StrategicFactsService avec cache en mémoire
-- Un seul appel Mistral génère SWOT + BCG + PESTEL
+- Singleton StrategicFactsService avec cache en mémoire (L1)
+  et cache LLM persistant SQLite partagé entre workers (L2)
+- SWOT, BCG et PESTEL générés par 3 appels Mistral concurrents (asyncio.gather)
 - Intégration avec facts_service pour enrichissement financier
 
 Usage:
@@ -16,582 +17,487 @@ Usage:
 """
 
 import os
+import sys
 import json
-from datetime import datetime, timedelta
-from typing import Dict, Any, Optional, List
-
+import queue
+import atexit
+import logging
+import logging.handlers
+import time
+import asyncio
+import sqlite3
+import hashlib
+import random
+import operator
+import itertools
+import threading
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Any, Optional, List, Tuple, Callable, Set, Union
+
+import httpx
 from langchain_mistralai import ChatMistralAI
+from langchain_mistralai.chat_models import global_ssl_context
 from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.caches import BaseCache
+from langchain_core.messages import messages_from_dict, messages_to_dict
+from langchain_core.outputs import ChatGeneration
 from dotenv import load_dotenv
 
 from facts_service import facts_service
+from llm_json import strip_fences
 
 load_dotenv()
 
+# Traces complètes des erreurs uniquement en mode debug (STRATEGIC_DEBUG=1) ;
+# sinon seul le message d'erreur est affiché.
+_DEBUG = os.getenv("STRATEGIC_DEBUG", "").lower() in ("1", "true", "yes")
+
+# Journal des générateurs de marché : les messages sont mis en file (QueueHandler) et écrits
+# sur stdout par un thread dédié (QueueListener). Sous asyncio.gather, aucune coroutine
+# ne bloque la boucle sur l'écriture console. Arguments passés au format %, interpolés
+# seulement si le message est émis ; les détails (taille des réponses...) au niveau DEBUG.
+_logger = logging.getLogger(__name__)
+if not _logger.handlers:
+    _log_queue = queue.Queue(-1)
+    _logger.addHandler(logging.handlers.QueueHandler(_log_queue))
+    _logger.setLevel(logging.DEBUG if _DEBUG else logging.INFO)
+    _logger.propagate = False
+    _log_listener = logging.handlers.QueueListener(_log_queue, logging.StreamHandler(sys.stdout))
+    _log_listener.start()
+    atexit.register(_log_listener.stop)
+_RULE = "=" * 60
+
+# Parsing JSON des réponses LLM : orjson (Rust) si disponible, sinon json standard.
+# orjson.JSONDecodeError hérite de json.JSONDecodeError : les `except` existants restent valides.
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# HTTP/2 (paquet h2) si disponible : les appels LLM parallèles sont multiplexés sur une seule connexion
+try:
+    import h2  # noqa: F401
+    _HTTP2 = True
+except ImportError:
+    _HTTP2 = False
+
+def _mistral_api_key() -> Optional[str]:
+    """Clé API Mistral, relue dans l'environnement à chaque usage (rotation sans redémarrage)."""
+    return os.getenv("MISTRAL_API_KEY")
+
+def _mistral_auth(request: httpx.Request) -> httpx.Request:
+    request.headers["Authorization"] = f"Bearer {_mistral_api_key()}"
+    return request
+
+def _http_client_options() -> Dict[str, Any]:
+    """Options des clients httpx passés à ChatMistralAI (mêmes en-têtes et contexte TLS que ses clients par défaut)."""
+    return {
+        "base_url": os.getenv("MISTRAL_BASE_URL", "https://api.mistral.ai/v1"),
+        "headers": {"Content-Type": "application/json", "Accept": "application/json"},
+        "auth": _mistral_auth,
+        "timeout": 120,
+        "limits": httpx.Limits(max_connections=32, max_keepalive_connections=32),
+        "http2": _HTTP2,
+        "verify": global_ssl_context,
+    }
 
-class StrategicFactsService:
-    """
-    Service centralisé de génération d'analyses stratégiques.
-    Combine les données financières avec l'analyse LLM en un seul appel.
+# Réparation locale des JSON LLM mal formés (virgule, accolade ou guillemet manquants) si disponible
+try:
+    from json_repair import loads as _repair_json
+except ImportError:
+    _repair_json = None
+
+# Boucle asyncio persistante (thread daemon) partagée par les wrappers synchrones.
+# Le client httpx async de ChatMistralAI est lié à la boucle qui l'a utilisé en premier :
+# un asyncio.run par appel le ferait échouer ("Event loop is closed") dès le 2e appel.
+_SYNC_LOOP: Optional[asyncio.AbstractEventLoop] = None
+_SYNC_LOOP_LOCK = threading.Lock()
+
+def _sync_loop() -> asyncio.AbstractEventLoop:
+    global _SYNC_LOOP
+    with _SYNC_LOOP_LOCK:
+        if _SYNC_LOOP is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="strategic-facts-loop", daemon=True).start()
+            _SYNC_LOOP = loop
+    return _SYNC_LOOP
+
+def _run_sync(coro):
     """
+    Exécute une coroutine depuis du code synchrone, sur la boucle persistante.
+    Fonctionne aussi si une boucle tourne déjà dans le thread appelant (handler async, Jupyter).
     
-    def __init__(self, cache_ttl_minutes: int = 15):
-        """
-        Initialise le service Strategic FACTS.
-        
-        Args:
-            cache_ttl_minutes: Durée de vie du cache en minutes (défaut: 15)
-        """
-        self._cache: Dict[str, Dict[str, Any]] = {}
-        self._cache_timestamps: Dict[str, datetime] = {}
-        self._cache_ttl = timedelta(minutes=cache_ttl_minutes)
-        self._llm = None
-    
-    def _get_llm(self):
-        """Initialise le LLM Mistral (lazy loading)."""
-        if self._llm is None:
-            self._llm = ChatMistralAI(
-                model="mistral-small",
-                temperature=0.2,
-                mistral_api_key=os.getenv("MISTRAL_API_KEY")
-            )
-        return self._llm
-    
-    def _is_cache_valid(self, key: str) -> bool:
-        """Vérifie si le cache est encore valide."""
-        if key not in self._cache_timestamps:
-            return False
-        return datetime.now() - self._cache_timestamps[key] < self._cache_ttl
-    
-    def _is_aged_source(self, source_date: str) -> bool:
-        """Vérifie si une source est considérée comme datée (>3 ans)."""
+    Raises:
+        RuntimeError: appel réentrant depuis la boucle persistante (ex: callback on_section
+                      appelant un wrapper synchrone) : attendre ici bloquerait la boucle.
+    """
+    loop = _sync_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        coro.close()
+        raise RuntimeError(
+            "Appel synchrone depuis la boucle de StrategicFactsService : "
+            "utilisez l'API aget_* / agenerate_* (await) dans ce contexte"
+        )
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+# Réponses HTTP transitoires du fournisseur (limite de débit, surcharge) relancées avec attente
+# exponentielle. Les erreurs réseau et timeouts sont déjà relancés par ChatMistralAI (max_retries).
+_RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+
+async def _ainvoke_with_backoff(chain, variables: Dict[str, Any], attempts: int = 4, base_delay: float = 1.0):
+    """`chain.ainvoke` relancé sur 429 / 5xx : attente 1s, 2s, 4s (+ gigue) ou Retry-After si fourni."""
+    for attempt in range(attempts):
         try:
-            if not source_date:
-                return True
-            year = int(source_date) if source_date.isdigit() else int(source_date.split("-")[0])
-            current_year = datetime.now().year
-            return (current_year - year) > 3
-        except:
-            return True
-    
-    def _validate_source_quality(self, facts: List[Dict]) -> Dict[str, Any]:
-        """
-        Valide la qualité des sources et génère des alertes.
-        
-        Returns:
-            {
-                "is_valid": bool,
-                "quality_score": 0-100,
-                "warnings": List[str],
-                "critical_gaps": List[str],
-                "primary_sources_count": int,
-                "secondary_sources_count": int,
-                "proxy_sources_count": int
-            }
-        """
-        warnings = []
-        critical_gaps = []
-        score = 100
-        
-        primary_count = 0
-        secondary_count = 0
-        proxy_count = 0
-        
-        for fact in facts:
-            source_name = fact.get("source_name", "") or fact.get("source", "")
-            source_type = fact.get("source_type", "").lower()
-            
-            # Comptage par type
-            if source_type == "primaire":
-                primary_count += 1
-            elif source_type == "secondaire":
-                secondary_count += 1
-            elif source_type == "proxy":
-                proxy_count += 1
-            
-            # Validation source_name
-            if not source_name or source_name in ["N/A", "Estimation", "Analyse"]:
-                critical_gaps.append(f"{fact.get('key', 'Unknown')}: Source manquante ou générique")
-                score -= 15
-            
-            # Validation source_date
-            source_date = fact.get("source_date", "")
-            if not source_date:
-                warnings.append(f"{fact.get('key', 'Unknown')}: Date de source manquante")
-                score -= 10
-            elif self._is_aged_source(source_date):
-                warnings.append(f"{fact.get('key', 'Unknown')}: Source datée ({source_date})")
-                score -= 5
-            
-            # Validation périmètre géographique pour ajustements
-            if fact.get("is_global_adjusted") and not fact.get("adjustment_method"):
-                critical_gaps.append(f"{fact.get('key', 'Unknown')}: Ajustement géographique non documenté")
-                score -= 20
-            
-            # Validation source_reference
-            if source_name and source_name not in ["N/A", "Estimation", "Analyse"]:
-                if not fact.get("source_reference"):
-                    warnings.append(f"{fact.get('key', 'Unknown')}: Référence précise manquante pour {source_name}")
-                    score -= 5
-        
-        return {
-            "is_valid": len(critical_gaps) == 0,
-            "quality_score": max(0, score),
-            "warnings": warnings,
-            "critical_gaps": critical_gaps,
-            "primary_sources_count": primary_count,
-            "secondary_sources_count": secondary_count,
-            "proxy_sources_count": proxy_count
-        }
-    
-    # Secteurs régulés (pour détection automatique)
-    REGULATED_SECTORS = {
-        "healthcare": ["téléconsultation", "e-santé", "dispositif médical", "télémédecine", "santé"],
-        "finance": ["paiement", "assurance", "crédit", "banque", "fintech"],
-        "energy": ["électricité", "gaz", "énergie renouvelable"],
-        "transport": ["taxi", "vtc", "mobilité"],
-        "education": ["formation", "éducation", "enseignement"]
-    }
-    
-    def _detect_regulatory_context(self, market_name: str) -> Dict[str, Any]:
-        """Détecte si le marché est régulé et quel secteur."""
-        market_lower = market_name.lower()
-        
-        for sector, keywords in self.REGULATED_SECTORS.items():
-            if any(kw in market_lower for kw in keywords):
-                return {
-                    "is_regulated": True,
-                    "sector": sector,
-                    "requires_documentation": True,
-                    "detected_keywords": [kw for kw in keywords if kw in market_lower]
-                }
-        
+            return await chain.ainvoke(variables)
+        except httpx.HTTPStatusError as e:
+            if attempt == attempts - 1 or e.response.status_code not in _RETRYABLE_STATUS:
+                raise
+            retry_after = e.response.headers.get("retry-after", "")
+            delay = float(retry_after) if retry_after.isdigit() else base_delay * 2 ** attempt * (1 + random.random() / 2)
+            _logger.warning("⏳ [LLM] Réponse %s, nouvelle tentative dans %.1fs", e.response.status_code, delay)
+            await asyncio.sleep(delay)
+
+class _JsonSectionScanner:
+    """
+    Suit un objet JSON reçu par morceaux (streaming LLM) et repère la fin de chaque
+    membre de l'objet racine. `feed` renvoie les couples (clé, valeur) complétés.
+    Le texte hors de l'objet racine (balises ```json) est ignoré.
+    Pour les membres tableaux listés dans `item_keys`, chaque élément est aussi publié
+    dès qu'il est complet, sous la clé "<clé>[]" (ex: ("market_trends[]", tendance)).
+    """
+
+    def __init__(self, item_keys: Tuple[str, ...] = ()):
+        self._item_keys = item_keys
+        self._item_start = None
+        self._text = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._key_start = 0
+        self._key = None
+        self._value_start = None
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        self._text += chunk
+        text = self._text
+        completed = []
+        for i in range(self._pos, len(text)):
+            c = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._value_start is None:
+                        self._key = _json_loads(text[self._key_start:i + 1])
+            elif c == '"':
+                self._in_string = True
+                if self._depth == 1 and self._value_start is None:
+                    self._key_start = i
+            elif c == ":" and self._depth == 1 and self._value_start is None:
+                self._value_start = i + 1
+            elif c in "{[":
+                self._depth += 1
+                if c == "[" and self._depth == 2 and self._key in self._item_keys:
+                    self._item_start = i + 1
+            elif c in "}],":
+                if c != ",":
+                    self._depth -= 1
+                # Fin d'un élément d'un tableau suivi : virgule au niveau 2 ou crochet fermant le tableau
+                if self._item_start is not None and ((c == "," and self._depth == 2) or (c == "]" and self._depth == 1)):
+                    item = text[self._item_start:i]
+                    if item.strip():
+                        try:
+                            completed.append((f"{self._key}[]", _json_loads(item)))
+                        except ValueError:
+                            pass
+                    self._item_start = i + 1 if c == "," else None
+                # Fin d'un membre racine : virgule au niveau 1 ou accolade fermant l'objet racine
+                if self._value_start is not None and (self._depth == 0 or (c == "," and self._depth == 1)):
+                    try:
+                        completed.append((self._key, _json_loads(text[self._value_start:i])))
+                    except ValueError:
+                        pass
+                    self._key, self._value_start = None, None
+        self._pos = len(text)
+        return completed
+
+
+class SQLiteLLMCache(BaseCache):
+    """
+    Cache LLM persistant (SQLite) partagé entre workers et redémarrages.
+    Clé = hash(prompt, paramètres du modèle) ; les entrées expirent après `ttl_seconds`.
+    """
+
+    def __init__(self, database_path: str, ttl_seconds: float):
+        self._database_path = database_path
+        self._ttl_seconds = ttl_seconds
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, response TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        # Une connexion par opération : les lookups async passent par des threads d'executor
+        return sqlite3.connect(self._database_path, timeout=5)
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\x00{prompt}".encode("utf-8")).hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT response FROM llm_cache WHERE key = ? AND created_at > ?",
+                (self._key(prompt, llm_string), time.time() - self._ttl_seconds)
+            ).fetchone()
+        if row is None:
+            return None
+        return [ChatGeneration(message=message) for message in messages_from_dict(_json_loads(row[0]))]
+
+    def update(self, prompt: str, llm_string: str, return_val) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, response, created_at) VALUES (?, ?, ?)",
+                (self._key(prompt, llm_string), json.dumps(messages_to_dict([g.message for g in return_val])), time.time())
+            )
+
+    def clear(self, **kwargs) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM llm_cache")
+
+
+# Modèles Mistral : standard pour les analyses, léger (moins cher, plus rapide) pour les tâches simples
+_DEFAULT_MODEL = "mistral-small"
+_LIGHT_MODEL = "ministral-3b-latest"
+
+# Briques de l'estimation multi-méthodes converties en facts :
+# (bloc JSON, champ, suffixe d'id, clé fact, source_type, dérivation, source par défaut, notes par défaut, unité forcée)
+_MARKET_BRICK_SPEC = (
+    ("bottom_up", "target_volume", "bu_vol", "total_potential_customers", "Primaire/Proxy", "bottom_up_brick", "Estimation", "", None),
+    ("bottom_up", "unit_price", "bu_price", "average_price", "Estimation", "bottom_up_brick", "Estimation", "", None),
+    ("supply_led", "top_players_revenue", "sup_rev", "top_players_cumulative_revenue", "Aggregated", "supply_brick", None,
+     "Aggregation des revenus leaders", None),
+    ("supply_led", "long_tail_factor", "sup_fac", "market_multiplier_factor", "Heuristic", "supply_brick", None,
+     "Facteur d'extension Pareto", "x"),
+)
+
+# Ratios SAM/SOM : (préfixe JSON, % par défaut, clé fact, source, confiance, notes par défaut)
+_MARKET_RATIO_SPEC = (
+    ("sam", 20, "sam_percent", "Segmentation IA", "medium", "Sélection du segment adressable."),
+    ("som", 5, "som_share", "Cible Stratégique IA", "low", "Part de marché cible réaliste."),
+)
+
+# Plafonds de tokens générés par type d'appel : la longueur de sortie domine la latence.
+# Dimensionnés à ~1,5x la taille estimée des schémas attendus (JSON en français, ~3,5 caractères
+# par token). Une réponse malgré tout tronquée (finish_reason "length") est relancée sans plafond
+# par _ainvoke_capped / _invoke_capped : un JSON coupé serait inexploitable.
+_MAX_OUTPUT_TOKENS = {
+    "swot": 1200,          # 12 items sourcés (item, evidence, source, source_type) : ~800 tokens
+    "bcg": 400,            # 4-5 segments : ~250 tokens
+    "pestel": 600,         # 6 dimensions : ~400 tokens
+    "market_sizing": 1600, # 3 perspectives + ratios avec descriptions détaillées : ~1000 tokens
+    "competitors": 64,     # liste de 5 tickers
+}
+
+# Small model + short output cap for competitors: the answer is a 5-ticker JSON list
+_COMPETITORS_CALL = {"model": _LIGHT_MODEL, "temperature": 0}
+
+def _is_truncated(response) -> bool:
+    """Réponse coupée par le plafond max_tokens (finish_reason "length" renvoyé par Mistral)."""
+    return (getattr(response, "response_metadata", None) or {}).get("finish_reason") == "length"
+
+def _fmt_billions(value: float, decimals: int = 2) -> str:
+    """Formate un montant en milliards de dollars (ex: $1.23B)."""
+    return f"${value / 1e9:.{decimals}f}B"
+
+def _slug(text: str) -> str:
+    """Clé de fact dérivée d'une description (espaces → _, minuscules, 50 caractères max)."""
+    # Entrée bornée avant transformation : une description LLM de plusieurs Ko n'est pas
+    # recopiée en entier (la marge couvre les minuscules de plus d'un caractère, ex: "İ").
+    return text[:64].replace(" ", "_").lower()[:50]
+
+# Budget par contexte injecté dans un prompt (~1 000 tokens) : les contextes collés depuis
+# l'interface (résultats précédents, notes) peuvent faire plusieurs dizaines de Ko.
+_CONTEXT_MAX_CHARS = 4000
+
+def _compact_context(text: Union[str, Dict[str, Any]], max_chars: int = _CONTEXT_MAX_CHARS) -> str:
+    """
+    Contexte de prompt compacté : espaces et sauts de ligne fusionnés, tronqué à `max_chars`.
+    Un dict (résultat d'un module précédent) est sérialisé en JSON compact plutôt qu'en repr Python.
+    """
+    if not text:
+        return ""
+    if not isinstance(text, str):
+        text = json.dumps(text, ensure_ascii=False, separators=(",", ":"), default=str)
+    text = " ".join(text.split())
+    if len(text) > max_chars:
+        text = text[:max_chars] + " […]"
+    return text
+
+# Libellés des types de source renvoyés en minuscules par le LLM : une recherche dans le dict
+# renvoie toujours la même chaîne (pas de nouvelle chaîne par fact comme avec .capitalize()).
+_SOURCE_TYPE_LABELS = {"primaire": "Primaire", "secondaire": "Secondaire", "proxy": "Proxy"}
+
+def _source_type_label(source_type: str) -> str:
+    """Type de source au format des facts ("primaire" → "Primaire"), .capitalize() pour les valeurs inattendues."""
+    return _SOURCE_TYPE_LABELS.get(source_type) or source_type.capitalize()
+
+def _now_iso() -> str:
+    """Horodatage UTC ISO 8601 à la seconde (même format que datetime.now(timezone.utc).isoformat(timespec="seconds"))."""
+    return time.strftime("%Y-%m-%dT%H:%M:%S+00:00", time.gmtime())
+
+@dataclass(slots=True)
+class Fact:
+    """Fact structuré produit par les convertisseurs (9 champs attendus par le facts_manager)."""
+    id: str
+    category: str
+    key: str
+    value: Any
+    unit: str
+    source: str
+    source_type: str
+    confidence: str
+    notes: str
+
+    def as_dict(self) -> Dict[str, Any]:
+        # Conversion superficielle : dataclasses.asdict recopierait récursivement les valeurs
         return {
-            "is_regulated": False,
-            "sector": None,
-            "requires_documentation": False
+            "id": self.id,
+            "category": self.category,
+            "key": self.key,
+            "value": self.value,
+            "unit": self.unit,
+            "source": self.source,
+            "source_type": self.source_type,
+            "confidence": self.confidence,
+            "notes": self.notes
         }
-    
-    def _format_financial_context(self, facts: Dict[str, Any]) -> str:
-        """
-        Formate les données financières pour enrichir le prompt LLM.
-        
-        Args:
-            facts: Données du facts_service
-            
-        Returns:
-            Contexte financier formaté en texte
-        """
-        if not facts or facts.get("error"):
-            return "Données financières non disponibles."
-        
-        derived = facts.get("derived", {})
-        info = facts.get("info", {})
-        
-        context_parts = []
-        
-        # Infos générales
-        if info:
-            sector = info.get("sector", "N/A")
-            industry = info.get("industry", "N/A")
-            employees = info.get("fullTimeEmployees", "N/A")
-            market_cap = info.get("marketCap", 0)
-            
-            context_parts.append(f"Secteur: {sector} | Industrie: {industry}")
-            context_parts.append(f"Employés: {employees:,}" if isinstance(employees, int) else f"Employés: {employees}")
-            if market_cap:
-                context_parts.append(f"Capitalisation: ${market_cap/1e9:.1f}B")
-        
-        # Métriques financières
-        if derived.get("revenue") is not None:
-            try:
-                latest_revenue = derived["revenue"].iloc[-1]
-                context_parts.append(f"Dernier CA: ${latest_revenue/1e9:.2f}B")
-            except:
-                pass
-        
-        if derived.get("net_income") is not None:
-            try:
-                latest_income = derived["net_income"].iloc[-1]
-                context_parts.append(f"Dernier Résultat Net: ${latest_income/1e9:.2f}B")
-            except:
-                pass
+
+# Règles SWOT financières : (métrique, opérateur, seuil, catégorie, libellé, justification).
+# Dans le libellé, {v} = dernière valeur, {b} = valeur formatée en milliards ($x.xB).
+_FINANCIAL_EVIDENCE = "Donnée financière réelle"
+_SWOT_RULES = (
+    ("net_margin", operator.gt, 15, "strengths", "Marge nette élevée ({v:.1f}%)", _FINANCIAL_EVIDENCE),
+    ("net_margin", operator.lt, 5, "weaknesses", "Marge nette faible ({v:.1f}%)", _FINANCIAL_EVIDENCE),
+    ("roe", operator.gt, 20, "strengths", "ROE excellent ({v:.1f}%)", _FINANCIAL_EVIDENCE),
+    ("roe", operator.lt, 10, "weaknesses", "ROE en dessous des standards ({v:.1f}%)", _FINANCIAL_EVIDENCE),
+    ("debt_to_equity", operator.gt, 2, "threats", "Endettement élevé (D/E: {v:.2f})", _FINANCIAL_EVIDENCE),
+    ("debt_to_equity", operator.lt, 0.5, "strengths", "Structure financière solide (D/E: {v:.2f})", _FINANCIAL_EVIDENCE),
+    ("fcf", operator.gt, 0, "opportunities", "Trésorerie disponible (FCF: {b})",
+     _FINANCIAL_EVIDENCE + " - Capacité d'investissement"),
+    ("fcf", operator.le, 0, "threats", "FCF négatif ({b})", _FINANCIAL_EVIDENCE),
+)
+
+# Prompts compilés une seule fois au chargement du module
+# Tous les prompts suivent le même découpage : consignes + schéma JSON dans un message
+# système constant (octet pour octet, sans variable interpolée), puis un message utilisateur
+# court portant les seules variables. Le préfixe commun peut ainsi être réutilisé côté serveur.
+_STRATEGIC_USER_MESSAGE = """Entreprise : {company}
+
+DONNÉES FINANCIÈRES RÉELLES (pour contexte uniquement):
+{financial_context}"""
+
+_SCOPE_USER_MESSAGE = 'Marché : "{scope}"'
+
+# Type attendu de chaque section stratégique : une section absente ou mal typée est une erreur
+_SECTION_TYPES = {"swot": dict, "bcg": list, "pestel": dict}
+
+_SWOT_TEMPLATE = ChatPromptTemplate.from_messages([
+    ("system", """Tu es un consultant stratégique senior. Génère l'analyse SWOT de l'entreprise indiquée, au format JSON strict.
+CHAQUE ÉLÉMENT DOIT AVOIR UNE SOURCE CITÉE.
+
+SCHÉMA :
+{{"swot": {{"strengths": [ITEM], "weaknesses": [ITEM], "opportunities": [ITEM], "threats": [ITEM]}}}}
+ITEM = {{"item": "Force courte", "evidence": "Justification", "source": "Rapport Annuel 2023", "source_type": "rapport_financier"}}
+
+TYPES DE SOURCES (source_type) :
+- "rapport_financier" : 10-K, rapports annuels, earnings calls
+- "presse" : Reuters, Bloomberg, WSJ, Financial Times
+- "analyse_marche" : IDC, Gartner, McKinsey, BCG, Forrester
+- "regulateur" : EU Commission, SEC, FDA
+
+RÈGLES SWOT :
+- EXACTEMENT 3 éléments par catégorie
+- "item" : MAX 35 caractères, concis
+- "evidence" : MAX 50 caractères
+- "source" : DOIT ÊTRE PRÉCISE (Ex: "Rapport Annuel 2023", "Reuters 12/2023", "Gartner Q3 2024").
+- INTERDIT de mettre "Analyse IA", "Site web", "Interne". Trouve une vraie source publique plausible.
+- Ne PAS mentionner de chiffres financiers
+
+Réponds UNIQUEMENT avec du JSON valide, aucun texte autour."""),
+    ("human", _STRATEGIC_USER_MESSAGE),
+])
+
+_BCG_TEMPLATE = ChatPromptTemplate.from_messages([
+    ("system", """Tu es un consultant stratégique senior. Génère la matrice BCG de l'entreprise indiquée, au format JSON strict.
+
+SCHÉMA :
+{{"bcg": [{{"name": "Segment", "market_share": 0.8, "growth": 0.6, "revenue_weight": 50, "source": "IDC/Gartner Q3 2024"}}]}}
+
+RÈGLES BCG : 4-5 segments, source PRÉCISE requise pour chaque part de marché
+
+Réponds UNIQUEMENT avec du JSON valide, aucun texte autour."""),
+    ("human", _STRATEGIC_USER_MESSAGE),
+])
+
+_PESTEL_TEMPLATE = ChatPromptTemplate.from_messages([
+    ("system", """Tu es un consultant stratégique senior. Génère l'analyse PESTEL de l'entreprise indiquée, au format JSON strict.
+
+SCHÉMA (une entrée par dimension : Politique, Economique, Societal, Technologique, Environnemental, Legal) :
+{{"pestel": {{"Politique": {{"score": 7, "details": "Impact...", "source": "Reuters 2024"}}, ...}}}}
+
+RÈGLES PESTEL : Score 0-10, source PRÉCISE requise pour chaque fait cité
+
+Réponds UNIQUEMENT avec du JSON valide, aucun texte autour."""),
+    ("human", _STRATEGIC_USER_MESSAGE),
+])
+
+_MARKET_SIZING_TEMPLATE = ChatPromptTemplate.from_messages([
+    ("system", """
+        Tu es l'architecte du moteur d'estimation de marché de KPMG.
         
-        if derived.get("net_margin") is not None:
-            try:
-                latest_margin = derived["net_margin"].iloc[-1]
-                context_parts.append(f"Marge Nette: {latest_margin:.1f}%")
-            except:
-                pass
+        🎯 OBJECTIF CRITIQUE
+        Ne te contente JAMAIS de chercher un chiffre "TAM Global" sur internet.
+        Ta mission est de **CONSTRUIRE** une estimation granulaire pour le marché indiqué en fin de message.
         
-        if derived.get("roe") is not None:
-            try:
-                latest_roe = derived["roe"].iloc[-1]
-                context_parts.append(f"ROE: {latest_roe:.1f}%")
-            except:
-                pass
+        🏗️ PHILOSOPHIE DE CONSTRUCTION (Granularité > Source Unique)
+        Pour les marchés niches ou mal documentés, tu dois décomposer le problème :
+        - Au lieu de dire "TAM = 1Md€", dis : "10k Usines x 5 Machines/Usine x 20k€/Machine".
+        - Utilise des **PROXYS** (ex: Si pas de données sur le marché du "Miel de Lavande", utilise "Marché du Miel" x "% Production Lavande").
         
-        if derived.get("debt_to_equity") is not None:
-            try:
-                latest_de = derived["debt_to_equity"].iloc[-1]
-                context_parts.append(f"Ratio Dette/Equity: {latest_de:.2f}")
-            except:
-                pass
+        🧩 MÉTHODOLOGIE ATTENDUE (3 PERSPECTIVES)
         
-        if derived.get("fcf") is not None:
-            try:
-                latest_fcf = derived["fcf"].iloc[-1]
-                context_parts.append(f"Free Cash Flow: ${latest_fcf/1e9:.2f}B")
-            except:
-                pass
+        1️⃣ Perspective SECONDAIRE (Validée si possible, sinon extrapolée)
+        - Cherche un rapport de confiance. Si introuvable, déduis-le d'un marché parent (Top-Down).
+        - Ex: "Marché Global du Logiciel" -> "Part du Vertical Industrie" -> "Part du sous-segment".
         
-        return "\n".join(context_parts) if context_parts else "Données financières limitées."
-    
-    def _extract_financial_swot_items(self, facts: Dict[str, Any]) -> Dict[str, list]:
-        """
-        Extrait 1-2 points SWOT automatiques basés sur les données financières.
-        Ces points seront ajoutés aux résultats du LLM.
-        """
-        financial_swot = {
-            "strengths": [],
-            "weaknesses": [],
-            "opportunities": [],
-            "threats": []
-        }
+        2️⃣ Perspective BOTTOM-UP (Construction par la Demande)
+        - C'est le cœur de ton estimation. Décompose en briques élémentaires :
+        - **Volume** : Base installée, Population cible, Nombre d'actes...
+        - **Intensité** : Taux d'équipement, Fréquence d'achat...
+        - **Valorisation** : Prix unitaire, Panier moyen...
+        - *Exemple Niche* : Pour "Maintenance de Ruches" -> (Nb Apiculteurs en France) x (Moyenne Ruches/Apiculteur) x (Coût Service/An).
         
-        if not facts or facts.get("error"):
-            return financial_swot
+        3️⃣ Perspective SUPPLY-LED (Offre / Concurrents)
+        - Estime le CA des leaders (ou d'un leader proxy).
+        - Applique un ratio de concentration (ex: Top 3 = 40% du marché).
+        - Si niche : CA Moyen d'un acteur type x Nombre d'acteurs estimés.
         
-        derived = facts.get("derived", {})
-        info = facts.get("info", {})
-        
-        # Analyse de la marge nette
-        if derived.get("net_margin") is not None:
-            try:
-                margin = derived["net_margin"].iloc[-1]
-                if margin > 15:
-                    financial_swot["strengths"].append({
-                        "item": f"Marge nette élevée ({margin:.1f}%)",
-                        "evidence": "Donnée financière réelle",
-                        "source": "financial"
-                    })
-                elif margin < 5:
-                    financial_swot["weaknesses"].append({
-                        "item": f"Marge nette faible ({margin:.1f}%)",
-                        "evidence": "Donnée financière réelle",
-                        "source": "financial"
-                    })
-            except:
-                pass
-        
-        # Analyse du ROE
-        if derived.get("roe") is not None:
-            try:
-                roe = derived["roe"].iloc[-1]
-                if roe > 20:
-                    financial_swot["strengths"].append({
-                        "item": f"ROE excellent ({roe:.1f}%)",
-                        "evidence": "Donnée financière réelle",
-                        "source": "financial"
-                    })
-                elif roe < 10:
-                    financial_swot["weaknesses"].append({
-                        "item": f"ROE en dessous des standards ({roe:.1f}%)",
-                        "evidence": "Donnée financière réelle",
-                        "source": "financial"
-                    })
-            except:
-                pass
-        
-        # Analyse du ratio d'endettement
-        if derived.get("debt_to_equity") is not None:
-            try:
-                de_ratio = derived["debt_to_equity"].iloc[-1]
-                if de_ratio > 2:
-                    financial_swot["threats"].append({
-                        "item": f"Endettement élevé (D/E: {de_ratio:.2f})",
-                        "evidence": "Donnée financière réelle",
-                        "source": "financial"
-                    })
-                elif de_ratio < 0.5:
-                    financial_swot["strengths"].append({
-                        "item": f"Structure financière solide (D/E: {de_ratio:.2f})",
-                        "evidence": "Donnée financière réelle",
-                        "source": "financial"
-                    })
-            except:
-                pass
-        
-        # Analyse du FCF
-        if derived.get("fcf") is not None:
-            try:
-                fcf = derived["fcf"].iloc[-1]
-                if fcf > 0:
-                    financial_swot["opportunities"].append({
-                        "item": f"Trésorerie disponible (FCF: ${fcf/1e9:.1f}B)",
-                        "evidence": "Donnée financière réelle - Capacité d'investissement",
-                        "source": "financial"
-                    })
-                else:
-                    financial_swot["threats"].append({
-                        "item": f"FCF négatif (${fcf/1e9:.1f}B)",
-                        "evidence": "Donnée financière réelle",
-                        "source": "financial"
-                    })
-            except:
-                pass
-        
-        # Limiter à 1-2 items max par catégorie
-        for key in financial_swot:
-            financial_swot[key] = financial_swot[key][:2]
-        
-        return financial_swot
-    
-    def get_strategic_analysis(
-        self, 
-        company: str, 
-        ticker: Optional[str] = None,
-        force_refresh: bool = False
-    ) -> Dict[str, Any]:
-        """
-        Génère une analyse stratégique complète (SWOT + BCG + PESTEL) en un seul appel LLM.
-        
-        Args:
-            company: Nom de l'entreprise (ex: "Apple", "Tesla")
-            ticker: Symbole boursier optionnel pour enrichissement financier (ex: "AAPL")
-            force_refresh: Force le recalcul même si en cache
-            
-        Returns:
-            Dictionnaire contenant:
-            - swot: {strengths, weaknesses, opportunities, threats}
-            - bcg: [{name, market_share, growth, revenue_weight}]
-            - pestel: {Politique, Economique, Societal, Technologique, Environnemental, Legal}
-            - financial_context: Contexte financier utilisé
-            - generated_at: Timestamp de génération
-        """
-        # AJOUT VERSION v3 FORCE INVALIDATE + DEBUG PRINT
-        cache_key = f"{company}_{ticker or 'no_ticker'}_v3"
-        print(f"[DEBUG V3] Requesting analysis for {company} (Key: {cache_key})")
-        
-        # Vérifier le cache
-        if not force_refresh and cache_key in self._cache and self._is_cache_valid(cache_key):
-            print(f"[STRATEGIC FACTS] Cache hit pour {company}")
-            return self._cache[cache_key]
-        
-        print(f"🔄 [STRATEGIC FACTS] Génération de l'analyse stratégique pour {company}...")
-        
-        # Récupérer les données financières si ticker fourni
-        financial_context = "Pas de données financières (ticker non spécifié)."
-        if ticker:
-            try:
-                facts = facts_service.get_company_facts(ticker)
-                financial_context = self._format_financial_context(facts)
-                print(f"Données financières {ticker} intégrées")
-            except Exception as e:
-                print(f"Erreur récupération financière: {e}")
-        
-        # Prompt unifié pour les 3 analyses avec sources obligatoires
-        prompt = ChatPromptTemplate.from_template("""
-Tu es un consultant stratégique senior. Analyse l'entreprise {company}.
-
-DONNÉES FINANCIÈRES RÉELLES (pour contexte uniquement):
-{financial_context}
-
-GÉNÈRE UNE ANALYSE STRATÉGIQUE COMPLÈTE AU FORMAT JSON STRICT.
-CHAQUE ÉLÉMENT DOIT AVOIR UNE SOURCE CITÉE.
-
-{{
-    "swot": {{
-        "strengths": [
-            {{"item": "Force courte", "evidence": "Justification", "source": "Nom PRÉCIS (ex: Rapport Annuel 2023, Reuters Jan 2024)", "source_type": "rapport_financier"}}
-        ],
-        "weaknesses": [
-            {{"item": "Faiblesse courte", "evidence": "Justification", "source": "Nom PRÉCIS (ex: Bloomberg Oct 2023)", "source_type": "presse"}}
-        ],
-        "opportunities": [
-            {{"item": "Opportunité courte", "evidence": "Justification", "source": "Nom PRÉCIS (ex: Gartner Forecast 2024)", "source_type": "analyse_marche"}}
-        ],
-        "threats": [
-            {{"item": "Menace courte", "evidence": "Justification", "source": "Nom PRÉCIS (ex: WSJ Dec 2023)", "source_type": "presse"}}
-        ]
-    }},
-    "bcg": [
-        {{"name": "Segment", "market_share": 0.8, "growth": 0.6, "revenue_weight": 50, "source": "IDC/Gartner Q3 2024"}}
-    ],
-    "pestel": {{
-        "Politique": {{"score": 7, "details": "Impact...", "source": "Reuters 2024"}},
-        "Economique": {{"score": 5, "details": "Contexte...", "source": "Bloomberg 2024"}},
-        "Societal": {{"score": 4, "details": "Tendances...", "source": "McKinsey 2024"}},
-        "Technologique": {{"score": 8, "details": "Évolutions...", "source": "Gartner 2024"}},
-        "Environnemental": {{"score": 6, "details": "Enjeux...", "source": "CDP Report 2024"}},
-        "Legal": {{"score": 5, "details": "Cadre...", "source": "EU Commission 2024"}}
-    }}
-}}
-
-TYPES DE SOURCES (source_type) :
-- "rapport_financier" : 10-K, rapports annuels, earnings calls
-- "presse" : Reuters, Bloomberg, WSJ, Financial Times
-- "analyse_marche" : IDC, Gartner, McKinsey, BCG, Forrester
-- "regulateur" : EU Commission, SEC, FDA
-
-RÈGLES SWOT :
-- EXACTEMENT 3 éléments par catégorie
-- "item" : MAX 35 caractères, concis
-- "evidence" : MAX 50 caractères
-- "source" : DOIT ÊTRE PRÉCISE (Ex: "Rapport Annuel 2023", "Reuters 12/2023", "Gartner Q3 2024").
-- INTERDIT de mettre "Analyse IA", "Site web", "Interne". Trouve une vraie source publique plausible.
-- Ne PAS mentionner de chiffres financiers
-
-RÈGLES BCG : 4-5 segments, source PRÉCISE requise pour chaque part de marché
-RÈGLES PESTEL : Score 0-10, source PRÉCISE requise pour chaque fait cité
-
-Réponds UNIQUEMENT avec du JSON valide, aucun texte autour.
-""")
-        
-        try:
-            llm = self._get_llm()
-            chain = prompt | llm
-            response = chain.invoke({
-                "company": company,
-                "financial_context": financial_context
-            })
-            
-            # Parsing du JSON
-            content = response.content.strip()
-            if content.startswith("```json"):
-                content = content.replace("```json", "").replace("```", "")
-            if content.startswith("```"):
-                content = content.replace("```", "")
-            
-            analysis = json.loads(content)
-            
-            # Enrichir le SWOT avec les données financières automatiques
-            financial_swot = {}
-            if ticker:
-                try:
-                    facts = facts_service.get_company_facts(ticker)
-                    financial_swot = self._extract_financial_swot_items(facts)
-                except:
-                    pass
-            
-            # Fusionner : items financiers en premier, puis items IA
-            merged_swot = {}
-            for category in ["strengths", "weaknesses", "opportunities", "threats"]:
-                ai_items = analysis.get("swot", {}).get(category, [])[:3]  # Max 3 AI items
-                fin_items = financial_swot.get(category, [])[:2]  # Max 2 financial items
-                # Financial items first (avec icône), puis AI items
-                merged_swot[category] = fin_items + ai_items
-            
-            # Structure finale avec métadonnées
-            result = {
-                "company": company,
-                "ticker": ticker,
-                "swot": merged_swot,
-                "bcg": analysis.get("bcg", []),
-                "pestel": analysis.get("pestel", {}),
-                "financial_context": financial_context,
-                "generated_at": datetime.now().isoformat()
-            }
-            
-            # Mise en cache
-            self._cache[cache_key] = result
-            self._cache_timestamps[cache_key] = datetime.now()
-            
-            print(f"✅ [STRATEGIC FACTS] Analyse générée et mise en cache pour {company}")
-            return result
-            
-        except json.JSONDecodeError as e:
-            print(f"[STRATEGIC FACTS] Erreur parsing JSON: {e}")
-            return self._empty_analysis(company, ticker, f"Erreur parsing: {e}")
-        except Exception as e:
-            print(f"[STRATEGIC FACTS] Erreur: {e}")
-            return self._empty_analysis(company, ticker, str(e))
-    
-    def _empty_analysis(self, company: str, ticker: Optional[str], error: str) -> Dict[str, Any]:
-        """Retourne une structure vide en cas d'erreur."""
-        return {
-            "company": company,
-            "ticker": ticker,
-            "error": error,
-            "swot": {
-                "strengths": [],
-                "weaknesses": [],
-                "opportunities": [],
-                "threats": []
-            },
-            "bcg": [],
-            "pestel": {},
-            "financial_context": "",
-            "generated_at": datetime.now().isoformat()
-        }
-    
-    def clear_cache(self, company: Optional[str] = None):
-        """
-        Vide le cache.
-        
-        Args:
-            company: Si spécifié, vide uniquement le cache de cette entreprise.
-        """
-        if company:
-            keys_to_remove = [k for k in self._cache.keys() if k.startswith(company)]
-            for key in keys_to_remove:
-                del self._cache[key]
-                del self._cache_timestamps[key]
-            print(f"🗑️ [STRATEGIC FACTS] Cache vidé pour {company}")
-        else:
-            self._cache.clear()
-            self._cache_timestamps.clear()
-            print("🗑️ [STRATEGIC FACTS] Cache entièrement vidé")
-    
-    def get_cache_stats(self) -> Dict[str, Any]:
-        """Retourne les statistiques du cache."""
-        return {
-            "entries": len(self._cache),
-            "companies": list(set(k.split("_")[0] for k in self._cache.keys())),
-            "ttl_minutes": self._cache_ttl.total_seconds() / 60
-        }
-
-
-    
-    def generate_market_sizing_facts(self, scope: str) -> List[Dict[str, Any]]:
-        """
-        Génère des estimations de marché (TAM/SAM/SOM) chiffrées via Mistral.
-        NOUVELLE LOGIQUE : Génération de multiples perspectives (Secondaire, Bottom-Up, Supply-Led).
-        """
-        print(f"🔄 [MARKET GENERATION] Estimation MULTI-MÉTHODES du marché pour : {scope}")
-        
-        prompt = ChatPromptTemplate.from_template("""
-        Tu es l'architecte du moteur d'estimation de marché de KPMG.
-        
-        🎯 OBJECTIF CRITIQUE
-        Ne te contente JAMAIS de chercher un chiffre "TAM Global" sur internet.
-        Ta mission est de **CONSTRUIRE** une estimation granulaire pour le marché : "{scope}".
-        
-        🏗️ PHILOSOPHIE DE CONSTRUCTION (Granularité > Source Unique)
-        Pour les marchés niches ou mal documentés, tu dois décomposer le problème :
-        - Au lieu de dire "TAM = 1Md€", dis : "10k Usines x 5 Machines/Usine x 20k€/Machine".
-        - Utilise des **PROXYS** (ex: Si pas de données sur le marché du "Miel de Lavande", utilise "Marché du Miel" x "% Production Lavande").
-        
-        🧩 MÉTHODOLOGIE ATTENDUE (3 PERSPECTIVES)
-        
-        1️⃣ Perspective SECONDAIRE (Validée si possible, sinon extrapolée)
-        - Cherche un rapport de confiance. Si introuvable, déduis-le d'un marché parent (Top-Down).
-        - Ex: "Marché Global du Logiciel" -> "Part du Vertical Industrie" -> "Part du sous-segment".
-        
-        2️⃣ Perspective BOTTOM-UP (Construction par la Demande)
-        - C'est le cœur de ton estimation. Décompose en briques élémentaires :
-        - **Volume** : Base installée, Population cible, Nombre d'actes...
-        - **Intensité** : Taux d'équipement, Fréquence d'achat...
-        - **Valorisation** : Prix unitaire, Panier moyen...
-        - *Exemple Niche* : Pour "Maintenance de Ruches" -> (Nb Apiculteurs en France) x (Moyenne Ruches/Apiculteur) x (Coût Service/An).
-        
-        3️⃣ Perspective SUPPLY-LED (Offre / Concurrents)
-        - Estime le CA des leaders (ou d'un leader proxy).
-        - Applique un ratio de concentration (ex: Top 3 = 40% du marché).
-        - Si niche : CA Moyen d'un acteur type x Nombre d'acteurs estimés.
-        
-        📝 FORMAT DE SORTIE JSON STRICT
-        Tu dois fournir des champs "desc" et "source" très détaillés expliquant ta logique de construction.
+        📝 FORMAT DE SORTIE JSON STRICT
+        Tu dois fournir des champs "desc" et "source" très détaillés expliquant ta logique de construction.
         
         {{
             "scope_definition": {{
@@ -646,697 +552,600 @@ Réponds UNIQUEMENT avec du JSON valide, aucun texte autour.
         
         Sois CRÉATIF mais RIGOUREUX. Si tu fais une estimation de Fermi, explique-la dans "desc".
         Réponds UNIQUEMENT le JSON.
-        """)
-        
-        try:
-            llm = self._get_llm()
-            chain = prompt | llm
-            response = chain.invoke({"scope": scope})
-            
-            # Parsing
-            content = response.content.strip()
-            if "```json" in content:
-                content = content.replace("```json", "").replace("```", "")
-            
-            data = json.loads(content)
-            facts = []
-            ts = int(datetime.now().timestamp())
-            
-            # 0. SCOPE DEFINITION FACT (NEW)
-            if "scope_definition" in data:
-                sd = data["scope_definition"]
-                facts.append({
-                    "id": f"scope_def_{ts}",
-                    "category": "scope_definition",
-                    "key": "market_scope_definition",
-                    "value": sd, # Store the whole dict
-                    "unit": "N/A",
-                    "source": "Moteur Sémantique",
-                    "confidence": "high",
-                    "notes": "Définition explicite du périmètre avant calcul."
-                })
-
-            # 1. SECONDARY TAM FACT
-            if "secondary_tam" in data and data["secondary_tam"].get("value"):
-                st = data["secondary_tam"]
-                facts.append({
-                    "id": f"gen_tam_sec_{ts}",
-                    "category": "market_estimation",
-                    "key": "tam_global_market", # Standard key for Engine
-                    "value": st["value"],
-                    "unit": st["unit"],
-                    "source": st.get("source", "Analyste IA"),
-                    "source_type": "Secondaire",
-                    "retrieval_method": "Rapport",
-                    "confidence": "high" if st.get("confidence", 0) > 0.7 else "medium",
-                    "notes": st.get("desc", f"Scope Source: {st.get('scope_match', 'N/A')}. Year: {st.get('year')}"),
-                    "derivation": "secondary", # NEW FIELD
-                    "coherence_score": st.get("confidence", 0.5)
-                })
-
-            # 2. BOTTOM UP FACTS
-            if "bottom_up" in data:
-                bu = data["bottom_up"]
-                if bu.get("target_volume"):
-                    facts.append({
-                        "id": f"gen_bu_vol_{ts}",
-                        "category": "market_estimation",
-                        "key": "total_potential_customers",
-                        "value": bu["target_volume"]["value"],
-                        "unit": bu["target_volume"]["unit"],
-                        "source": bu["target_volume"].get("source", "Estimation"),
-                        "source_type": "Primaire/Proxy",
-                        "notes": bu["target_volume"].get("desc", ""),
-                        "derivation": "bottom_up_brick"
-                    })
-                if bu.get("unit_price"):
-                    facts.append({
-                        "id": f"gen_bu_price_{ts}",
-                        "category": "market_estimation",
-                        "key": "average_price",
-                        "value": bu["unit_price"]["value"],
-                        "unit": bu["unit_price"]["unit"],
-                        "source": bu["unit_price"].get("source", "Estimation"),
-                        "source_type": "Estimation",
-                        "notes": bu["unit_price"].get("desc", ""),
-                        "derivation": "bottom_up_brick"
-                    })
-
-            # 3. SUPPLY LED FACTS (New Keys)
-            if "supply_led" in data:
-                sl = data["supply_led"]
-                if sl.get("top_players_revenue"):
-                    facts.append({
-                        "id": f"gen_sup_rev_{ts}",
-                        "category": "market_estimation",
-                        "key": "top_players_cumulative_revenue",
-                        "value": sl["top_players_revenue"]["value"],
-                        "unit": sl["top_players_revenue"]["unit"],
-                        "source": sl["top_players_revenue"].get("source"),
-                        "source_type": "Aggregated",
-                        "notes": sl["top_players_revenue"].get("desc", "Aggregation des revenus leaders"), # ADDED NOTES
-                        "derivation": "supply_brick"
-                    })
-                if sl.get("long_tail_factor"):
-                    facts.append({
-                        "id": f"gen_sup_fac_{ts}",
-                        "category": "market_estimation",
-                        "key": "market_multiplier_factor",
-                        "value": sl["long_tail_factor"]["value"],
-                        "unit": "x",
-                        "source": sl["long_tail_factor"].get("source"),
-                        "source_type": "Heuristic",
-                        "notes": sl["long_tail_factor"].get("desc", "Facteur d'extension Pareto"), # ADDED NOTES
-                        "derivation": "supply_brick"
-                    })
-
-            # 4. RATIOS
-            if "ratios" in data:
-                r = data["ratios"]
-                facts.append({
-                    "id": f"gen_sam_{ts}",
-                    "category": "market_estimation",
-                    "key": "sam_percent",
-                    "value": (r.get("sam_pct", 20) / 100.0),
-                    "unit": "%",
-                    "source": "Segmentation IA",
-                    "confidence": "medium",
-                    "notes": r.get("sam_desc", "Sélection du segment adressable.") # ADDED NOTES
-                })
-                facts.append({
-                    "id": f"gen_som_{ts}",
-                    "category": "market_estimation",
-                    "key": "som_share",
-                    "value": (r.get("som_pct", 5) / 100.0),
-                    "unit": "%",
-                    "source": "Cible Stratégique IA",
-                    "confidence": "low",
-                    "notes": r.get("som_desc", "Part de marché cible réaliste.") # ADDED NOTES
-                })
-
-            print(f"✅ [MARKET GENERATION] {len(facts)} Facts Granulaires Générés")
-            return facts
+        """),
+    ("human", _SCOPE_USER_MESSAGE),
+])
 
-        except Exception as e:
-            print(f"❌ [MARKET GENERATION] Erreur: {e}")
-            import traceback
-            traceback.print_exc()
-            return []
-
-    def find_competitors(self, scope: str) -> List[str]:
-        """
-        Identifies top 5 public competitors tickers for the given scope using Mistral.
-        Returns a list of tickers (e.g. ['SAP', 'ORCL', 'CRM']).
-        """
-        print(f"🕵️‍♂️ [COMPETITORS] Recherche des concurrents pour : {scope}")
-        
-        prompt = ChatPromptTemplate.from_template("""
+_COMPETITORS_TEMPLATE = ChatPromptTemplate.from_messages([
+    ("system", """
         Tu es un expert en intelligence économique.
-        Pour le marché : "{scope}", identifie les 5 entreprises cotées en bourse les plus pertinentes (Concurrents directs).
+        Pour le marché indiqué, identifie les 5 entreprises cotées en bourse les plus pertinentes (Concurrents directs).
         
         Format attendu : Une liste JSON de leurs TICKERS (Symboles boursiers) valides sur Yahoo Finance (US ou EU).
         Exemple : ["SAP", "ORCL", "CRM", "MSFT", "SAGE.L"]
         
         Réponds UNIQUEMENT le tableau JSON. Rien d'autre.
-        """)
-        
-        try:
-            llm = self._get_llm()
-            chain = prompt | llm
-            response = chain.invoke({"scope": scope})
-            
-            content = response.content.strip().replace("```json", "").replace("```", "")
-            tickers = json.loads(content)
-            
-            # Basic cleaning
-            valid_tickers = [t.strip().upper() for t in tickers if isinstance(t, str) and len(t) < 10]
-            print(f"✅ [COMPETITORS] Trouvés : {valid_tickers}")
-            return valid_tickers
-            
-        except Exception as e:
-            print(f"❌ [COMPETITORS] Erreur: {e}")
-            # Fallback list depends on scope, but return empty safe
-            return ["SAP", "ORCL", "MSFT"] # Generic Fallback
+        """),
+    ("human", _SCOPE_USER_MESSAGE),
+])
 
-    def generate_company_market_analysis(self, company_name: str, company_context: str = "") -> Dict[str, Any]:
-        """
-        NOUVELLE MÉTHODE - Analyse de marché centrée sur une entreprise.
-        
-        Méthodologie KPMG en 7 étapes :
-        1. Point de départ : l'entreprise (core business, marché de référence)
-        2. Placement dans le marché (périmètre précis)
-        3. Segmentation multi-axes
-        4. Dynamiques & tendances
-        5. Lien entreprise ↔ segments
-        6. Règles méthodologiques strictes
-        7. Format de sortie structuré
-        
-        Args:
-            company_name: Nom de l'entreprise (ex: "Doctolib", "Mirakl")
-            company_context: Contexte additionnel (secteur, offres, clients...)
-            
-        Returns:
-            Analyse structurée avec facts vérifiables
-        """
-        print(f"🏢 [MARKET ANALYSIS] Analyse centrée entreprise pour : {company_name}")
-        
-        prompt = ChatPromptTemplate.from_template("""
-Tu es un assistant d'analyse stratégique pour un cabinet de conseil de premier plan.
-Ta mission est de partir d'une entreprise donnée, de la positionner dans son marché réel, puis de reconstruire le marché de manière structurée, segmentée et dynamique, en t'appuyant uniquement sur des sources vérifiables.
+# Analyse de marché centrée entreprise et market sizing contextuel (méthodologie KPMG)
+_COMPANY_ANALYSIS_USER_MESSAGE = """ENTREPRISE À ANALYSER : {company_name}
+CONTEXTE ADDITIONNEL : {company_context}"""
 
-═══════════════════════════════════════════════════════════════
-ENTREPRISE À ANALYSER : {company_name}
-CONTEXTE ADDITIONNEL : {company_context}
-═══════════════════════════════════════════════════════════════
+_COMPANY_ANALYSIS_TEMPLATE = ChatPromptTemplate.from_messages([
+    ("system", """Tu es un assistant d'analyse stratégique pour un cabinet de conseil de premier plan.
+À partir de l'entreprise indiquée dans le message utilisateur : positionne-la dans son marché réel, puis reconstruis ce marché (périmètre, taille, segmentation, dynamiques) en t'appuyant uniquement sur des sources vérifiables.
 
-🔒 RÈGLE FONDAMENTALE : MÉTHODE FACTS-FIRST
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-- Chaque fait utilisé DOIT être : identifié, daté, sourcé, qualifié (primaire/secondaire/proxy)
-- Si un fait est incertain : le déclarer explicitement + proposer méthode de contournement
-- INTERDIT d'inventer des chiffres sans justification
+RÈGLES (méthode facts-first) :
+- Chaque chiffre est identifié, daté, sourcé (IDC, Gartner, Statista, Xerfi, McKinsey, BCG, rapports annuels, SEC filings) et qualifié primaire|secondaire|proxy ; jamais sans périmètre ni méthode.
+- Aucun chiffre inventé : donnée incertaine → fourchette ou méthode de contournement (missing_data) ; estimations divergentes → comparer et expliquer l'écart.
 
-📋 FORMAT DE SORTIE JSON STRICT :
+FORMAT DE SORTIE (JSON strict, les valeurs ci-dessous décrivent le contenu attendu) :
 {{
-    "executive_summary": {{
-        "company_positioning": "Résumé en 2-3 phrases du positionnement",
-        "core_business": "Produit/service réellement monétisé",
-        "reference_market": "Nom standardisé du marché principal",
-        "adjacent_markets": ["Marché adjacent 1", "Marché adjacent 2"],
-        "key_insight": "L'insight stratégique principal"
-    }},
-    
-    "methodology": {{
-        "facts_used": [
-            {{
-                "fact_id": "FACT_001",
-                "description": "Description du fait",
-                "value": 1500000000,
-                "unit": "EUR",
-                "date": "2024",
-                "source": "Nom EXACT de la source (ex: IDC Tracker Q3 2024)",
-                "source_type": "primaire|secondaire|proxy",
-                "confidence": "high|medium|low"
-            }}
-        ],
-        "missing_data": [
-            {{
-                "data_needed": "Donnée manquante",
-                "workaround": "Méthode de contournement proposée",
-                "proxy_used": "Description du proxy si applicable"
-            }}
-        ],
-        "assumptions": [
-            {{
-                "assumption_id": "HYP_001",
-                "description": "Description de l'hypothèse",
-                "justification": "Pourquoi cette hypothèse est raisonnable",
-                "impact_if_wrong": "Conséquence si l'hypothèse est fausse"
-            }}
-        ]
-    }},
-    
-    "market_mapping": {{
-        "market_name": "Nom standardisé (terminologie cabinets/bases de données)",
-        "perimeter": {{
-            "value_type": "revenu_final|depenses_IT|capex|opex",
-            "business_model": "SaaS|licences|services|mix",
-            "client_typology": "PME|ETI|grands_comptes|B2C",
-            "geography": "Global|Europe|France|...",
-            "inclusions": ["Ce qui est inclus 1", "Ce qui est inclus 2"],
-            "exclusions": ["Ce qui est exclu 1", "Ce qui est exclu 2"]
-        }},
-        "market_size": {{
-            "tam": {{"value": null, "unit": "EUR", "year": "2024", "source": "Source", "confidence": "medium"}},
-            "sam": {{"value": null, "unit": "EUR", "year": "2024", "source": "Source", "confidence": "medium"}},
-            "som": {{"value": null, "unit": "EUR", "year": "2024", "source": "Source", "confidence": "low"}}
-        }}
-    }},
-    
-    "segmentation": {{
-        "by_client": [
-            {{
-                "segment_name": "PME (<250 salariés)",
-                "weight_pct": 35,
-                "economic_logic": "Ticket moyen plus faible mais volume important",
-                "attractiveness": "high|medium|low",
-                "maturity": "emerging|growing|mature|declining"
-            }}
-        ],
-        "by_usage": [
-            {{
-                "segment_name": "Usage Core",
-                "weight_pct": 60,
-                "economic_logic": "Besoin fondamental du marché",
-                "attractiveness": "high",
-                "maturity": "mature"
-            }}
-        ],
-        "by_geography": [
-            {{
-                "segment_name": "France",
-                "weight_pct": 25,
-                "economic_logic": "Marché domestique principal",
-                "attractiveness": "medium",
-                "maturity": "growing"
-            }}
-        ]
-    }},
-    
-    "dynamics": {{
-        "growth_trends": [
-            {{
-                "trend": "Description de la tendance",
-                "type": "structural|conjunctural|prospective",
-                "impact": "+12% CAGR 2024-2028",
-                "source": "Gartner 2024",
-                "confidence": "high"
-            }}
-        ],
-        "drivers": [
-            {{
-                "driver": "Facteur moteur",
-                "category": "regulation|technology|cost|usage",
-                "direction": "positive|negative",
-                "magnitude": "high|medium|low"
-            }}
-        ],
-        "weak_signals": [
-            {{
-                "signal": "Signal faible détecté",
-                "potential_impact": "Rupture potentielle",
-                "timeline": "1-2 ans|3-5 ans|>5 ans"
-            }}
-        ]
-    }},
-    
-    "company_segment_fit": {{
-        "current_presence": [
-            {{
-                "segment": "Nom du segment",
-                "position": "leader|challenger|niche",
-                "market_share_est": 15,
-                "source": "Estimation basée sur..."
-            }}
-        ],
-        "over_exposed": ["Segment 1 (risque de...)"],
-        "under_exposed": ["Segment 2 (opportunité de...)"],
-        "strategic_fit": ["Segments cohérents avec l'ADN"],
-        "out_of_scope": ["Segments hors scope réaliste"]
-    }},
-    
-    "reliability_assessment": {{
-        "overall_confidence": "high|medium|low",
-        "data_coverage": 75,
-        "methodology_robustness": "Évaluation de la solidité méthodologique",
-        "key_uncertainties": ["Incertitude 1", "Incertitude 2"],
-        "recommendation_for_deepdive": "Recommandation pour approfondir"
+  "executive_summary": {{"company_positioning": "2-3 phrases", "core_business": "Produit/service réellement monétisé", "reference_market": "Nom standardisé du marché principal", "adjacent_markets": ["..."], "key_insight": "Insight stratégique principal"}},
+  "methodology": {{
+    "facts_used": [{{"fact_id": "FACT_001", "description": "...", "value": 1500000000, "unit": "EUR", "date": "2024", "source": "Nom EXACT (ex: IDC Tracker Q3 2024)", "source_type": "primaire|secondaire|proxy", "confidence": "high|medium|low"}}],
+    "missing_data": [{{"data_needed": "...", "workaround": "Méthode de contournement", "proxy_used": "Proxy si applicable"}}],
+    "assumptions": [{{"assumption_id": "HYP_001", "description": "...", "justification": "...", "impact_if_wrong": "..."}}]
+  }},
+  "market_mapping": {{
+    "market_name": "Nom standardisé (terminologie cabinets/bases de données)",
+    "perimeter": {{"value_type": "revenu_final|depenses_IT|capex|opex", "business_model": "SaaS|licences|services|mix", "client_typology": "PME|ETI|grands_comptes|B2C", "geography": "Global|Europe|France|...", "inclusions": ["..."], "exclusions": ["..."]}},
+    "market_size": {{
+      "tam": {{"value": null, "unit": "EUR", "year": "2024", "source": "...", "confidence": "high|medium|low"}},
+      "sam": {{"value": null, "unit": "EUR", "year": "2024", "source": "...", "confidence": "high|medium|low"}},
+      "som": {{"value": null, "unit": "EUR", "year": "2024", "source": "...", "confidence": "high|medium|low"}}
     }}
+  }},
+  "segmentation": {{
+    "by_client": [{{"segment_name": "PME (<250 salariés)", "weight_pct": 35, "economic_logic": "...", "attractiveness": "high|medium|low", "maturity": "emerging|growing|mature|declining"}}],
+    "by_usage": [{{"segment_name": "Usage Core", "weight_pct": 60, "economic_logic": "...", "attractiveness": "high|medium|low", "maturity": "emerging|growing|mature|declining"}}],
+    "by_geography": [{{"segment_name": "France", "weight_pct": 25, "economic_logic": "...", "attractiveness": "high|medium|low", "maturity": "emerging|growing|mature|declining"}}]
+  }},
+  "dynamics": {{
+    "growth_trends": [{{"trend": "...", "type": "structural|conjunctural|prospective", "impact": "+12% CAGR 2024-2028", "source": "Gartner 2024", "confidence": "high|medium|low"}}],
+    "drivers": [{{"driver": "...", "category": "regulation|technology|cost|usage", "direction": "positive|negative", "magnitude": "high|medium|low"}}],
+    "weak_signals": [{{"signal": "...", "potential_impact": "...", "timeline": "1-2 ans|3-5 ans|>5 ans"}}]
+  }},
+  "company_segment_fit": {{
+    "current_presence": [{{"segment": "...", "position": "leader|challenger|niche", "market_share_est": 15, "source": "Estimation basée sur..."}}],
+    "over_exposed": ["Segment (risque)"], "under_exposed": ["Segment (opportunité)"], "strategic_fit": ["Segments cohérents avec l'ADN"], "out_of_scope": ["Segments hors scope réaliste"]
+  }},
+  "reliability_assessment": {{"overall_confidence": "high|medium|low", "data_coverage": 75, "methodology_robustness": "...", "key_uncertainties": ["..."], "recommendation_for_deepdive": "..."}}
 }}
 
-🔍 RÈGLES DE SOURÇAGE STRICTES :
-- Ne JAMAIS donner un chiffre sans : périmètre + méthode + source
-- Si plusieurs estimations existent : les comparer et expliquer les écarts
-- Si donnée incertaine : fourchette OU méthode alternative
-- SOURCES ACCEPTÉES : IDC, Gartner, Statista, Xerfi, McKinsey, BCG, rapports annuels, SEC filings
-
 Réponds UNIQUEMENT avec du JSON valide, aucun texte autour.
-""")
-        
-        try:
-            llm = self._get_llm()
-            chain = prompt | llm
-            response = chain.invoke({
-                "company_name": company_name,
-                "company_context": company_context or "Pas de contexte additionnel fourni."
-            })
-            
-            # Parsing du JSON
-            content = response.content.strip()
-            if content.startswith("```json"):
-                content = content.replace("```json", "").replace("```", "")
-            if content.startswith("```"):
-                content = content.replace("```", "")
-            
-            analysis = json.loads(content)
-            
-            # Ajouter métadonnées
-            analysis["_meta"] = {
-                "company": company_name,
-                "generated_at": datetime.now().isoformat(),
-                "model": "mistral-small",
-                "methodology": "KPMG Market Sizing v2.0"
+"""),
+    ("human", _COMPANY_ANALYSIS_USER_MESSAGE),
+])
+
+# Forme attendue par _convert_market_analysis_to_facts : seuls les types des sections lues
+# sont contraints (une section absente ne produit simplement aucun fact).
+_MARKET_ANALYSIS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "market_mapping": {
+            "type": "object",
+            "properties": {
+                "perimeter": {"type": "object"},
+                "market_size": {
+                    "type": "object",
+                    "properties": {metric: {"type": ["object", "null"]} for metric in ("tam", "sam", "som")}
+                }
             }
-            
-            # Convertir en Facts pour le facts_manager
-            facts = self._convert_market_analysis_to_facts(analysis, company_name)
-            
-            print(f"✅ [MARKET ANALYSIS] Analyse générée : {len(facts)} facts extraits")
-            
-            return {
-                "analysis": analysis,
-                "facts": facts,
-                "success": True
+        },
+        "methodology": {
+            "type": "object",
+            "properties": {
+                "facts_used": {"type": "array", "items": {"type": "object", "properties": {"description": {"type": "string"}}}},
+                "assumptions": {"type": "array", "items": {"type": "object", "properties": {"description": {"type": "string"}}}}
             }
-            
-        except json.JSONDecodeError as e:
-            print(f"❌ [MARKET ANALYSIS] Erreur parsing JSON: {e}")
-            return {"success": False, "error": f"Parsing error: {e}", "facts": []}
-        except Exception as e:
-            print(f"❌ [MARKET ANALYSIS] Erreur: {e}")
-            import traceback
-            traceback.print_exc()
-            return {"success": False, "error": str(e), "facts": []}
-    
-    def _convert_market_analysis_to_facts(self, analysis: Dict, company: str) -> List[Dict]:
-        """Convertit l'analyse en facts structurés pour le facts_manager."""
-        facts = []
-        ts = int(datetime.now().timestamp())
-        
-        # 1. Facts de sizing
-        mapping = analysis.get("market_mapping", {})
-        sizing = mapping.get("market_size", {})
-        
-        for metric in ["tam", "sam", "som"]:
-            data = sizing.get(metric, {})
-            if data and data.get("value"):
-                facts.append({
-                    "id": f"ma_{company}_{metric}_{ts}",
-                    "category": "market_estimation",
-                    "key": f"{metric}_global_market" if metric == "tam" else f"{metric}_percent" if metric == "sam" else "som_share",
-                    "value": data["value"],
-                    "unit": data.get("unit", "EUR"),
-                    "source": data.get("source", "Analyse IA"),
-                    "source_type": "Secondaire",
-                    "confidence": data.get("confidence", "medium"),
-                    "notes": f"Marché: {mapping.get('market_name', company)}, Périmètre: {mapping.get('perimeter', {}).get('geography', 'N/A')}"
-                })
-        
-        # 2. Facts des hypothèses
-        methodology = analysis.get("methodology", {})
-        for fact_data in methodology.get("facts_used", []):
-            if fact_data.get("value"):
-                facts.append({
-                    "id": fact_data.get("fact_id", f"fact_{ts}"),
-                    "category": "market_estimation",
-                    "key": fact_data.get("description", "").replace(" ", "_").lower()[:50],
-                    "value": fact_data["value"],
-                    "unit": fact_data.get("unit", "EUR"),
-                    "source": fact_data.get("source", "Analyse"),
-                    "source_type": fact_data.get("source_type", "secondaire").capitalize(),
-                    "confidence": fact_data.get("confidence", "medium"),
-                    "notes": f"Date: {fact_data.get('date', 'N/A')}"
-                })
-        
-        # 3. Hypothèses comme facts qualifiés
-        for assumption in methodology.get("assumptions", []):
-            facts.append({
-                "id": assumption.get("assumption_id", f"hyp_{ts}"),
-                "category": "hypothesis",
-                "key": assumption.get("description", "")[:50].replace(" ", "_").lower(),
-                "value": assumption.get("description", ""),
-                "unit": "N/A",
-                "source": "Hypothèse Analyste",
-                "source_type": "Hypothèse",
-                "confidence": "low",
-                "notes": f"Justification: {assumption.get('justification', 'N/A')}. Impact si faux: {assumption.get('impact_if_wrong', 'N/A')}"
-            })
-        
-        return facts
-
-    def generate_sectoral_market_sizing(self, market_description: str, country: str, year: str, additional_context: str = "") -> Dict[str, Any]:
-        """
-        MÉTHODE DE MARKET SIZING SECTORIEL - Sans entreprise cible
-        
-        Contrairement à generate_contextual_market_sizing qui calcule le potentiel captif
-        par une entreprise spécifique (SOM), cette méthode estime la TAILLE TOTALE du marché
-        (TAM/SAM) de manière agnostique.
-        
-        Méthodologie :
-        1. Définition du périmètre sectoriel
-        2. Estimation multi-méthodes (Top-Down, Bottom-Up, Supply-Led)
-        3. Triangulation des résultats
-        4. Structure du marché (segments, acteurs types)
-        
-        Args:
-            market_description: Description du marché (ex: "Téléconsultation médicale")
-            country: Pays / zone géographique
-            year: Année de référence
-            additional_context: Contexte additionnel (régulation, périmètre, etc.)
-            
-        Returns:
-            Analyse structurée avec estimation TAM/SAM sectorielle
-        """
-        print(f"📊 [SECTORAL SIZING] Marché: {market_description} | Pays: {country} | Année: {year}")
-        
-        prompt = ChatPromptTemplate.from_template("""
-Tu es un assistant d'analyse stratégique senior utilisé par un cabinet de conseil de premier plan.
-Tu dois estimer la taille d'un MARCHÉ SECTORIEL, sans te focaliser sur une entreprise spécifique.
-Tu calcules la VALEUR TOTALE DU MARCHÉ (TAM/SAM), pas le potentiel d'un acteur particulier.
-
-═══════════════════════════════════════════════════════════════
-📌 CONTEXTE À ANALYSER
-═══════════════════════════════════════════════════════════════
-Marché / Secteur : {market_description}
+        }
+    }
+}
+
+# Forme attendue par le post-traitement du market sizing contextuel et son convertisseur :
+# l'estimation finale est obligatoire (chiffre central du module), le reste est typé si présent.
+_CONTEXTUAL_SIZING_SCHEMA = {
+    "type": "object",
+    "required": ["calculation"],
+    "properties": {
+        "market_definition": {"type": "object", "properties": {"market_name": {"type": "string"}}},
+        "facts_used": {"type": "array", "items": {"type": "object", "properties": {"description": {"type": "string"}}}},
+        "bottom_up_reconstruction": {
+            "type": "object",
+            "properties": {
+                "addressable_population": {"type": "object"},
+                "local_unit_value": {"type": "object"}
+            }
+        },
+        "calculation": {
+            "type": "object",
+            "required": ["final_estimate"],
+            "properties": {"final_estimate": {"type": "object"}}
+        },
+        "reliability": {"type": "object", "properties": {"overall_confidence": {"type": "string"}}},
+        "regulatory_impact": {"type": ["object", "null"]}
+    }
+}
+
+_MARKET_TRENDS_SCHEMA = {
+    "type": "object",
+    "required": ["market_trends"],
+    "properties": {
+        "context": {"type": "object"},
+        "market_trends": {"type": "array", "items": {"type": "object", "required": ["title"]}},
+        "weak_signals": {"type": "array", "items": {"type": "object"}},
+        "market_debates": {"type": "array", "items": {"type": "object"}},
+        "reliability": {"type": "object"}
+    }
+}
+
+# Validateurs compilés une fois (fastjsonschema génère une fonction Python dédiée au schéma)
+try:
+    import fastjsonschema
+    _validate_market_analysis = fastjsonschema.compile(_MARKET_ANALYSIS_SCHEMA)
+    _validate_contextual_sizing = fastjsonschema.compile(_CONTEXTUAL_SIZING_SCHEMA)
+    _validate_market_trends = fastjsonschema.compile(_MARKET_TRENDS_SCHEMA)
+    _SchemaError = fastjsonschema.JsonSchemaException
+except ImportError:
+    class _SchemaError(ValueError):
+        pass
+
+    def _validate_market_analysis(data):
+        return data
+
+    _validate_contextual_sizing = _validate_market_analysis
+    _validate_market_trends = _validate_market_analysis
+
+_CONTEXTUAL_SIZING_USER_MESSAGE = """Entreprise : {company_name}
 Pays / Zone : {country}
 Année : {year}
-Contexte additionnel : {additional_context}
-═══════════════════════════════════════════════════════════════
+Contexte additionnel : {additional_context}"""
 
-🔒 MODE SECTORIEL : Tu ne te concentres PAS sur une entreprise.
-Tu estimes la TAILLE TOTALE du marché pour TOUS les acteurs confondus.
+_CONTEXTUAL_SIZING_TEMPLATE = ChatPromptTemplate.from_messages([
+    ("system", """Tu es un assistant d'analyse stratégique senior utilisé par un cabinet de conseil de premier plan.
+Tu dois estimer la taille d'un marché dans un contexte précis, défini par une entreprise cible, un pays et une année donnée.
+Tu raisonnes UNIQUEMENT dans ce contexte, sans extrapolation générique.
+
+Le contexte à analyser (entreprise, pays / zone, année, contexte additionnel) est fourni dans le message utilisateur.
+
+🔒 RÈGLE FONDAMENTALE : Chaque fact doit être référencé (ID, source, date, pays).
+Aucune donnée non traçable n'est autorisée. Si un fact global est utilisé, tu dois l'ajuster au contexte local et expliquer la méthode.
 
 ⚠️ VALIDATION STRICTE DES SOURCES ⚠️
 
 Pour CHAQUE fact utilisé dans "facts_used", tu DOIS OBLIGATOIREMENT fournir :
 
 ✅ OBLIGATOIRE :
-1. **source_name** : Nom complet de l'organisation/étude (ex: "INSEE", "Grand View Research")
-2. **source_reference** : Référence précise du document
-3. **source_date** : Année de publication - OBLIGATOIRE
+1. **source_name** : Nom complet de l'organisation/étude (ex: "INSEE", "DREES", "Eurostat")
+2. **source_reference** : Référence précise du document (ex: "Portrait des professionnels de santé, édition 2024")
+3. **source_date** : Année de publication (ex: "2024") - OBLIGATOIRE
 4. **source_type** : "primaire" | "secondaire" | "proxy"
-5. **confidence** : "high" | "medium" | "low"
+5. **reliability** : "HIGH" | "MEDIUM" | "LOW"
+6. **country** : Pays couvert par la source (doit correspondre au contexte)
 
-📋 SOURCES INTERDITES :
+📋 SOURCES INTERDITES (rejettent automatiquement l'analyse) :
 ❌ "Estimation" sans méthodologie détaillée
 ❌ "Analyse sectorielle" sans nom d'étude précis
 ❌ Ratios géographiques arbitraires (ex: "8% pour la France")
 ❌ Sources > 3 ans sans justification explicite dans "notes"
+❌ "N/A", "Analyse", "Rapport générique"
+
+📊 AJUSTEMENTS GÉOGRAPHIQUES :
+Si tu utilises une donnée mondiale/européenne et l'ajustes au pays :
+- **is_global_adjusted** : true
+- **adjustment_method** : OBLIGATOIRE - Explique comment (PIB, population, etc.)
+- **adjustment_rationale** : OBLIGATOIRE - Justifie pourquoi ce ratio est valide
+
+Exemple INVALIDE :
+```json
+{{
+  "source": "Analyse",  // ❌ Trop vague
+  "source_date": "",   // ❌ Manquant
+  "value": 1500000000
+}}
+```
+
+Exemple VALIDE :
+```json
+{{
+  "source_name": "Grand View Research",
+  "source_reference": "Telemedicine Market Size, Share & Trends Analysis Report, 2024",
+  "source_url": "https://www.grandviewresearch.com/...",
+  "source_date": "2024",
+  "source_type": "secondaire",
+  "reliability": "MEDIUM",
+  "country": "Worldwide",
+  "is_global_adjusted": true,
+  "adjustment_method": "PIB France / PB Mondial (2.9%)",
+  "value": 43500000
+}}
+```
+
+🚨 CONSÉQUENCE : Si un fact critique manque de source documentée → **reliability = "LOW" automatique**
 
-🚨 AJUSTEMENTS GÉOGRAPHIQUES :
-Si tu utilises une donnée mondiale et l'ajustes au pays :
-- Dans "facts_used" : documenter la source mondiale
-- Dans "estimation_methods.top_down" : OBLIGATOIRE documenter "country_ratio_source"
 
 📋 FORMAT DE SORTIE JSON STRICT :
 {{
     "context_lock": {{
-        "mode": "sectoral",
-        "market_description": "{market_description}",
-        "country": "{country}",
-        "year": "{year}",
-        "scope_validated": true
+        "company_offerings": ["Offre 1 pertinente localement", "Offre 2"],
+        "local_business_model": "Description du modèle économique applicable localement",
+        "missing_info": ["Information manquante 1 (si applicable)"],
+        "context_validated": true
     }},
     
     "market_definition": {{
-        "market_name": "Nom standardisé du marché (ex: 'E-santé - Segment Téléconsultation')",
-        "market_justification": "Justification du périmètre retenu",
-        "perimeter": {{
-            "value_type": "revenu_final (CA des acteurs)",
-            "inclusions": ["Inclus 1", "Inclus 2"],
-            "exclusions": ["Exclu 1", "Exclu 2"]
-        }},
+        "market_name": "Nom du marché tel qu'adressable par l'entreprise",
+        "market_justification": "Pourquoi ce périmètre et pas un marché générique",
+        "excluded_segments": [
+            {{
+                "segment": "Segment exclu",
+                "reason": "Raison de l'exclusion (maturité, régulation, etc.)"
+            }}
+        ],
         "local_adaptations": {{
             "maturity_level": "emerging|growing|mature",
-            "regulatory_context": "Cadre réglementaire local pertinent"
+            "regulatory_context": "Cadre réglementaire local pertinent",
+            "healthcare_system": "Structure du système (si applicable)",
+            "purchasing_practices": "Pratiques d'achat locales"
         }}
     }},
     
     "facts_used": [
         {{
             "fact_id": "FACT_001",
-            "key": "population_cible",
+            "key": "population_medecins_liberaux",
             "description": "Description précise du fait",
-            "value": 67000000,
-            "unit": "personnes",
-            "source": "INSEE 2024",
-            "source_type": "primaire",
-            "confidence": "high",
-            "notes": "Population totale France métropolitaine"
+            "value": 102000,
+            "unit": "médecins",
+            "source_name": "DREES - Direction de la recherche, des études, de l'évaluation et des statistiques",
+            "source_reference": "Portrait des professionnels de santé, édition 2024",
+            "source_url": "https://drees.solidarites-sante.gouv.fr/...",
+            "source_date": "2024",
+            "source_type": "primaire|secondaire|proxy",
+            "reliability": "HIGH|MEDIUM|LOW",
+            "country": "Pays / zone de la donnée",
+            "is_global_adjusted": false,
+            "adjustment_method": null,
+            "notes": "Donnée officielle, mise à jour annuelle"
         }}
     ],
     
-    "estimation_methods": {{
-        "top_down": {{
-            "global_market_value": 1500000000,
-            "global_source": "Grand View Research 2024",
-            "country_ratio": 0.08,
-            "country_ratio_source": "Eurostat - Part PIB France/Monde",
-            "result": 120000000,
-            "confidence": "medium",
-            "methodology": "TAM Monde x Part Pays"
+    "bottom_up_reconstruction": {{
+        "economic_unit": {{
+            "name": "Unité économique locale (ex: Médecin libéral, Cabinet, Établissement)",
+            "definition": "Définition précise de l'unité dans le contexte local",
+            "relevance": "Pourquoi cette unité est pertinente"
         }},
-        "bottom_up": {{
-            "addressable_units": 500000,
-            "unit_definition": "Actes de téléconsultation par an",
-            "average_price": 25,
-            "price_source": "Tarification conventionnée CNAM",
-            "result": 125000000,
-            "confidence": "high",
-            "methodology": "Volume x Prix Moyen"
+        "addressable_population": {{
+            "total_units_in_country": 102000,
+            "total_units_source": "DREES 2024 - Portrait des professionnels de santé",
+            "filters_applied": [
+                {{
+                    "filter_name": "Spécialité médicale",
+                    "filter_value": "Généralistes uniquement",
+                    "remaining_units": 55000,
+                    "source_name": "CNOM - Conseil National de l'Ordre des Médecins",
+                    "source_reference": "Atlas de la démographie médicale 2024",
+                    "source_date": "2024",
+                    "is_hypothesis": false
+                }},
+                {{
+                    "filter_name": "Équipement numérique",
+                    "filter_value": "Connectés internet haut débit",
+                    "remaining_units": 49500,
+                    "source_name": "ARCEP",
+                    "source_reference": "Baromètre du numérique 2024",
+                    "source_date": "2024",
+                    "is_hypothesis": false
+                }},
+                {{
+                    "filter_name": "Capacité de paiement",
+                    "filter_value": "Revenus bruts > 50,000 EUR/an",
+                    "remaining_units": 42000,
+                    "source_name": "Hypothèse",
+                    "source_reference": "Basée sur CARMF - Revenu moyen des médecins libéraux: 92,000 EUR brut",
+                    "source_date": "2023",
+                    "is_hypothesis": true,
+                    "hypothesis_rationale": "ARPU SaaS (1200 EUR) représente 1.3% du revenu moyen, capacité d'absorption élevée"
+                }}
+            ],
+            "final_addressable_units": 42000
         }},
-        "supply_led": {{
-            "top_players_revenue": 80000000,
-            "top_players_names": ["Acteur A", "Acteur B", "Acteur C"],
-            "estimated_market_share": 0.65,
-            "market_share_source": "Estimation IDC/Gartner",
-            "result": 123000000,
-            "confidence": "medium",
-            "methodology": "CA Leaders / Part de Marché"
+        "local_unit_value": {{
+            "annual_price_local": 1200,
+            "currency": "EUR",
+            "price_source": "Doctolib pricing public 2024",
+            "price_source_url": "https://www.doctolib.fr/tarifs",
+            "comparison_vs_reference": "Prix France: 1200 EUR - marché de référence",
+            "adjustment_rationale": "Pas d'ajustement - pays de référence"
+        }},
+        "adoption_rate": {{
+            "estimated_rate_percent": 15,
+            "rate_justification": "Marché en phase de croissance, adoption progressive",
+            "rate_source": "Benchmark marchés similaires"
         }}
     }},
     
-    "triangulation": {{
-        "simple_average": 122666667,
-        "weighted_average": 123500000,
-        "weighting_rationale": "Bottom-up privilégié (données primaires France)",
-        "confidence_assessment": "Convergence des 3 méthodes à ±3%, fiabilité haute"
-    }},
+    "hypotheses_detailed": [
+        {{
+            "hypothesis_id": "HYP_001",
+            "variable": "adoption_rate",
+            "central_value": 15,
+            "unit": "%",
+            "justification_type": "benchmark",
+            "benchmark_references": [
+                {{"country": "Belgique", "value": 18, "source": "E-Santé Belgique 2024", "year": 2024}},
+                {{"country": "Allemagne", "value": 12, "source": "BVITG Digital Health Survey", "year": 2023}},
+                {{"country": "Pays-Bas", "value": 22, "source": "NIVEL 2024", "year": 2024}}
+            ],
+            "economic_rationale": "ARPU de 1200 EUR représente ~1.3% du CA moyen médecin libéral (92k EUR brut/an CARMF 2023). Seuil acceptable pour adoption rapide.",
+            "confidence_range": {{"low": 10, "central": 15, "high": 22}},
+            "sensitivity_impact": "Chaque point de variation impacte le résultat de ~6.7%"
+        }},
+        {{
+            "hypothesis_id": "HYP_002",
+            "variable": "capacity_threshold",
+            "central_value": 50000,
+            "unit": "EUR/an revenu brut",
+            "justification_type": "economic_rationale",
+            "economic_rationale": "Seuil de capacité de paiement: ARPU (1200 EUR) < 3% du revenu brut. Médecins sous 50k EUR brut ont des contraintes budgétaires plus fortes.",
+            "confidence_range": {{"low": 40000, "central": 50000, "high": 60000}},
+            "sensitivity_impact": "Seuil à 40k EUR → +7% unités éligibles. Seuil à 60k EUR → -12% unités éligibles."
+        }}
+    ],
     
-    "market_structure": {{
-        "concentration": "fragmenté|moyennement_concentré|oligopole",
-        "top_players": [
+    "sensitivity_analysis": {{
+        "scenarios": [
             {{
-                "name": "Leader A",
-                "estimated_share": 25,
-                "typology": "leader|challenger|niche",
-                "business_model": "SaaS|transactionnel|mixte"
+                "name": "Conservateur",
+                "description": "Hypothèses prudentes: adoption basse, prix stable",
+                "adoption_rate": 10,
+                "price": 1200,
+                "addressable_units": 42000,
+                "result": 5040000,
+                "probability_assessment": "Scénario si concurrence accrue ou régulation restrictive"
+            }},
+            {{
+                "name": "Central",
+                "description": "Hypothèses réalistes basées sur benchmarks",
+                "adoption_rate": 15,
+                "price": 1200,
+                "addressable_units": 42000,
+                "result": 7560000,
+                "probability_assessment": "Scénario le plus probable basé sur trajectoire actuelle"
+            }},
+            {{
+                "name": "Optimiste",
+                "description": "Hypothèses favorables: adoption rapide, up-sell pricing",
+                "adoption_rate": 22,
+                "price": 1320,
+                "addressable_units": 42000,
+                "result": 12196800,
+                "probability_assessment": "Scénario si remboursement étendu et adoption accélérée"
             }}
         ],
-        "long_tail_estimate": "40% du marché détenu par acteurs < 5M€ CA"
+        "key_sensitivities": [
+            {{
+                "variable": "adoption_rate",
+                "delta": "+5 points",
+                "base_value": 15,
+                "new_value": 20,
+                "impact_absolute": 2520000,
+                "impact_percent": "+33%"
+            }},
+            {{
+                "variable": "price",
+                "delta": "-10%",
+                "base_value": 1200,
+                "new_value": 1080,
+                "impact_absolute": -756000,
+                "impact_percent": "-10%"
+            }},
+            {{
+                "variable": "addressable_units",
+                "delta": "+10%",
+                "base_value": 42000,
+                "new_value": 46200,
+                "impact_absolute": 756000,
+                "impact_percent": "+10%"
+            }}
+        ],
+        "sensitivity_conclusion": "Le taux d'adoption est la variable la plus sensible. Variation prioritaire à monitorer."
     }},
     
-    "segmentation": {{
-        "by_client": [
-            {{"segment": "B2C - Particuliers", "weight_pct": 60}},
-            {{"segment": "B2B - Entreprises", "weight_pct": 40}}
+    "regulatory_impact": {{
+        "key_regulations": [
+            {{
+                "regulation_id": "REG_001",
+                "regulation_name": "Remboursement téléconsultation",
+                "regulatory_body": "CNAM / Assurance Maladie",
+                "status": "active",
+                "effective_date": "2018 (élargi 2020)",
+                "description": "Prise en charge à 100% des téléconsultations depuis 2020",
+                "impact_on": "adoption_rate",
+                "impact_direction": "positive",
+                "quantification": "+5-10 points d'adoption vs marchés sans remboursement (ex: UK avant NHS Digital)",
+                "source": "Rapport IGAS sur la télémédecine 2023"
+            }},
+            {{
+                "regulation_id": "REG_002",
+                "regulation_name": "Obligation de prescription dématérialisée",
+                "regulatory_body": "Ministère de la Santé",
+                "status": "progressive",
+                "effective_date": "2024-2025",
+                "description": "Obligation progressive de prescription électronique",
+                "impact_on": "addressable_units",
+                "impact_direction": "positive",
+                "quantification": "Augmentation de la base équipée de +5-8% par an",
+                "source": "Feuille de route du numérique en santé 2023-2027"
+            }}
         ],
-        "by_offering": [
-            {{"segment": "Consultations synchrones", "weight_pct": 70}},
-            {{"segment": "Suivi asynchrone", "weight_pct": 30}}
-        ]
+        "regulation_hypothesis_links": [
+            {{
+                "regulation_id": "REG_001",
+                "hypothesis_id": "HYP_001",
+                "link_explanation": "Le remboursement CNAM justifie un taux d'adoption supérieur aux pays sans prise en charge (UK: 8%, France: 15%)"
+            }}
+        ],
+        "regulatory_uncertainty": "Évolution possible des conditions de remboursement post-2025, à surveiller"
     }},
     
-    "growth_dynamics": {{
-        "cagr_estimate": 12.5,
-        "cagr_source": "Moyenne McKinsey/BCG/Gartner",
-        "cagr_period": "2024-2028",
-        "key_drivers": [
-            {{"driver": "Remboursement élargi", "impact": "high", "direction": "positive"}},
-            {{"driver": "Digitalisation santé", "impact": "medium", "direction": "positive"}}
+    "scope_analysis": {{
+        "chosen_scope": "Médecins généralistes libéraux uniquement",
+        "scope_stance": "conservative",
+        "scope_rationale": "Périmètre volontairement restreint aux généralistes libéraux (core market Doctolib) pour maximiser la fiabilité. Les spécialistes et établissements hospitaliers ont des modèles économiques différents.",
+        "alternatives_considered": [
+            {{
+                "scope": "Inclure spécialistes libéraux (+47,000 unités)",
+                "reason_excluded": "Modèle économique et tarification différents. Adoption plus variable par spécialité. Nécessiterait segmentation dédiée.",
+                "additional_value_estimate": 4500000,
+                "confidence": "LOW"
+            }},
+            {{
+                "scope": "Inclure télé-expertise inter-praticiens",
+                "reason_excluded": "Marché distinct avec régulation spécifique (avenant 6 convention médicale). Modèle B2B vs B2C.",
+                "additional_value_estimate": 1200000,
+                "confidence": "LOW"
+            }},
+            {{
+                "scope": "Extension paramédicaux (infirmiers, kinés)",
+                "reason_excluded": "Hors périmètre offre actuelle Doctolib. Capacité de paiement très différente.",
+                "additional_value_estimate": 2000000,
+                "confidence": "VERY LOW"
+            }}
         ],
-        "risks": [
-            {{"risk": "Régulation restrictive", "impact": "medium", "probability": "low"}}
-        ]
+        "expansion_potential": {{
+            "total_if_all_included": 15260000,
+            "confidence": "LOW",
+            "recommendation": "Valider le périmètre core avant extension"
+        }}
     }},
     
     "calculation": {{
-        "formula": "Triangulation multi-méthodes",
+        "formula": "Taille du marché = Unités éligibles × Prix annuel local × Taux d'adoption",
         "step_by_step": [
-            "1. Top-Down: 1.5Md€ (Monde) x 8% → 120M€",
-            "2. Bottom-Up: 500k actes x 25€ → 125M€",
-            "3. Supply-Led: 80M€ (Top 3) / 65% → 123M€",
-            "4. Triangulation pondérée → 123.5M€"
+            "1. Unités totales: 102,000 (DREES 2024)",
+            "2. Après filtre généralistes: 55,000 (CNOM 2024)",
+            "3. Après filtre numérique: 49,500 (ARCEP 2024)",
+            "4. Après filtre capacité paiement: 42,000 (Hypothèse économique)",
+            "5. Prix annuel local: 1,200 EUR (Pricing public Doctolib)",
+            "6. Taux d'adoption: 15% (Benchmark: BE 18%, DE 12%, NL 22%)",
+            "7. Calcul: 42,000 × 1,200 × 0.15 = 7,560,000 EUR"
         ],
+        "intermediate_values": {{
+            "gross_potential": 50400000,
+            "after_filters": 50400000,
+            "with_adoption": 7560000
+        }},
         "final_estimate": {{
-            "value": 123500000,
+            "value": 7560000,
             "unit": "EUR",
-            "year": "{year}",
-            "range_low": 110000000,
-            "range_high": 140000000
+            "year": "Année de référence",
+            "range_low": 5040000,
+            "range_high": 12196800
         }}
     }},
     
+    "validation": {{
+        "sanity_checks": [
+            {{
+                "check_name": "Comparaison Xerfi France",
+                "comparison_value": 8000000,
+                "reference_source": "Xerfi France - Marché de la e-santé 2024",
+                "diff_percentage": "-5%",
+                "explanation": "Écart faible expliqué par périmètre plus restrictif (généralistes only vs. tous médecins)"
+            }},
+            {{
+                "check_name": "Revenus publiés Doctolib France",
+                "comparison_value": 250000000,
+                "reference_source": "Societe.com / Comptes annuels 2023",
+                "diff_percentage": "N/A - référence CA total",
+                "explanation": "Notre estimation couvre ~3% du CA total - cohérent car nous ne ciblons que généralistes SaaS"
+            }}
+        ],
+        "coherence_assessment": "Estimation cohérente avec benchmarks sectoriels et données publiques."
+    }},
+    
     "reliability": {{
         "overall_confidence": "MEDIUM",
-        "data_quality_score": 70,
-        "hypothesis_count": 3,
+        "confidence_justification": "Données sources de qualité (INSEE, DREES, CNOM), mais 2 hypothèses clés (adoption, capacité paiement) non validées terrain.",
+        "data_quality_score": 75,
+        "hypothesis_count": 2,
+        "sourced_facts_count": 4,
         "key_uncertainties": [
-            "Périmètre exact des actes inclus",
-            "Part des acteurs non déclarés"
+            "Taux d'adoption: benchmark pays voisins mais pas de donnée France spécifique au segment",
+            "Seuil capacité de paiement: rationale économique mais pas de validation empirique"
         ],
         "limitations": [
-            "Pas de données Nielsen/IRI spécifiques",
-            "Extrapolation taux de croissance"
+            "Données de revenus médecins issues de 2023 (CARMF)",
+            "Périmètre volontairement conservateur - sous-estime le potentiel total"
+        ],
+        "recommendations": [
+            "Valider le taux d'adoption avec panel médecins non équipés",
+            "Affiner le seuil de capacité de paiement par étude terrain"
         ]
     }},
     
     "sources_registry": [
         {{
-            "source_name": "INSEE",
-            "source_reference": "Statistiques population 2024",
-            "data_used": "Population totale",
+            "source_id": "SRC_001",
+            "source_name": "DREES",
+            "source_full_name": "Direction de la recherche, des études, de l'évaluation et des statistiques",
+            "source_reference": "Portrait des professionnels de santé, édition 2024",
+            "source_url": "https://drees.solidarites-sante.gouv.fr/publications-communique-de-presse/panoramas-de-la-drees/portrait-des-professionnels-de-sante",
+            "data_used": "Nombre total de médecins libéraux en France",
+            "reliability": "HIGH",
             "date": "2024"
-        }}
-    ],
-    
-    "quantified_hypotheses": [
+        }},
         {{
-            "hypothesis_id": "HYP_001",
-            "name": "Prix moyen du marché",
-            "value": 25,
-            "unit": "EUR",
-            "justification": "Moyenne pondérée des tarifs pratiqués selon segments",
-            "source": "Étude tarifaire sectorielle XYZ 2024",
-            "sensitivity": "HIGH",
-            "range_low": 20,
-            "range_high": 30
+            "source_id": "SRC_002",
+            "source_name": "CNOM",
+            "source_full_name": "Conseil National de l'Ordre des Médecins",
+            "source_reference": "Atlas de la démographie médicale 2024",
+            "source_url": "https://www.conseil-national.medecin.fr/lordre-medecins/conseil-national-lordre/demographie-medicale",
+            "data_used": "Répartition par spécialité (généralistes vs spécialistes)",
+            "reliability": "HIGH",
+            "date": "2024"
+        }},
+        {{
+            "source_id": "SRC_003",
+            "source_name": "ARCEP",
+            "source_full_name": "Autorité de régulation des communications électroniques",
+            "source_reference": "Baromètre du numérique 2024",
+            "source_url": "https://www.arcep.fr/cartes-et-donnees/nos-publications-chiffrees/numerique/le-barometre-du-numerique.html",
+            "data_used": "Taux d'équipement numérique des professionnels",
+            "reliability": "HIGH",
+            "date": "2024"
+        }},
+        {{
+            "source_id": "SRC_004",
+            "source_name": "CARMF",
+            "source_full_name": "Caisse Autonome de Retraite des Médecins de France",
+            "source_reference": "Rapport annuel 2023 - Revenus des médecins libéraux",
+            "source_url": "https://www.carmf.fr/page.php?page=stats/revenus",
+            "data_used": "Revenu moyen brut des médecins libéraux",
+            "reliability": "HIGH",
+            "date": "2023"
+        }},
+        {{
+            "source_id": "SRC_005",
+            "source_name": "Doctolib",
+            "source_full_name": "Doctolib SAS",
+            "source_reference": "Page tarifs publique",
+            "source_url": "https://www.doctolib.fr/tarifs",
+            "data_used": "Tarification abonnement mensuel/annuel",
+            "reliability": "HIGH",
+            "date": "2024"
         }}
     ],
     
     "source_quality_audit": {{
-        "primary_sources_count": 2,
-        "secondary_sources_count": 3,
-        "proxy_sources_count": 1,
+        "primary_sources_count": 3,
+        "secondary_sources_count": 2,
+        "proxy_sources_count": 0,
         "missing_sources": [],
         "aged_sources": [],
         "overall_source_quality": "HIGH|MEDIUM|LOW",
@@ -1344,786 +1153,2041 @@ Si tu utilises une donnée mondiale et l'ajustes au pays :
     }},
     
     "coherence_checks": {{
-        "triangulation_convergence": {{
-            "top_down_vs_bottom_up_delta_pct": 4.2,
-            "status": "PASS",
-            "threshold": 20,
-            "notes": "Écart <20% considéré comme convergent"
-        }},
         "arithmetic_checks": [
             {{
                 "check": "Volume × Prix = Revenu",
-                "status": "PASS"
+                "formula": "42000 × 1200 × 0.15 = 7,560,000",
+                "status": "PASS",
+                "notes": "Cohérence arithmétique validée"
             }}
         ],
-        "market_sum_check": {{
-            "check": "Sum(parts de marché) ≤ 100%",
-            "total_share": 85,
-            "status": "PASS"
-        }},
-        "overall_coherence": "HIGH|MEDIUM|LOW"
-    }},
-    
-    "regulatory_impact": {{
-        "is_regulated_market": true,
-        "regulatory_bodies": ["Organisme 1", "Organisme 2"],
-        "key_mechanisms": [
+        "behavioral_checks": [
             {{
-                "mechanism": "Remboursement / Tarification régulée",
-                "impact_on_tam": "Limite le prix moyen pratiqué",
-                "quantified_impact": "Plafonne à 25€ vs 35€ en marché libre"
+                "check": "Actes par utilisateur",
+                "derived_value": 0.3,
+                "expected_range": [1.5, 3.0],
+                "status": "WARNING|PASS|FAIL",
+                "justification": "Si WARNING ou FAIL, EXPLIQUER ici pourquoi et ajuster ou assumer"
             }}
         ],
-        "recent_changes": [],
-        "uncertainties": []
-    }},
-    
-    "scope_analysis": {{
-        "chosen_scope": "Téléconsultations synchrones uniquement",
-        "scope_stance": "conservative",
-        "scope_rationale": "Focus sur le segment le plus mature pour limiter l'incertitude",
-        "alternatives_considered": [
+        "logical_checks": [
             {{
-                "scope": "Inclure télé-expertise asynchrone",
-                "reason_excluded": "Modèle tarifaire différent, régulation distincte",
-                "additional_value_estimate": 50000000,
-                "confidence": "LOW"
+                "check": "Parts de marché ≤ 100%",
+                "status": "PASS"
             }}
-        ]
+        ],
+        "overall_coherence": "HIGH|MEDIUM|LOW"
     }},
     
-    "strategic_implications": {{
-        "market_attractiveness": "Marché en croissance (+12% CAGR), concentration modérée",
-        "entry_barriers": "Réglementation santé, certification HDS, partenariats remboursement",
-        "key_success_factors": ["Intégration parcours patient", "Tarification", "Réseau praticiens"]
-    }}
+    "quantified_hypotheses": [
+        {{
+            "hypothesis_id": "HYP_001",
+            "name": "Prix moyen par acte",
+            "value": 25,
+            "unit": "EUR",
+            "justification": "Moyenne des tarifs remboursables selon nomenclature NGAP 2025",
+            "source": "Assurance Maladie - NGAP Téléconsultation",
+            "sensitivity": "HIGH|MEDIUM|LOW|CRITICAL",
+            "range_low": 20,
+            "range_high": 30,
+            "impact_if_changed": "±20% → TAM varie de ±20%"
+        }}
+    ]
 }}
 
-🚨 RÈGLES STRICTES MODE SECTORIEL :
-1. Tu ne calcules PAS de SOM (pas d'entreprise cible)
-2. Tu TRIANGULES obligatoirement 3 méthodes
-3. Tu LISTES les principaux acteurs et leurs parts estimées
-4. Tu FOURNIS une fourchette (range_low / range_high)
+🚨 RÈGLES STRICTES :
+1. CHAQUE fact doit avoir une source nommée, datée et avec URL si disponible
+2. Les hypothèses doivent avoir un benchmark OU un rationale économique quantifié
+3. TOUJOURS fournir 3 scénarios de sensibilité (conservateur, central, optimiste)
+4. LIER explicitement la régulation aux hypothèses qu'elle impacte
+5. JUSTIFIER le périmètre choisi et lister les alternatives NON retenues
+6. Les écarts avec références doivent être expliqués (périmètre, maturité, régulation)
 
 Réponds UNIQUEMENT avec du JSON valide, aucun texte autour.
-""")
-        
-        try:
-            llm = self._get_llm()
-            chain = prompt | llm
-            response = chain.invoke({
-                "market_description": market_description,
-                "country": country,
-                "year": year,
-                "additional_context": additional_context or "Pas de contexte additionnel fourni."
-            })
-            
-            # Parsing du JSON
-            content = response.content.strip()
-            if content.startswith("```json"):
-                content = content.replace("```json", "").replace("```", "")
-            if content.startswith("```"):
-                content = content.replace("```", "")
-            
-            analysis = json.loads(content)
-            
-            # Ajouter métadonnées
-            analysis["_meta"] = {
-                "mode": "sectoral",
-                "market": market_description,
-                "country": country,
-                "year": year,
-                "generated_at": datetime.now().isoformat(),
-                "model": "mistral-small",
-                "methodology": "KPMG Sectoral Market Sizing v1.0"
-            }
-            
-            # ═════════════════════════════════════════════
-            # VALIDATION DE QUALITÉ (même que mode contextuel)
-            # ═════════════════════════════════════════════
-            facts_used = analysis.get("facts_used", [])
-            source_quality = self._validate_source_quality(facts_used)
-            
-            if "source_quality_audit" not in analysis:
-                analysis["source_quality_audit"] = {}
-            analysis["source_quality_audit"].update(source_quality)
+"""),
+    ("human", _CONTEXTUAL_SIZING_USER_MESSAGE),
+])
+
+# Segmentation des entreprises concurrentes, analyse concurrentielle et tendances de marché
+_COMPANY_SEGMENTATION_USER_MESSAGE = """═══════════════════════════════════════════════════════════════
+📊 RÉSULTATS DU MARKET SIZING (à utiliser obligatoirement) :
+{market_sizing_context}
+═══════════════════════════════════════════════════════════════
+📌 CONTEXTE
+═══════════════════════════════════════════════════════════════
+Entreprise de référence : {company_name}
+Offre / périmètre : {offerings}
+Pays / Zone : {country}
+Année : {year}"""
+
+# Consignes + schéma constants en message système : préfixe identique d'un appel à l'autre,
+# les variables (sizing, entreprise, pays, année) ne sont injectées que dans le message utilisateur
+_COMPANY_SEGMENTATION_TEMPLATE = ChatPromptTemplate.from_messages([
+    ("system", """Tu es un assistant d'analyse stratégique senior utilisé par un cabinet de conseil.
+Ta mission est de segmenter un marché par TYPES D'ENTREPRISES CONCURRENTES,
+en t'appuyant explicitement sur les résultats du module d'estimation de taille de marché.
+
+⚠️ ATTENTION : Tu ne segmentes PAS les clients. Tu segmentes les ENTREPRISES qui captent la valeur du marché.
+
+Les résultats du market sizing puis le contexte (entreprise de référence, offre, pays, année)
+sont fournis dans le message utilisateur.
+
+🔒 PRINCIPE FONDAMENTAL :
+Segmenter les entreprises selon la manière dont elles CAPTURENT LA VALEUR, pas selon leur branding.
+Chaque segment = un sous-espace économique du market sizing + logique de revenus distincte + poids économique différenciable.
+
+📋 FORMAT DE SORTIE JSON STRICT :
+{{
+    "context_lock": {{
+        "reference_company": "Entreprise de référence",
+        "offering_scope": "Offre / périmètre",
+        "country": "Pays / Zone",
+        "year": "Année",
+        "market_sizing_available": true,
+        "market_sizing_summary": "Résumé du sizing utilisé",
+        "total_market_value": 500000000,
+        "market_unit": "EUR",
+        "missing_sizing_elements": []
+    }},
     
-            print(f"📊 [SOURCE QUALITY] Score: {source_quality['quality_score']}/100")
-            if source_quality['critical_gaps']:
-                print(f"⚠️ [SOURCE QUALITY] Gaps critiques: {len(source_quality['critical_gaps'])}")
-            
-            # Auto-downgrade confiance si gaps
-            if not source_quality['is_valid']:
-                reliability = analysis.get("reliability", {})
-                current_conf = reliability.get("overall_confidence", "MEDIUM").upper()
-                
-                if current_conf == "HIGH":
-                    reliability["overall_confidence"] = "MEDIUM"
-                    reliability["confidence_justification"] = f"[AUTO-DÉGRADÉE] Gaps sources. " + reliability.get("confidence_justification", "")
-                    print(f"⚠️ [AUTO-DOWNGRADE] HIGH → MEDIUM")
-                elif current_conf == "MEDIUM":
-                    reliability["overall_confidence"] = "LOW"
-                    reliability["confidence_justification"] = f"[AUTO-DÉGRADÉE] Gaps sources. " + reliability.get("confidence_justification", "")
-                    print(f"⚠️ [AUTO-DOWNGRADE] MEDIUM → LOW")
-                
-                analysis["reliability"] = reliability
-            
-            # Détection marché régulé
-            market_name = analysis.get("market_definition", {}).get("market_name", market_description)
-            regulatory_detection = self._detect_regulatory_context(market_name)
-            
-            if regulatory_detection['is_regulated']:
-                print(f"🏛️ [REGULATORY] Marché régulé: {regulatory_detection['sector']}")
-                
-                regulatory_impact = analysis.get("regulatory_impact", {})
-                if not regulatory_impact or not regulatory_impact.get("key_mechanisms"):
-                    print(f"⚠️ [REGULATORY] Impact réglementaire non documenté!")
-                    reliability = analysis.get("reliability", {})
-                    uncertainties = reliability.get("key_uncertainties", [])
-                    uncertainties.append(f"Impact réglementaire non documenté ({regulatory_detection['sector']})")
-                    reliability["key_uncertainties"] = uncertainties
-                    analysis["reliability"] = reliability
-            
-            #
-
-            facts = self._convert_sectoral_sizing_to_facts(analysis, market_description, country, year)
-            
-            print(f"✅ [SECTORAL SIZING] Analyse générée : {len(facts)} facts extraits")
-            
-            return {
-                "analysis": analysis,
-                "facts": facts,
-                "success": True
-            }
-            
-        except json.JSONDecodeError as e:
-            print(f"❌ [SECTORAL SIZING] Erreur parsing JSON: {e}")
-            return {"success": False, "error": f"Parsing error: {e}", "facts": []}
-        except Exception as e:
-            print(f"❌ [SECTORAL SIZING] Erreur: {e}")
-            import traceback
-            traceback.print_exc()
-            return {"success": False, "error": str(e), "facts": []}
-    
-    def _convert_sectoral_sizing_to_facts(self, analysis: Dict, market: str, country: str, year: str) -> List[Dict]:
-        """Convertit l'analyse sectorielle en facts structurés."""
-        facts = []
-        ts = int(datetime.now().timestamp())
-        
-        # 1. Estimation finale (TAM)
-        calc = analysis.get("calculation", {})
-        final = calc.get("final_estimate", {})
-        if final.get("value"):
-            facts.append({
-                "id": f"sec_{country}_{year}_tam_{ts}",
-                "category": "market_estimation",
-                "key": f"tam_{country.lower()}_{year}",
-                "value": final["value"],
-                "unit": final.get("unit", "EUR"),
-                "source": "Triangulation Multi-Méthodes KPMG",
-                "source_type": "Synthèse",
-                "confidence": analysis.get("reliability", {}).get("overall_confidence", "medium").lower(),
-                "notes": f"Marché: {market}, Fourchette: {final.get('range_low', 'N/A')} - {final.get('range_high', 'N/A')} {final.get('unit', 'EUR')}"
-            })
-        
-        # 2. Résultats par méthode
-        methods = analysis.get("estimation_methods", {})
-        for method_name, method_data in methods.items():
-            if method_data.get("result"):
-                facts.append({
-                    "id": f"sec_{method_name}_{ts}",
-                    "category": "market_estimation",
-                    "key": f"tam_{method_name}_{country.lower()}",
-                    "value": method_data["result"],
-                    "unit": "EUR",
-                    "source": method_data.get("methodology", method_name),
-                    "source_type": "Calcul",
-                    "confidence": method_data.get("confidence", "medium"),
-                    "notes": f"Méthode: {method_name}"
-                })
-        
-        # 3. Facts utilisés
-        for fact_data in analysis.get("facts_used", []):
-            if fact_data.get("value"):
-                facts.append({
-                    "id": fact_data.get("fact_id", f"fact_sec_{ts}"),
-                    "category": "market_estimation",
-                    "key": fact_data.get("key", "unknown"),
-                    "value": fact_data["value"],
-                    "unit": fact_data.get("unit", "EUR"),
-                    "source": fact_data.get("source", "Analyse"),
-                    "source_type": fact_data.get("source_type", "secondaire").capitalize(),
-                    "confidence": fact_data.get("confidence", "medium"),
-                    "notes": fact_data.get("notes", "")
-                })
-        
-        return facts
-
-    def generate_contextual_market_sizing(self, company_name: str, country: str, year: str, additional_context: str = "") -> Dict[str, Any]:
-        """
-        MÉTHODE DE MARKET SIZING CONTEXTUEL - Bottom-Up Local
-        
-        Méthodologie rigoureuse de sizing basée sur :
-        1. Verrouillage du contexte (entreprise + pays + année)
-        2. Définition du marché spécifique à l'entreprise
-        3. Utilisation stricte de la base de facts centralisée
-        4. Reconstruction bottom-up locale
-        5. Calcul explicite et transparent
-        6. Comparaison et validation contextuelle
-        7. Évaluation de fiabilité
-        
-        Args:
-            company_name: Nom de l'entreprise cible
-            country: Pays / zone géographique
-            year: Année de référence
-            additional_context: Contexte additionnel (offres, modèle éco, etc.)
-            
-        Returns:
-            Analyse structurée avec estimation bottom-up locale
-        """
-        print(f"📊 [CONTEXTUAL SIZING] Entreprise: {company_name} | Pays: {country} | Année: {year}")
-        
-        prompt = ChatPromptTemplate.from_template("""
-Tu es un assistant d'analyse stratégique senior utilisé par un cabinet de conseil de premier plan.
-Tu dois estimer la taille d'un marché dans un contexte précis, défini par une entreprise cible, un pays et une année donnée.
-Tu raisonnes UNIQUEMENT dans ce contexte, sans extrapolation générique.
-
-═══════════════════════════════════════════════════════════════
-📌 CONTEXTE À ANALYSER
-═══════════════════════════════════════════════════════════════
-Entreprise : {company_name}
-Pays / Zone : {country}
-Année : {year}
-Contexte additionnel : {additional_context}
-═══════════════════════════════════════════════════════════════
-
-🔒 RÈGLE FONDAMENTALE : Chaque fact doit être référencé (ID, source, date, pays).
-Aucune donnée non traçable n'est autorisée. Si un fact global est utilisé, tu dois l'ajuster au contexte local et expliquer la méthode.
-
-⚠️ VALIDATION STRICTE DES SOURCES ⚠️
-
-Pour CHAQUE fact utilisé dans "facts_used", tu DOIS OBLIGATOIREMENT fournir :
-
-✅ OBLIGATOIRE :
-1. **source_name** : Nom complet de l'organisation/étude (ex: "INSEE", "DREES", "Eurostat")
-2. **source_reference** : Référence précise du document (ex: "Portrait des professionnels de santé, édition 2024")
-3. **source_date** : Année de publication (ex: "2024") - OBLIGATOIRE
-4. **source_type** : "primaire" | "secondaire" | "proxy"
-5. **reliability** : "HIGH" | "MEDIUM" | "LOW"
-6. **country** : Pays couvert par la source (doit correspondre au contexte)
-
-📋 SOURCES INTERDITES (rejettent automatiquement l'analyse) :
-❌ "Estimation" sans méthodologie détaillée
-❌ "Analyse sectorielle" sans nom d'étude précis
-❌ Ratios géographiques arbitraires (ex: "8% pour la France")
-❌ Sources > 3 ans sans justification explicite dans "notes"
-❌ "N/A", "Analyse", "Rapport générique"
-
-📊 AJUSTEMENTS GÉOGRAPHIQUES :
-Si tu utilises une donnée mondiale/européenne et l'ajustes au pays :
-- **is_global_adjusted** : true
-- **adjustment_method** : OBLIGATOIRE - Explique comment (PIB, population, etc.)
-- **adjustment_rationale** : OBLIGATOIRE - Justifie pourquoi ce ratio est valide
-
-Exemple INVALIDE :
-```json
-{{
-  "source": "Analyse",  // ❌ Trop vague
-  "source_date": "",   // ❌ Manquant
-  "value": 1500000000
-}}
-```
-
-Exemple VALIDE :
-```json
-{{
-  "source_name": "Grand View Research",
-  "source_reference": "Telemedicine Market Size, Share & Trends Analysis Report, 2024",
-  "source_url": "https://www.grandviewresearch.com/...",
-  "source_date": "2024",
-  "source_type": "secondaire",
-  "reliability": "MEDIUM",
-  "country": "Worldwide",
-  "is_global_adjusted": true,
-  "adjustment_method": "PIB France / PB Mondial (2.9%)",
-  "value": 43500000
-}}
-```
-
-🚨 CONSÉQUENCE : Si un fact critique manque de source documentée → **reliability = "LOW" automatique**
-
-
-📋 FORMAT DE SORTIE JSON STRICT :
-{{
-    "context_lock": {{
-        "company": "{company_name}",
-        "country": "{country}",
-        "year": "{year}",
-        "company_offerings": ["Offre 1 pertinente localement", "Offre 2"],
-        "local_business_model": "Description du modèle économique applicable localement",
-        "missing_info": ["Information manquante 1 (si applicable)"],
-        "context_validated": true
-    }},
-    
-    "market_definition": {{
-        "market_name": "Nom du marché tel qu'adressable par l'entreprise",
-        "market_justification": "Pourquoi ce périmètre et pas un marché générique",
-        "excluded_segments": [
+    "segmentation_logic": {{
+        "primary_axis": {{
+            "axis_name": "Axe principal de segmentation",
+            "axis_type": "economic_unit|monetization|value_level|functional_scope|integration_degree",
+            "justification": "Pourquoi cet axe est structurant économiquement",
+            "link_to_sizing": "Comment cet axe se traduit en différences de taille de marché"
+        }},
+        "secondary_axes": [
             {{
-                "segment": "Segment exclu",
-                "reason": "Raison de l'exclusion (maturité, régulation, etc.)"
+                "axis_name": "Axe secondaire",
+                "axis_type": "type",
+                "relevance": "Pertinence pour différencier les entreprises"
             }}
         ],
-        "local_adaptations": {{
-            "maturity_level": "emerging|growing|mature",
-            "regulatory_context": "Cadre réglementaire local pertinent",
-            "healthcare_system": "Structure du système (si applicable)",
-            "purchasing_practices": "Pratiques d'achat locales"
-        }}
+        "rejected_axes": [
+            {{
+                "axis_name": "Axe rejeté",
+                "reason": "Pourquoi cet axe n'est pas économiquement justifié"
+            }}
+        ]
     }},
     
-    "facts_used": [
+    "company_segments": [
         {{
-            "fact_id": "FACT_001",
-            "key": "population_medecins_liberaux",
-            "description": "Description précise du fait",
-            "value": 102000,
-            "unit": "médecins",
-            "source_name": "DREES - Direction de la recherche, des études, de l'évaluation et des statistiques",
-            "source_reference": "Portrait des professionnels de santé, édition 2024",
-            "source_url": "https://drees.solidarites-sante.gouv.fr/...",
-            "source_date": "2024",
-            "source_type": "primaire|secondaire|proxy",
-            "reliability": "HIGH|MEDIUM|LOW",
-            "country": "{country}",
-            "is_global_adjusted": false,
-            "adjustment_method": null,
-            "notes": "Donnée officielle, mise à jour annuelle"
-        }}
-    ],
-    
-    "bottom_up_reconstruction": {{
-        "economic_unit": {{
-            "name": "Unité économique locale (ex: Médecin libéral, Cabinet, Établissement)",
-            "definition": "Définition précise de l'unité dans le contexte local",
-            "relevance": "Pourquoi cette unité est pertinente"
-        }},
-        "addressable_population": {{
-            "total_units_in_country": 102000,
-            "total_units_source": "DREES 2024 - Portrait des professionnels de santé",
-            "filters_applied": [
-                {{
-                    "filter_name": "Spécialité médicale",
-                    "filter_value": "Généralistes uniquement",
-                    "remaining_units": 55000,
-                    "source_name": "CNOM - Conseil National de l'Ordre des Médecins",
-                    "source_reference": "Atlas de la démographie médicale 2024",
-                    "source_date": "2024",
-                    "is_hypothesis": false
-                }},
-                {{
-                    "filter_name": "Équipement numérique",
-                    "filter_value": "Connectés internet haut débit",
-                    "remaining_units": 49500,
-                    "source_name": "ARCEP",
-                    "source_reference": "Baromètre du numérique 2024",
-                    "source_date": "2024",
-                    "is_hypothesis": false
-                }},
-                {{
-                    "filter_name": "Capacité de paiement",
-                    "filter_value": "Revenus bruts > 50,000 EUR/an",
-                    "remaining_units": 42000,
-                    "source_name": "Hypothèse",
-                    "source_reference": "Basée sur CARMF - Revenu moyen des médecins libéraux: 92,000 EUR brut",
-                    "source_date": "2023",
-                    "is_hypothesis": true,
-                    "hypothesis_rationale": "ARPU SaaS (1200 EUR) représente 1.3% du revenu moyen, capacité d'absorption élevée"
-                }}
-            ],
-            "final_addressable_units": 42000
-        }},
-        "local_unit_value": {{
-            "annual_price_local": 1200,
-            "currency": "EUR",
-            "price_source": "Doctolib pricing public 2024",
-            "price_source_url": "https://www.doctolib.fr/tarifs",
-            "comparison_vs_reference": "Prix France: 1200 EUR - marché de référence",
-            "adjustment_rationale": "Pas d'ajustement - pays de référence"
-        }},
-        "adoption_rate": {{
-            "estimated_rate_percent": 15,
-            "rate_justification": "Marché en phase de croissance, adoption progressive",
-            "rate_source": "Benchmark marchés similaires"
-        }}
-    }},
-    
-    "hypotheses_detailed": [
-        {{
-            "hypothesis_id": "HYP_001",
-            "variable": "adoption_rate",
-            "central_value": 15,
-            "unit": "%",
-            "justification_type": "benchmark",
-            "benchmark_references": [
-                {{"country": "Belgique", "value": 18, "source": "E-Santé Belgique 2024", "year": 2024}},
-                {{"country": "Allemagne", "value": 12, "source": "BVITG Digital Health Survey", "year": 2023}},
-                {{"country": "Pays-Bas", "value": 22, "source": "NIVEL 2024", "year": 2024}}
-            ],
-            "economic_rationale": "ARPU de 1200 EUR représente ~1.3% du CA moyen médecin libéral (92k EUR brut/an CARMF 2023). Seuil acceptable pour adoption rapide.",
-            "confidence_range": {{"low": 10, "central": 15, "high": 22}},
-            "sensitivity_impact": "Chaque point de variation impacte le résultat de ~6.7%"
-        }},
-        {{
-            "hypothesis_id": "HYP_002",
-            "variable": "capacity_threshold",
-            "central_value": 50000,
-            "unit": "EUR/an revenu brut",
-            "justification_type": "economic_rationale",
-            "economic_rationale": "Seuil de capacité de paiement: ARPU (1200 EUR) < 3% du revenu brut. Médecins sous 50k EUR brut ont des contraintes budgétaires plus fortes.",
-            "confidence_range": {{"low": 40000, "central": 50000, "high": 60000}},
-            "sensitivity_impact": "Seuil à 40k EUR → +7% unités éligibles. Seuil à 60k EUR → -12% unités éligibles."
+            "segment_id": "SEG_01",
+            "segment_name": "Nom du type d'entreprise",
+            "description": "Description du type d'entreprise",
+            "value_creation_logic": "Comment ces entreprises créent de la valeur",
+            "target_economic_unit": "par médecin|par établissement|par acte|par patient|etc.",
+            "revenue_model": "abonnement|commission|usage|licence|freemium",
+            "pricing_position": "low_arpu_volume|mid_market|premium",
+            "functional_scope": "pure_play|plateforme_elargie|solution_integree",
+            "integration_degree": "standalone|suite|infrastructure",
+            "market_share_captured": {{
+                "value": 150000000,
+                "unit": "EUR",
+                "percentage_of_total": 30,
+                "source": "Lien avec hypothèse du sizing",
+                "confidence": "HIGH|MEDIUM|LOW"
+            }},
+            "representative_players": ["Acteur 1", "Acteur 2", "Acteur 3"],
+            "entry_barriers": ["Barrière 1", "Barrière 2"],
+            "growth_dynamics": "Description de la dynamique (croissance, maturité, déclin)",
+            "why_structurally_different": "Pourquoi ces entreprises sont économiquement différentes des autres"
         }}
     ],
     
-    "sensitivity_analysis": {{
-        "scenarios": [
-            {{
-                "name": "Conservateur",
-                "description": "Hypothèses prudentes: adoption basse, prix stable",
-                "adoption_rate": 10,
-                "price": 1200,
-                "addressable_units": 42000,
-                "result": 5040000,
-                "probability_assessment": "Scénario si concurrence accrue ou régulation restrictive"
-            }},
-            {{
-                "name": "Central",
-                "description": "Hypothèses réalistes basées sur benchmarks",
-                "adoption_rate": 15,
-                "price": 1200,
-                "addressable_units": 42000,
-                "result": 7560000,
-                "probability_assessment": "Scénario le plus probable basé sur trajectoire actuelle"
-            }},
-            {{
-                "name": "Optimiste",
-                "description": "Hypothèses favorables: adoption rapide, up-sell pricing",
-                "adoption_rate": 22,
-                "price": 1320,
-                "addressable_units": 42000,
-                "result": 12196800,
-                "probability_assessment": "Scénario si remboursement étendu et adoption accélérée"
-            }}
-        ],
-        "key_sensitivities": [
-            {{
-                "variable": "adoption_rate",
-                "delta": "+5 points",
-                "base_value": 15,
-                "new_value": 20,
-                "impact_absolute": 2520000,
-                "impact_percent": "+33%"
-            }},
-            {{
-                "variable": "price",
-                "delta": "-10%",
-                "base_value": 1200,
-                "new_value": 1080,
-                "impact_absolute": -756000,
-                "impact_percent": "-10%"
-            }},
+    "reference_company_positioning": {{
+        "current_segments": [
             {{
-                "variable": "addressable_units",
-                "delta": "+10%",
-                "base_value": 42000,
-                "new_value": 46200,
-                "impact_absolute": 756000,
-                "impact_percent": "+10%"
+                "segment_id": "SEG_01",
+                "presence_level": "dominant|challenger|niche|absent",
+                "estimated_share_in_segment": 25,
+                "strategic_importance": "core|adjacent|peripheral"
             }}
         ],
-        "sensitivity_conclusion": "Le taux d'adoption est la variable la plus sensible. Variation prioritaire à monitorer."
-    }},
-    
-    "regulatory_impact": {{
-        "key_regulations": [
-            {{
-                "regulation_id": "REG_001",
-                "regulation_name": "Remboursement téléconsultation",
-                "regulatory_body": "CNAM / Assurance Maladie",
-                "status": "active",
-                "effective_date": "2018 (élargi 2020)",
-                "description": "Prise en charge à 100% des téléconsultations depuis 2020",
-                "impact_on": "adoption_rate",
-                "impact_direction": "positive",
-                "quantification": "+5-10 points d'adoption vs marchés sans remboursement (ex: UK avant NHS Digital)",
-                "source": "Rapport IGAS sur la télémédecine 2023"
-            }},
+        "core_market_segments": ["SEG_01", "SEG_02"],
+        "credible_adjacent_segments": [
             {{
-                "regulation_id": "REG_002",
-                "regulation_name": "Obligation de prescription dématérialisée",
-                "regulatory_body": "Ministère de la Santé",
-                "status": "progressive",
-                "effective_date": "2024-2025",
-                "description": "Obligation progressive de prescription électronique",
-                "impact_on": "addressable_units",
-                "impact_direction": "positive",
-                "quantification": "Augmentation de la base équipée de +5-8% par an",
-                "source": "Feuille de route du numérique en santé 2023-2027"
+                "segment_id": "SEG_03",
+                "expansion_feasibility": "HIGH|MEDIUM|LOW",
+                "strategic_rationale": "Pourquoi ce segment est adjacent crédible"
             }}
         ],
-        "regulation_hypothesis_links": [
+        "out_of_scope_segments": [
             {{
-                "regulation_id": "REG_001",
-                "hypothesis_id": "HYP_001",
-                "link_explanation": "Le remboursement CNAM justifie un taux d'adoption supérieur aux pays sans prise en charge (UK: 8%, France: 15%)"
+                "segment_id": "SEG_04",
+                "reason": "Pourquoi hors scope réaliste"
             }}
-        ],
-        "regulatory_uncertainty": "Évolution possible des conditions de remboursement post-2025, à surveiller"
+        ]
     }},
     
-    "scope_analysis": {{
-        "chosen_scope": "Médecins généralistes libéraux uniquement",
-        "scope_stance": "conservative",
-        "scope_rationale": "Périmètre volontairement restreint aux généralistes libéraux (core market Doctolib) pour maximiser la fiabilité. Les spécialistes et établissements hospitaliers ont des modèles économiques différents.",
-        "alternatives_considered": [
-            {{
-                "scope": "Inclure spécialistes libéraux (+47,000 unités)",
-                "reason_excluded": "Modèle économique et tarification différents. Adoption plus variable par spécialité. Nécessiterait segmentation dédiée.",
-                "additional_value_estimate": 4500000,
-                "confidence": "LOW"
-            }},
-            {{
-                "scope": "Inclure télé-expertise inter-praticiens",
-                "reason_excluded": "Marché distinct avec régulation spécifique (avenant 6 convention médicale). Modèle B2B vs B2C.",
-                "additional_value_estimate": 1200000,
-                "confidence": "LOW"
-            }},
+    "market_value_distribution": {{
+        "segments_by_value": [
             {{
-                "scope": "Extension paramédicaux (infirmiers, kinés)",
-                "reason_excluded": "Hors périmètre offre actuelle Doctolib. Capacité de paiement très différente.",
-                "additional_value_estimate": 2000000,
-                "confidence": "VERY LOW"
+                "segment_id": "SEG_01",
+                "value_captured": 150000000,
+                "percentage": 30,
+                "trend": "growing|stable|declining"
             }}
         ],
-        "expansion_potential": {{
-            "total_if_all_included": 15260000,
-            "confidence": "LOW",
-            "recommendation": "Valider le périmètre core avant extension"
-        }}
+        "concentration_analysis": "Analyse de la concentration du marché",
+        "value_migration_trends": "Vers où migre la valeur du marché"
     }},
     
-    "calculation": {{
-        "formula": "Taille du marché = Unités éligibles × Prix annuel local × Taux d'adoption",
-        "step_by_step": [
-            "1. Unités totales: 102,000 (DREES 2024)",
-            "2. Après filtre généralistes: 55,000 (CNOM 2024)",
-            "3. Après filtre numérique: 49,500 (ARCEP 2024)",
-            "4. Après filtre capacité paiement: 42,000 (Hypothèse économique)",
-            "5. Prix annuel local: 1,200 EUR (Pricing public Doctolib)",
-            "6. Taux d'adoption: 15% (Benchmark: BE 18%, DE 12%, NL 22%)",
-            "7. Calcul: 42,000 × 1,200 × 0.15 = 7,560,000 EUR"
-        ],
-        "intermediate_values": {{
-            "gross_potential": 50400000,
-            "after_filters": 50400000,
-            "with_adoption": 7560000
+    "visualizations": {{
+        "market_map": {{
+            "type": "bubble_chart",
+            "x_axis": "Degré d'intégration",
+            "y_axis": "Valeur captée",
+            "bubble_size": "Nombre d'acteurs",
+            "data": [
+                {{"segment": "SEG_01", "x": 2, "y": 4, "size": 15}}
+            ]
         }},
-        "final_estimate": {{
-            "value": 7560000,
-            "unit": "EUR",
-            "year": "{year}",
-            "range_low": 5040000,
-            "range_high": 12196800
-        }}
-    }},
-    
-    "validation": {{
-        "sanity_checks": [
-            {{
-                "check_name": "Comparaison Xerfi France",
-                "comparison_value": 8000000,
-                "reference_source": "Xerfi France - Marché de la e-santé 2024",
-                "diff_percentage": "-5%",
-                "explanation": "Écart faible expliqué par périmètre plus restrictif (généralistes only vs. tous médecins)"
-            }},
-            {{
-                "check_name": "Revenus publiés Doctolib France",
-                "comparison_value": 250000000,
-                "reference_source": "Societe.com / Comptes annuels 2023",
-                "diff_percentage": "N/A - référence CA total",
-                "explanation": "Notre estimation couvre ~3% du CA total - cohérent car nous ne ciblons que généralistes SaaS"
-            }}
-        ],
-        "coherence_assessment": "Estimation cohérente avec benchmarks sectoriels et données publiques."
-    }},
-    
-    "reliability": {{
-        "overall_confidence": "MEDIUM",
-        "confidence_justification": "Données sources de qualité (INSEE, DREES, CNOM), mais 2 hypothèses clés (adoption, capacité paiement) non validées terrain.",
-        "data_quality_score": 75,
-        "hypothesis_count": 2,
-        "sourced_facts_count": 4,
-        "key_uncertainties": [
-            "Taux d'adoption: benchmark pays voisins mais pas de donnée France spécifique au segment",
-            "Seuil capacité de paiement: rationale économique mais pas de validation empirique"
-        ],
-        "limitations": [
-            "Données de revenus médecins issues de 2023 (CARMF)",
-            "Périmètre volontairement conservateur - sous-estime le potentiel total"
-        ],
-        "recommendations": [
-            "Valider le taux d'adoption avec panel médecins non équipés",
-            "Affiner le seuil de capacité de paiement par étude terrain"
-        ]
-    }},
-    
-    "sources_registry": [
-        {{
-            "source_id": "SRC_001",
-            "source_name": "DREES",
-            "source_full_name": "Direction de la recherche, des études, de l'évaluation et des statistiques",
-            "source_reference": "Portrait des professionnels de santé, édition 2024",
-            "source_url": "https://drees.solidarites-sante.gouv.fr/publications-communique-de-presse/panoramas-de-la-drees/portrait-des-professionnels-de-sante",
-            "data_used": "Nombre total de médecins libéraux en France",
-            "reliability": "HIGH",
-            "date": "2024"
-        }},
-        {{
-            "source_id": "SRC_002",
-            "source_name": "CNOM",
-            "source_full_name": "Conseil National de l'Ordre des Médecins",
-            "source_reference": "Atlas de la démographie médicale 2024",
-            "source_url": "https://www.conseil-national.medecin.fr/lordre-medecins/conseil-national-lordre/demographie-medicale",
-            "data_used": "Répartition par spécialité (généralistes vs spécialistes)",
-            "reliability": "HIGH",
-            "date": "2024"
-        }},
-        {{
-            "source_id": "SRC_003",
-            "source_name": "ARCEP",
-            "source_full_name": "Autorité de régulation des communications électroniques",
-            "source_reference": "Baromètre du numérique 2024",
-            "source_url": "https://www.arcep.fr/cartes-et-donnees/nos-publications-chiffrees/numerique/le-barometre-du-numerique.html",
-            "data_used": "Taux d'équipement numérique des professionnels",
-            "reliability": "HIGH",
-            "date": "2024"
-        }},
-        {{
-            "source_id": "SRC_004",
-            "source_name": "CARMF",
-            "source_full_name": "Caisse Autonome de Retraite des Médecins de France",
-            "source_reference": "Rapport annuel 2023 - Revenus des médecins libéraux",
-            "source_url": "https://www.carmf.fr/page.php?page=stats/revenus",
-            "data_used": "Revenu moyen brut des médecins libéraux",
-            "reliability": "HIGH",
-            "date": "2023"
+        "value_chain": {{
+            "stages": ["Acquisition", "Activation", "Rétention", "Expansion"],
+            "segment_focus": {{"SEG_01": "Acquisition", "SEG_02": "Rétention"}}
         }},
-        {{
-            "source_id": "SRC_005",
-            "source_name": "Doctolib",
-            "source_full_name": "Doctolib SAS",
-            "source_reference": "Page tarifs publique",
-            "source_url": "https://www.doctolib.fr/tarifs",
-            "data_used": "Tarification abonnement mensuel/annuel",
-            "reliability": "HIGH",
-            "date": "2024"
+        "market_share_pie": {{
+            "segments": ["SEG_01", "SEG_02", "SEG_03"],
+            "values": [30, 25, 20]
         }}
-    ],
+    }},
     
-    "source_quality_audit": {{
-        "primary_sources_count": 3,
-        "secondary_sources_count": 2,
-        "proxy_sources_count": 0,
-        "missing_sources": [],
-        "aged_sources": [],
-        "overall_source_quality": "HIGH|MEDIUM|LOW",
-        "critical_gaps": []
+    "reliability": {{
+        "overall_confidence": "HIGH|MEDIUM|LOW",
+        "confidence_justification": "Justification",
+        "sizing_granularity": "HIGH|MEDIUM|LOW",
+        "hypothesis_traceability": "HIGH|MEDIUM|LOW",
+        "segment_boundary_clarity": "HIGH|MEDIUM|LOW",
+        "local_competitive_coherence": "HIGH|MEDIUM|LOW",
+        "key_limitations": ["Limitation 1", "Limitation 2"]
     }},
     
-    "coherence_checks": {{
-        "arithmetic_checks": [
-            {{
-                "check": "Volume × Prix = Revenu",
-                "formula": "42000 × 1200 × 0.15 = 7,560,000",
-                "status": "PASS",
-                "notes": "Cohérence arithmétique validée"
-            }}
-        ],
-        "behavioral_checks": [
+    "facts_and_hypotheses": {{
+        "sizing_facts_used": [
             {{
-                "check": "Actes par utilisateur",
-                "derived_value": 0.3,
-                "expected_range": [1.5, 3.0],
-                "status": "WARNING|PASS|FAIL",
-                "justification": "Si WARNING ou FAIL, EXPLIQUER ici pourquoi et ajuster ou assumer"
+                "fact_id": "SIZING_001",
+                "description": "Fait du sizing utilisé",
+                "value": "Valeur",
+                "source": "Source",
+                "used_for_segment": "SEG_01"
             }}
         ],
-        "logical_checks": [
+        "new_hypotheses": [
             {{
-                "check": "Parts de marché ≤ 100%",
-                "status": "PASS"
+                "hypothesis_id": "HYP_SEG_001",
+                "description": "Hypothèse formulée pour la segmentation",
+                "justification": "Pourquoi raisonnable",
+                "impact_if_wrong": "Conséquence"
             }}
-        ],
-        "overall_coherence": "HIGH|MEDIUM|LOW"
-    }},
-    
-    "quantified_hypotheses": [
-        {{
-            "hypothesis_id": "HYP_001",
-            "name": "Prix moyen par acte",
-            "value": 25,
-            "unit": "EUR",
-            "justification": "Moyenne des tarifs remboursables selon nomenclature NGAP 2025",
-            "source": "Assurance Maladie - NGAP Téléconsultation",
-            "sensitivity": "HIGH|MEDIUM|LOW|CRITICAL",
-            "range_low": 20,
-            "range_high": 30,
-            "impact_if_changed": "±20% → TAM varie de ±20%"
+        ]
+    }}
+}}
+
+🚨 RÈGLES STRICTES :
+1. Chaque segment = entreprises qui captent la valeur de la MÊME façon
+2. Si deux types d'entreprises captent la même valeur de la même façon → les REGROUPER
+3. 4 à 8 segments maximum, mutuellement exclusifs
+4. INTERDICTION de segments non quantifiables si le sizing permet la quantification
+5. Pour chaque segment : "Pourquoi ces entreprises sont-elles STRUCTURELLEMENT DIFFÉRENTES économiquement ?"
+
+Réponds UNIQUEMENT avec du JSON valide, aucun texte autour."""),
+    ("human", _COMPANY_SEGMENTATION_USER_MESSAGE),
+])
+
+_COMPETITIVE_ANALYSIS_USER_MESSAGE = """CONTEXTE DISPONIBLE:
+- Market Sizing: {sizing_context}
+- Segmentation Entreprises: {segmentation_context}
+
+Génère une analyse concurrentielle complète pour:
+- Entreprise de référence: {company}
+- Pays/Marché: {country}
+- Année: {year}"""
+
+_COMPETITIVE_ANALYSIS_TEMPLATE = ChatPromptTemplate.from_messages([
+    ("system", """Tu es un expert en intelligence concurrentielle et stratégie d'entreprise.
+Tu dois produire une analyse concurrentielle STRUCTURÉE et FACTUELLE pour une entreprise donnée.
+
+RÈGLES ABSOLUES:
+1. Ne jamais inventer de données chiffrées sans source.
+2. Distinguer clairement: FAIT CONFIRMÉ vs DÉCLARÉ vs SUPPOSÉ.
+3. Être conservateur sur les estimations de revenus (ordres de grandeur uniquement).
+4. Identifier les GAPS réels (besoins non couverts), pas le marketing.
+5. La recommandation doit être TRAÇABLE (basée sur les gaps et le positionnement).
+
+Le contexte disponible (market sizing, segmentation) puis l'entreprise de référence, le pays et l'année
+sont fournis dans le message utilisateur.
+
+FORMAT DE SORTIE: JSON STRICT (pas de texte avant/après).
+
+Structure JSON attendue:
+{{
+  "context_summary": {{
+    "market_scope": "description courte du périmètre"
+  }},
+  "actors": [
+    {{
+      "name": "Nom de l'acteur",
+      "typology": "Leader|Challenger|Niche|Emergent",
+      "geography": "Local|Régional|Global",
+      "revenue_order": "< 10M€|10-50M€|50-200M€|200M-1B€|> 1B€",
+      "core_offering": "Description courte de l'offre principale",
+      "source": "D'où vient cette information",
+      "confidence": "high|medium|low"
+    }}
+  ],
+  "offerings_benchmark": {{
+    "key_features": ["Feature 1", "Feature 2", "Feature 3", "Feature 4", "Feature 5"],
+    "matrix": [
+      {{
+        "actor": "Nom",
+        "features": {{
+          "Feature 1": {{"status": "confirmed|declared|absent", "notes": "détail optionnel"}},
+          "Feature 2": {{"status": "confirmed|declared|absent", "notes": ""}}
         }}
+      }}
     ]
+  }},
+  "positioning_clusters": [
+    {{
+      "actor": "Nom",
+      "claimed_value": "Proposition de valeur déclarée",
+      "cluster": "Cost Leader|Premium|Innovator|Service-Centric|Generalist",
+      "integration_level": "Verticale|Horizontale|Spécialisée",
+      "economic_model": "SaaS|License|Usage|Hybrid"
+    }}
+  ],
+  "market_expectations": [
+    {{
+      "criterion": "Besoin/Attente du marché",
+      "importance": "Critical|High|Medium|Low",
+      "coverage": "met|partial|unmet",
+      "gap_signal": true/false,
+      "explanation": "Pourquoi ce statut"
+    }}
+  ],
+  "recommendation": {{
+    "strategy_title": "Titre de la recommandation (ex: Cibler le segment X)",
+    "rationale": "Explication de pourquoi cette stratégie",
+    "avoid": "Ce qu'il faut éviter et pourquoi",
+    "alternative_considered": "Alternative envisagée mais rejetée",
+    "alternative_rejection_reason": "Pourquoi l'alternative n'est pas optimale",
+    "confidence": "HIGH|MEDIUM|LOW",
+    "key_assumptions": ["Hypothèse 1", "Hypothèse 2"]
+  }},
+  "reliability": {{
+    "overall_confidence": "HIGH|MEDIUM|LOW",
+    "data_sources_count": N,
+    "primary_sources": ["Source 1", "Source 2"],
+    "key_limitations": ["Limitation 1", "Limitation 2"],
+    "data_freshness": "Description de la fraîcheur des données"
+  }}
 }}
 
-🚨 RÈGLES STRICTES :
-1. CHAQUE fact doit avoir une source nommée, datée et avec URL si disponible
-2. Les hypothèses doivent avoir un benchmark OU un rationale économique quantifié
-3. TOUJOURS fournir 3 scénarios de sensibilité (conservateur, central, optimiste)
-4. LIER explicitement la régulation aux hypothèses qu'elle impacte
-5. JUSTIFIER le périmètre choisi et lister les alternatives NON retenues
-6. Les écarts avec références doivent être expliqués (périmètre, maturité, régulation)
+Génère 4-6 acteurs pertinents pour ce marché.
+Identifie 4-6 attentes marché dont au moins 2 gaps (coverage=unmet ou partial)."""),
+    ("human", _COMPETITIVE_ANALYSIS_USER_MESSAGE),
+])
+
+_MARKET_TRENDS_USER_MESSAGE = """CONTEXTE DISPONIBLE:
+- Market Sizing: {sizing_context}
+- Segmentation: {segmentation_context}
+- Analyse Concurrentielle: {competitive_context}
+
+Génère une analyse des tendances clés du marché pour:
+- Entreprise de référence: {company}
+- Pays/Marché: {country}
+- Année: {year}"""
+
+_MARKET_TRENDS_TEMPLATE = ChatPromptTemplate.from_messages([
+    ("system", """Tu es un consultant senior en stratégie chez KPMG.
+Tu dois produire une analyse des TENDANCES DU MARCHÉ pour un comité de direction.
+
+RÈGLES ABSOLUES:
+1. AUCUNE RECOMMANDATION - tu décris le marché, tu ne conseilles pas.
+2. Approche neutre et analytique.
+3. Données sourcées et datées quand possible.
+4. Si information incertaine → le signaler explicitement.
+5. Ne PAS répéter les éléments du sizing ou de la concurrence.
+6. Distinguer tendances STRUCTURELLES (fond de marché) vs CONJONCTURELLES (cycle, macro).
+
+Le contexte disponible (market sizing, segmentation, analyse concurrentielle) puis l'entreprise de référence,
+le pays et l'année sont fournis dans le message utilisateur.
+
+FORMAT DE SORTIE: JSON STRICT (pas de texte avant/après).
+
+Structure JSON attendue:
+{{
+  "context": {{
+    "market_scope": "Description concise du périmètre de marché analysé",
+    "analysis_horizon": "2-5 ans"
+  }},
+  
+  "market_trends": [
+    {{
+      "trend_id": "TREND_001",
+      "title": "Intitulé clair et non marketing (ex: Consolidation des acteurs B2B)",
+      "description": "Description factuelle et synthétique en 3-4 lignes maximum. Données chiffrées si disponibles.",
+      "driver": "technologique|réglementaire|économique|comportemental|ESG",
+      "driver_detail": "Précision sur le driver (ex: IA générative, RGPD, inflation...)",
+      "maturity": "émergente|en accélération|mature",
+      "horizon": "court terme (0-2 ans)|moyen terme (2-5 ans)|long terme (5+ ans)",
+      "type": "structurelle|conjoncturelle",
+      "is_weak_signal": false,
+      "uncertainty_level": "faible|moyen|élevé",
+      "uncertainty_reason": "Raison de l'incertitude si niveau moyen ou élevé",
+      "sources": ["Source 1 (date)", "Source 2 (date)"],
+      "geographic_scope": "Local (nom du pays)|Européen|Global"
+    }}
+  ],
+  
+  "weak_signals": [
+    {{
+      "signal_id": "SIGNAL_001",
+      "signal": "Description du signal faible détecté",
+      "potential_impact": "Impact potentiel si le signal se confirme",
+      "monitoring_indicators": ["Indicateur 1 à surveiller", "Indicateur 2"],
+      "emergence_timeline": "6-12 mois|1-2 ans|2-3 ans"
+    }}
+  ],
+  
+  "market_debates": [
+    {{
+      "debate_id": "DEBATE_001",
+      "topic": "Zone d'incertitude ou de débat sur le marché",
+      "position_a": "Position ou scénario A",
+      "position_b": "Position ou scénario B",
+      "consensus_level": "aucun|émergent|fort",
+      "key_uncertainties": ["Incertitude qui départagera les positions"]
+    }}
+  ],
+  
+  "structural_vs_cyclical_summary": {{
+    "structural_trends_count": N,
+    "cyclical_trends_count": M,
+    "dominant_drivers": ["Driver 1", "Driver 2"],
+    "market_maturity_assessment": "Description de la maturité globale du marché"
+  }},
+  
+  "reliability": {{
+    "overall_confidence": "HIGH|MEDIUM|LOW",
+    "data_freshness": "Description de la fraîcheur des données",
+    "geographic_coverage": "Niveau de couverture géographique des sources",
+    "key_limitations": ["Limitation 1", "Limitation 2"]
+  }}
+}}
+
+Génère 5-7 tendances clés pertinentes pour l'horizon 2-5 ans.
+Identifie 1-3 signaux faibles.
+Mentionne 1-2 zones d'incertitude ou débats du marché."""),
+    ("human", _MARKET_TRENDS_USER_MESSAGE),
+])
+
+_SECTORAL_SIZING_TEMPLATE = ChatPromptTemplate.from_template("""
+Tu es un assistant d'analyse stratégique senior utilisé par un cabinet de conseil de premier plan.
+Tu dois estimer la taille d'un MARCHÉ SECTORIEL, sans te focaliser sur une entreprise spécifique.
+Tu calcules la VALEUR TOTALE DU MARCHÉ (TAM/SAM), pas le potentiel d'un acteur particulier.
+
+═══════════════════════════════════════════════════════════════
+📌 CONTEXTE À ANALYSER
+═══════════════════════════════════════════════════════════════
+Marché / Secteur : {market_description}
+Pays / Zone : {country}
+Année : {year}
+Contexte additionnel : {additional_context}
+═══════════════════════════════════════════════════════════════
+
+🔒 MODE SECTORIEL : Tu ne te concentres PAS sur une entreprise.
+Tu estimes la TAILLE TOTALE du marché pour TOUS les acteurs confondus.
+
+⚠️ VALIDATION STRICTE DES SOURCES ⚠️
+
+Pour CHAQUE fact utilisé dans "facts_used", tu DOIS OBLIGATOIREMENT fournir :
+
+✅ OBLIGATOIRE :
+1. **source_name** : Nom complet de l'organisation/étude (ex: "INSEE", "Grand View Research")
+2. **source_reference** : Référence précise du document
+3. **source_date** : Année de publication - OBLIGATOIRE
+4. **source_type** : "primaire" | "secondaire" | "proxy"
+5. **confidence** : "high" | "medium" | "low"
+
+📋 SOURCES INTERDITES :
+❌ "Estimation" sans méthodologie détaillée
+❌ "Analyse sectorielle" sans nom d'étude précis
+❌ Ratios géographiques arbitraires (ex: "8% pour la France")
+❌ Sources > 3 ans sans justification explicite dans "notes"
+
+🚨 AJUSTEMENTS GÉOGRAPHIQUES :
+Si tu utilises une donnée mondiale et l'ajustes au pays :
+- Dans "facts_used" : documenter la source mondiale
+- Dans "estimation_methods.top_down" : OBLIGATOIRE documenter "country_ratio_source"
+
+📋 FORMAT DE SORTIE JSON STRICT :
+{{
+    "context_lock": {{
+        "mode": "sectoral",
+        "market_description": "{market_description}",
+        "country": "{country}",
+        "year": "{year}",
+        "scope_validated": true
+    }},
+    
+    "market_definition": {{
+        "market_name": "Nom standardisé du marché (ex: 'E-santé - Segment Téléconsultation')",
+        "market_justification": "Justification du périmètre retenu",
+        "perimeter": {{
+            "value_type": "revenu_final (CA des acteurs)",
+            "inclusions": ["Inclus 1", "Inclus 2"],
+            "exclusions": ["Exclu 1", "Exclu 2"]
+        }},
+        "local_adaptations": {{
+            "maturity_level": "emerging|growing|mature",
+            "regulatory_context": "Cadre réglementaire local pertinent"
+        }}
+    }},
+    
+    "facts_used": [
+        {{
+            "fact_id": "FACT_001",
+            "key": "population_cible",
+            "description": "Description précise du fait",
+            "value": 67000000,
+            "unit": "personnes",
+            "source": "INSEE 2024",
+            "source_type": "primaire",
+            "confidence": "high",
+            "notes": "Population totale France métropolitaine"
+        }}
+    ],
+    
+    "estimation_methods": {{
+        "top_down": {{
+            "global_market_value": 1500000000,
+            "global_source": "Grand View Research 2024",
+            "country_ratio": 0.08,
+            "country_ratio_source": "Eurostat - Part PIB France/Monde",
+            "result": 120000000,
+            "confidence": "medium",
+            "methodology": "TAM Monde x Part Pays"
+        }},
+        "bottom_up": {{
+            "addressable_units": 500000,
+            "unit_definition": "Actes de téléconsultation par an",
+            "average_price": 25,
+            "price_source": "Tarification conventionnée CNAM",
+            "result": 125000000,
+            "confidence": "high",
+            "methodology": "Volume x Prix Moyen"
+        }},
+        "supply_led": {{
+            "top_players_revenue": 80000000,
+            "top_players_names": ["Acteur A", "Acteur B", "Acteur C"],
+            "estimated_market_share": 0.65,
+            "market_share_source": "Estimation IDC/Gartner",
+            "result": 123000000,
+            "confidence": "medium",
+            "methodology": "CA Leaders / Part de Marché"
+        }}
+    }},
+    
+    "triangulation": {{
+        "simple_average": 122666667,
+        "weighted_average": 123500000,
+        "weighting_rationale": "Bottom-up privilégié (données primaires France)",
+        "confidence_assessment": "Convergence des 3 méthodes à ±3%, fiabilité haute"
+    }},
+    
+    "market_structure": {{
+        "concentration": "fragmenté|moyennement_concentré|oligopole",
+        "top_players": [
+            {{
+                "name": "Leader A",
+                "estimated_share": 25,
+                "typology": "leader|challenger|niche",
+                "business_model": "SaaS|transactionnel|mixte"
+            }}
+        ],
+        "long_tail_estimate": "40% du marché détenu par acteurs < 5M€ CA"
+    }},
+    
+    "segmentation": {{
+        "by_client": [
+            {{"segment": "B2C - Particuliers", "weight_pct": 60}},
+            {{"segment": "B2B - Entreprises", "weight_pct": 40}}
+        ],
+        "by_offering": [
+            {{"segment": "Consultations synchrones", "weight_pct": 70}},
+            {{"segment": "Suivi asynchrone", "weight_pct": 30}}
+        ]
+    }},
+    
+    "growth_dynamics": {{
+        "cagr_estimate": 12.5,
+        "cagr_source": "Moyenne McKinsey/BCG/Gartner",
+        "cagr_period": "2024-2028",
+        "key_drivers": [
+            {{"driver": "Remboursement élargi", "impact": "high", "direction": "positive"}},
+            {{"driver": "Digitalisation santé", "impact": "medium", "direction": "positive"}}
+        ],
+        "risks": [
+            {{"risk": "Régulation restrictive", "impact": "medium", "probability": "low"}}
+        ]
+    }},
+    
+    "calculation": {{
+        "formula": "Triangulation multi-méthodes",
+        "step_by_step": [
+            "1. Top-Down: 1.5Md€ (Monde) x 8% → 120M€",
+            "2. Bottom-Up: 500k actes x 25€ → 125M€",
+            "3. Supply-Led: 80M€ (Top 3) / 65% → 123M€",
+            "4. Triangulation pondérée → 123.5M€"
+        ],
+        "final_estimate": {{
+            "value": 123500000,
+            "unit": "EUR",
+            "year": "{year}",
+            "range_low": 110000000,
+            "range_high": 140000000
+        }}
+    }},
+    
+    "reliability": {{
+        "overall_confidence": "MEDIUM",
+        "data_quality_score": 70,
+        "hypothesis_count": 3,
+        "key_uncertainties": [
+            "Périmètre exact des actes inclus",
+            "Part des acteurs non déclarés"
+        ],
+        "limitations": [
+            "Pas de données Nielsen/IRI spécifiques",
+            "Extrapolation taux de croissance"
+        ]
+    }},
+    
+    "sources_registry": [
+        {{
+            "source_name": "INSEE",
+            "source_reference": "Statistiques population 2024",
+            "data_used": "Population totale",
+            "date": "2024"
+        }}
+    ],
+    
+    "quantified_hypotheses": [
+        {{
+            "hypothesis_id": "HYP_001",
+            "name": "Prix moyen du marché",
+            "value": 25,
+            "unit": "EUR",
+            "justification": "Moyenne pondérée des tarifs pratiqués selon segments",
+            "source": "Étude tarifaire sectorielle XYZ 2024",
+            "sensitivity": "HIGH",
+            "range_low": 20,
+            "range_high": 30
+        }}
+    ],
+    
+    "source_quality_audit": {{
+        "primary_sources_count": 2,
+        "secondary_sources_count": 3,
+        "proxy_sources_count": 1,
+        "missing_sources": [],
+        "aged_sources": [],
+        "overall_source_quality": "HIGH|MEDIUM|LOW",
+        "critical_gaps": []
+    }},
+    
+    "coherence_checks": {{
+        "triangulation_convergence": {{
+            "top_down_vs_bottom_up_delta_pct": 4.2,
+            "status": "PASS",
+            "threshold": 20,
+            "notes": "Écart <20% considéré comme convergent"
+        }},
+        "arithmetic_checks": [
+            {{
+                "check": "Volume × Prix = Revenu",
+                "status": "PASS"
+            }}
+        ],
+        "market_sum_check": {{
+            "check": "Sum(parts de marché) ≤ 100%",
+            "total_share": 85,
+            "status": "PASS"
+        }},
+        "overall_coherence": "HIGH|MEDIUM|LOW"
+    }},
+    
+    "regulatory_impact": {{
+        "is_regulated_market": true,
+        "regulatory_bodies": ["Organisme 1", "Organisme 2"],
+        "key_mechanisms": [
+            {{
+                "mechanism": "Remboursement / Tarification régulée",
+                "impact_on_tam": "Limite le prix moyen pratiqué",
+                "quantified_impact": "Plafonne à 25€ vs 35€ en marché libre"
+            }}
+        ],
+        "recent_changes": [],
+        "uncertainties": []
+    }},
+    
+    "scope_analysis": {{
+        "chosen_scope": "Téléconsultations synchrones uniquement",
+        "scope_stance": "conservative",
+        "scope_rationale": "Focus sur le segment le plus mature pour limiter l'incertitude",
+        "alternatives_considered": [
+            {{
+                "scope": "Inclure télé-expertise asynchrone",
+                "reason_excluded": "Modèle tarifaire différent, régulation distincte",
+                "additional_value_estimate": 50000000,
+                "confidence": "LOW"
+            }}
+        ]
+    }},
+    
+    "strategic_implications": {{
+        "market_attractiveness": "Marché en croissance (+12% CAGR), concentration modérée",
+        "entry_barriers": "Réglementation santé, certification HDS, partenariats remboursement",
+        "key_success_factors": ["Intégration parcours patient", "Tarification", "Réseau praticiens"]
+    }}
+}}
+
+🚨 RÈGLES STRICTES MODE SECTORIEL :
+1. Tu ne calcules PAS de SOM (pas d'entreprise cible)
+2. Tu TRIANGULES obligatoirement 3 méthodes
+3. Tu LISTES les principaux acteurs et leurs parts estimées
+4. Tu FOURNIS une fourchette (range_low / range_high)
+
+Réponds UNIQUEMENT avec du JSON valide, aucun texte autour.
+""")
+
+
+class StrategicFactsService:
+    """
+    Service centralisé de génération d'analyses stratégiques.
+    Combine les données financières avec l'analyse LLM : SWOT, BCG et PESTEL
+    générés par trois appels concurrents, une section par appel.
+    """
+    
+    def __init__(self, cache_ttl_minutes: int = 15, max_cache_entries: int = 512):
+        """
+        Initialise le service Strategic FACTS.
+        
+        Args:
+            cache_ttl_minutes: Durée de vie du cache en minutes (défaut: 15)
+            max_cache_entries: Nombre max d'analyses en mémoire, éviction LRU (défaut: 512)
+        """
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._max_cache_entries = max_cache_entries
+        self._cache_by_company: Dict[str, Set[str]] = {}  # index entreprise normalisée -> clés de cache
+        self._cache_expiry: Dict[str, float] = {}  # échéance time.monotonic() par clé
+        self._cache_ttl_seconds = cache_ttl_minutes * 60
+        self._l2_bypass_until: Dict[str, float] = {}  # entreprise -> échéance monotonic, posée par clear_cache(company)
+        self._http_client: Optional[httpx.Client] = None
+        # LLM, chaînes et client httpx async par boucle asyncio : un pool de connexions async
+        # est lié à la boucle qui l'a ouvert (boucle de l'appelant, boucle persistante _sync_loop).
+        # Hors boucle (appels .invoke synchrones), ressources communes dans _sync_resources.
+        self._loop_resources: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, Any]]" = weakref.WeakKeyDictionary()
+        self._sync_resources: Optional[Dict[str, Any]] = None
+        self._llm_cache: Optional[SQLiteLLMCache] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+    
+    def _get_llm(self, use_cache: bool = False, model: str = _DEFAULT_MODEL):
+        """
+        Initialise le LLM Mistral (lazy loading, une instance par modèle et par boucle asyncio).
+        
+        Args:
+            use_cache: Si True, le modèle passe par le cache persistant SQLite (L2),
+                       partagé entre workers (chemin: STRATEGIC_CACHE_DB).
+            model: Modèle Mistral (défaut: mistral-small ; _LIGHT_MODEL pour les tâches simples)
+        """
+        resources = self._get_loop_resources()
+        key = (model, use_cache)
+        if key not in resources["llms"]:
+            cache = None
+            if use_cache:
+                if self._llm_cache is None:
+                    self._llm_cache = SQLiteLLMCache(
+                        os.getenv("STRATEGIC_CACHE_DB", ".strategic_cache.db"),
+                        self._cache_ttl_seconds
+                    )
+                cache = self._llm_cache
+            resources["llms"][key] = ChatMistralAI(
+                model=model,
+                temperature=0.2,
+                mistral_api_key=_mistral_api_key(),
+                cache=cache,
+                client=self._get_http_client(),
+                async_client=resources["async_client"]
+            )
+        return resources["llms"][key]
+    
+    def _get_loop_resources(self) -> Dict[str, Any]:
+        """
+        LLM, chaînes et client httpx async propres à la boucle asyncio en cours, créés à la
+        première utilisation dans la boucle. Hors boucle, un jeu commun (son client async n'est
+        jamais ouvert : les appels .invoke passent par le client synchrone).
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        resources = self._sync_resources if loop is None else self._loop_resources.get(loop)
+        if resources is None:
+            resources = {"async_client": httpx.AsyncClient(**_http_client_options()), "llms": {}, "chains": {}}
+            if loop is None:
+                self._sync_resources = resources
+            else:
+                self._loop_resources[loop] = resources
+        return resources
+    
+    def _get_http_client(self) -> httpx.Client:
+        """
+        Client HTTP synchrone partagé par toutes les instances ChatMistralAI du service :
+        un seul pool de connexions keep-alive (TCP + TLS réutilisés entre modèles et appels).
+        """
+        if self._http_client is None:
+            self._http_client = httpx.Client(**_http_client_options())
+        return self._http_client
+    
+    def _get_chain(
+        self,
+        template: ChatPromptTemplate,
+        use_cache: bool = False,
+        json_mode: bool = False,
+        model: str = _DEFAULT_MODEL,
+        **call_params
+    ):
+        """
+        Retourne la chaîne `template | llm`, construite une seule fois par template précompilé
+        (et par boucle asyncio, voir _get_loop_resources).
+        
+        Args:
+            json_mode: Active le mode JSON de Mistral (response_format json_object) :
+                       la réponse est garantie être un objet JSON valide.
+            model: Modèle Mistral utilisé par la chaîne
+            **call_params: Paramètres d'appel liés à la chaîne (ex: max_tokens, temperature)
+        """
+        chains = self._get_loop_resources()["chains"]
+        key = (id(template), use_cache, json_mode, model, tuple(sorted(call_params.items())))
+        if key not in chains:
+            llm = self._get_llm(use_cache, model)
+            if json_mode:
+                call_params["response_format"] = {"type": "json_object"}
+            if call_params:
+                llm = llm.bind(**call_params)
+            chains[key] = template | llm
+        return chains[key]
+    
+    async def _ainvoke_capped(self, template: ChatPromptTemplate, variables: Dict[str, Any], cap: str, **chain_params):
+        """
+        Appel plafonné à _MAX_OUTPUT_TOKENS[cap] ; une réponse tronquée par le plafond
+        est relancée une fois sans plafond plutôt que de perdre toute la section.
+        """
+        response = await self._get_chain(template, max_tokens=_MAX_OUTPUT_TOKENS[cap], **chain_params).ainvoke(variables)
+        if _is_truncated(response):
+            _logger.warning("✂️ [LLM] Réponse %s tronquée à %s tokens, nouvelle tentative sans plafond", cap, _MAX_OUTPUT_TOKENS[cap])
+            response = await self._get_chain(template, **chain_params).ainvoke(variables)
+        return response
+    
+    def _invoke_capped(self, template: ChatPromptTemplate, variables: Dict[str, Any], cap: str, **chain_params):
+        """Version synchrone de `_ainvoke_capped` (chain.invoke)."""
+        response = self._get_chain(template, max_tokens=_MAX_OUTPUT_TOKENS[cap], **chain_params).invoke(variables)
+        if _is_truncated(response):
+            _logger.warning("✂️ [LLM] Réponse %s tronquée à %s tokens, nouvelle tentative sans plafond", cap, _MAX_OUTPUT_TOKENS[cap])
+            response = self._get_chain(template, **chain_params).invoke(variables)
+        return response
+    
+    def _cache_put(self, company: str, key: str, result: Dict[str, Any]):
+        """Insère une analyse en cache (purge des entrées expirées puis éviction LRU)."""
+        now = time.monotonic()
+        for expired_key in [k for k, deadline in self._cache_expiry.items() if deadline <= now]:
+            self._cache_drop(expired_key)
+        
+        self._cache_drop(key)  # clé réécrite : retirée de l'index de l'entreprise précédente
+        self._cache[key] = result
+        self._cache_expiry[key] = now + self._cache_ttl_seconds
+        self._cache_by_company.setdefault(self._company_key(company), set()).add(key)
+        while len(self._cache) > self._max_cache_entries:
+            self._cache_drop(next(iter(self._cache)))
+    
+    def _cache_drop(self, key: str):
+        """Retire une clé du cache, de ses échéances et de l'index par entreprise."""
+        result = self._cache.pop(key, None)
+        self._cache_expiry.pop(key, None)
+        if result is not None:
+            company = self._company_key(result["company"])
+            company_keys = self._cache_by_company.get(company)
+            if company_keys is not None:
+                company_keys.discard(key)
+                if not company_keys:
+                    del self._cache_by_company[company]
+    
+    @staticmethod
+    def _company_key(company: str) -> str:
+        """Forme normalisée d'une entreprise pour l'index du cache et le contournement L2 ("Apple" == " apple ")."""
+        return company.strip().lower()
+    
+    def _use_l2(self, company: str, force_refresh: bool) -> bool:
+        """
+        Le cache SQLite (L2) peut-il servir cette entreprise ? Non en cas de force_refresh, ni tant
+        que des entrées antérieures à un clear_cache(company) peuvent encore y être valides (TTL).
+        """
+        if force_refresh:
+            return False
+        company = self._company_key(company)
+        deadline = self._l2_bypass_until.get(company)
+        if deadline is None:
+            return True
+        if deadline > time.monotonic():
+            return False
+        del self._l2_bypass_until[company]
+        return True
+    
+    def _input_cache_key(self, prefix: str, company: str, *inputs: str) -> str:
+        """Clé de cache exacte sur les entrées d'un générateur (entreprise normalisée + autres entrées)."""
+        payload = json.dumps([self._company_key(company), *inputs], ensure_ascii=False)
+        return prefix + hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+    
+    def _cache_get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Résultat en cache mémoire encore valide pour cette clé (marqué récemment utilisé), sinon None."""
+        if key in self._cache and self._is_cache_valid(key):
+            self._cache.move_to_end(key)
+            return self._cache[key]
+        return None
+    
+    def _is_cache_valid(self, key: str) -> bool:
+        """Vérifie si le cache est encore valide."""
+        return self._cache_expiry.get(key, 0.0) > time.monotonic()
+    
+    def _is_aged_source(self, source_date: str) -> bool:
+        """Vérifie si une source est considérée comme datée (>3 ans)."""
+        try:
+            if not source_date:
+                return True
+            year = int(source_date) if source_date.isdigit() else int(source_date.split("-")[0])
+            current_year = datetime.now().year
+            return (current_year - year) > 3
+        except:
+            return True
+    
+    def _validate_source_quality(self, facts: List[Dict]) -> Dict[str, Any]:
+        """
+        Valide la qualité des sources et génère des alertes.
+        
+        Returns:
+            {
+                "is_valid": bool,
+                "quality_score": 0-100,
+                "warnings": List[str],
+                "critical_gaps": List[str],
+                "primary_sources_count": int,
+                "secondary_sources_count": int,
+                "proxy_sources_count": int
+            }
+        """
+        warnings = []
+        critical_gaps = []
+        score = 100
+        
+        primary_count = 0
+        secondary_count = 0
+        proxy_count = 0
+        
+        for fact in facts:
+            source_name = fact.get("source_name", "") or fact.get("source", "")
+            source_type = fact.get("source_type", "").lower()
+            
+            # Comptage par type
+            if source_type == "primaire":
+                primary_count += 1
+            elif source_type == "secondaire":
+                secondary_count += 1
+            elif source_type == "proxy":
+                proxy_count += 1
+            
+            # Validation source_name
+            if not source_name or source_name in ["N/A", "Estimation", "Analyse"]:
+                critical_gaps.append(f"{fact.get('key', 'Unknown')}: Source manquante ou générique")
+                score -= 15
+            
+            # Validation source_date
+            source_date = fact.get("source_date", "")
+            if not source_date:
+                warnings.append(f"{fact.get('key', 'Unknown')}: Date de source manquante")
+                score -= 10
+            elif self._is_aged_source(source_date):
+                warnings.append(f"{fact.get('key', 'Unknown')}: Source datée ({source_date})")
+                score -= 5
+            
+            # Validation périmètre géographique pour ajustements
+            if fact.get("is_global_adjusted") and not fact.get("adjustment_method"):
+                critical_gaps.append(f"{fact.get('key', 'Unknown')}: Ajustement géographique non documenté")
+                score -= 20
+            
+            # Validation source_reference
+            if source_name and source_name not in ["N/A", "Estimation", "Analyse"]:
+                if not fact.get("source_reference"):
+                    warnings.append(f"{fact.get('key', 'Unknown')}: Référence précise manquante pour {source_name}")
+                    score -= 5
+        
+        return {
+            "is_valid": len(critical_gaps) == 0,
+            "quality_score": max(0, score),
+            "warnings": warnings,
+            "critical_gaps": critical_gaps,
+            "primary_sources_count": primary_count,
+            "secondary_sources_count": secondary_count,
+            "proxy_sources_count": proxy_count
+        }
+    
+    # Secteurs régulés (pour détection automatique)
+    REGULATED_SECTORS = {
+        "healthcare": ["téléconsultation", "e-santé", "dispositif médical", "télémédecine", "santé"],
+        "finance": ["paiement", "assurance", "crédit", "banque", "fintech"],
+        "energy": ["électricité", "gaz", "énergie renouvelable"],
+        "transport": ["taxi", "vtc", "mobilité"],
+        "education": ["formation", "éducation", "enseignement"]
+    }
+    
+    def _detect_regulatory_context(self, market_name: str) -> Dict[str, Any]:
+        """Détecte si le marché est régulé et quel secteur."""
+        market_lower = market_name.lower()
+        
+        for sector, keywords in self.REGULATED_SECTORS.items():
+            if any(kw in market_lower for kw in keywords):
+                return {
+                    "is_regulated": True,
+                    "sector": sector,
+                    "requires_documentation": True,
+                    "detected_keywords": [kw for kw in keywords if kw in market_lower]
+                }
+        
+        return {
+            "is_regulated": False,
+            "sector": None,
+            "requires_documentation": False
+        }
+    
+    @staticmethod
+    def _latest_financials(derived: Dict[str, Any]) -> Dict[str, Any]:
+        """Dernière valeur (iloc[-1]) de chaque série dérivée, collectée en une seule passe."""
+        return {k: v.iloc[-1] for k, v in derived.items() if hasattr(v, "iloc") and len(v)}
+    
+    def _format_financial_context(self, facts: Dict[str, Any]) -> str:
+        """
+        Formate les données financières pour enrichir le prompt LLM.
+        
+        Args:
+            facts: Données du facts_service
+            
+        Returns:
+            Contexte financier formaté en texte
+        """
+        if not facts or facts.get("error"):
+            return "Données financières non disponibles."
+        
+        derived = facts.get("derived", {})
+        info = facts.get("info", {})
+        
+        context_parts = []
+        
+        # Infos générales
+        if info:
+            sector = info.get("sector", "N/A")
+            industry = info.get("industry", "N/A")
+            employees = info.get("fullTimeEmployees", "N/A")
+            market_cap = info.get("marketCap", 0)
+            
+            context_parts.append(f"Secteur: {sector} | Industrie: {industry}")
+            context_parts.append(f"Employés: {employees:,}" if isinstance(employees, int) else f"Employés: {employees}")
+            if market_cap:
+                context_parts.append("Capitalisation: " + _fmt_billions(market_cap, 1))
+        
+        # Métriques financières
+        latest = self._latest_financials(derived)
+        
+        if latest.get("revenue") is not None:
+            context_parts.append("Dernier CA: " + _fmt_billions(latest["revenue"]))
+        
+        if latest.get("net_income") is not None:
+            context_parts.append("Dernier Résultat Net: " + _fmt_billions(latest["net_income"]))
+        
+        if latest.get("net_margin") is not None:
+            context_parts.append(f"Marge Nette: {latest['net_margin']:.1f}%")
+        
+        if latest.get("roe") is not None:
+            context_parts.append(f"ROE: {latest['roe']:.1f}%")
+        
+        if latest.get("debt_to_equity") is not None:
+            context_parts.append(f"Ratio Dette/Equity: {latest['debt_to_equity']:.2f}")
+        
+        if latest.get("fcf") is not None:
+            context_parts.append("Free Cash Flow: " + _fmt_billions(latest["fcf"]))
+        
+        return "\n".join(context_parts) if context_parts else "Données financières limitées."
+    
+    def _extract_financial_swot_items(self, facts: Dict[str, Any]) -> Dict[str, list]:
+        """
+        Extrait 1-2 points SWOT automatiques basés sur les données financières.
+        Ces points seront ajoutés aux résultats du LLM.
+        """
+        financial_swot = {
+            "strengths": [],
+            "weaknesses": [],
+            "opportunities": [],
+            "threats": []
+        }
+        
+        if not facts or facts.get("error"):
+            return financial_swot
+        
+        latest = self._latest_financials(facts.get("derived", {}))
+        
+        # Règles évaluées dans l'ordre (marge, ROE, endettement, FCF)
+        for metric, op, threshold, category, label, evidence in _SWOT_RULES:
+            value = latest.get(metric)
+            if value is not None and op(value, threshold):
+                financial_swot[category].append({
+                    "item": label.format(v=value, b=_fmt_billions(value, 1)),
+                    "evidence": evidence,
+                    "source": "financial"
+                })
+        
+        # Limiter à 1-2 items max par catégorie
+        for key in financial_swot:
+            financial_swot[key] = financial_swot[key][:2]
+        
+        return financial_swot
+    
+    def get_strategic_analysis(
+        self, 
+        company: str, 
+        ticker: Optional[str] = None,
+        force_refresh: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Génère une analyse stratégique complète (SWOT + BCG + PESTEL).
+        Version synchrone de `aget_strategic_analysis`.
+        
+        Args:
+            company: Nom de l'entreprise (ex: "Apple", "Tesla")
+            ticker: Symbole boursier optionnel pour enrichissement financier (ex: "AAPL")
+            force_refresh: Force le recalcul même si en cache
+            
+        Returns:
+            Dictionnaire contenant:
+            - swot: {strengths, weaknesses, opportunities, threats}
+            - bcg: [{name, market_share, growth, revenue_weight}]
+            - pestel: {Politique, Economique, Societal, Technologique, Environnemental, Legal}
+            - financial_context: Contexte financier utilisé
+            - generated_at: Timestamp de génération
+        """
+        return _run_sync(self.aget_strategic_analysis(company, ticker, force_refresh))
+    
+    def _parse_llm_json(self, response) -> Any:
+        """Extrait le JSON d'une réponse LLM (retire les balises ```json éventuelles)."""
+        return _json_loads(strip_fences(response.content))
+    
+    async def _aparse_llm_json_or_retry(self, chain, variables: Dict[str, Any], response, context_key: str) -> Any:
+        """
+        Parse la réponse LLM ; si le JSON est invalide, tente une réparation locale (json_repair)
+        puis, à défaut, une seule relance du LLM avec l'erreur en consigne.
+        Une seconde erreur de parsing est propagée (json.JSONDecodeError).
+        """
+        try:
+            return self._parse_llm_json(response)
+        except json.JSONDecodeError as e:
+            error = e
+        
+        if _repair_json is not None:
+            try:
+                repaired = _repair_json(strip_fences(response.content))
+                if isinstance(repaired, dict) and repaired:
+                    _logger.warning("⚠️ [LLM JSON] Réponse invalide réparée localement (%s)", error)
+                    return repaired
+            except Exception:
+                pass
+        
+        _logger.warning("⚠️ [LLM JSON] Réponse invalide (%s), nouvelle tentative", error)
+        retry_variables = dict(variables)
+        retry_variables[context_key] = (
+            f"{variables[context_key]}\n\nTa réponse précédente n'était pas un JSON valide ({error}). "
+            "Renvoie uniquement un JSON valide et complet."
+        )
+        return self._parse_llm_json(await chain.ainvoke(retry_variables))
+    
+    async def aget_strategic_analysis(
+        self, 
+        company: str, 
+        ticker: Optional[str] = None,
+        force_refresh: bool = False,
+        on_section: Optional[Callable[[str, Any], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Génère SWOT, BCG et PESTEL via trois appels LLM concurrents (asyncio.gather).
+        Chaque section est parsée indépendamment : l'échec de l'une n'invalide pas les autres.
+        Mêmes arguments et même structure de retour que `get_strategic_analysis`.
+        
+        Args:
+            on_section: Callback optionnel appelé avec (section, contenu) dès qu'une section
+                        est générée, pour un affichage progressif (SWOT avant BCG/PESTEL).
+                        Les items SWOT financiers ne sont fusionnés que dans le résultat final.
+        """
+        # Suffixe v3 : invalide les entrées produites par les versions précédentes du format
+        cache_key = f"{company}_{ticker or 'no_ticker'}_v3"
+        _logger.debug("[STRATEGIC FACTS] Analyse demandée pour %s (clé : %s)", company, cache_key)
+        
+        # Vérifier le cache mémoire (L1)
+        if not force_refresh and cache_key in self._cache and self._is_cache_valid(cache_key):
+            _logger.info("🎯 [STRATEGIC FACTS] Cache hit pour %s", company)
+            self._cache.move_to_end(cache_key)
+            return self._cache[cache_key]
+        
+        _logger.info("🔄 [STRATEGIC FACTS] Génération de l'analyse stratégique pour %s...", company)
+        
+        # Récupérer les données financières si ticker fourni
+        # (un seul appel : les mêmes facts alimentent le contexte et le SWOT financier)
+        facts = None
+        financial_context = "Pas de données financières (ticker non spécifié)."
+        if ticker:
+            try:
+                # Appel bloquant (réseau) déporté dans un thread : la boucle reste disponible
+                facts = await asyncio.to_thread(facts_service.get_company_facts, ticker)
+                financial_context = self._format_financial_context(facts)
+                _logger.info("📈 [STRATEGIC FACTS] Données financières %s intégrées", ticker)
+            except Exception as e:
+                _logger.warning("⚠️ [STRATEGIC FACTS] Erreur récupération financière: %s", e)
+        
+        # L2 persistant ignoré en cas de force_refresh ou de clear_cache(company) récent
+        use_cache = self._use_l2(company, force_refresh)
+        variables = {
+            "company": company,
+            "financial_context": financial_context
+        }
+        
+        async def _generate_section(section: str, template: ChatPromptTemplate) -> Any:
+            # Parsing dès la fin de la section : les sections rapides sont publiées sans attendre les autres
+            response = await self._ainvoke_capped(template, variables, section, use_cache=use_cache, json_mode=True)
+            data = self._parse_llm_json(response)
+            content = data.get(section) if isinstance(data, dict) else None
+            if not isinstance(content, _SECTION_TYPES[section]):
+                raise ValueError(f"clé '{section}' absente ou mal typée ({type(content).__name__})")
+            if on_section is not None:
+                on_section(section, content)
+            return content
+        
+        def _financial_swot() -> Dict[str, list]:
+            # Enrichir le SWOT avec les données financières automatiques
+            if not facts:
+                return {}
+            try:
+                return self._extract_financial_swot_items(facts)
+            except Exception:
+                return {}
+        
+        # Extraction financière (thread) en parallèle du décodage des 3 sections
+        sections = ("swot", "bcg", "pestel")
+        templates = (_SWOT_TEMPLATE, _BCG_TEMPLATE, _PESTEL_TEMPLATE)
+        financial_swot, *responses = await asyncio.gather(
+            asyncio.to_thread(_financial_swot),
+            *(_generate_section(section, template) for section, template in zip(sections, templates)),
+            return_exceptions=True
+        )
+        if isinstance(financial_swot, BaseException):
+            financial_swot = {}
+        
+        # Parsing indépendant de chaque section
+        analysis = {}
+        errors = []
+        for section, response in zip(sections, responses):
+            if isinstance(response, ValueError):  # JSON invalide (JSONDecodeError) ou section absente / mal typée
+                _logger.error("❌ [STRATEGIC FACTS] Erreur parsing JSON (%s): %s", section, response)
+                errors.append(f"{section}: Erreur parsing: {response}")
+            elif isinstance(response, BaseException):
+                _logger.error("❌ [STRATEGIC FACTS] Erreur (%s): %s", section, response)
+                errors.append(f"{section}: {response}")
+            else:
+                analysis[section] = response
+        
+        if not analysis:
+            return self._empty_analysis(company, ticker, " | ".join(errors))
+        
+        # Fusionner : items financiers en premier, puis items IA
+        merged_swot = {}
+        for category in ["strengths", "weaknesses", "opportunities", "threats"]:
+            ai_items = (analysis.get("swot") or {}).get(category, [])[:3]  # Max 3 AI items
+            fin_items = financial_swot.get(category, [])[:2]  # Max 2 financial items
+            # Financial items first (avec icône), puis AI items
+            merged_swot[category] = fin_items + ai_items
+        
+        # Structure finale avec métadonnées
+        result = {
+            "company": company,
+            "ticker": ticker,
+            "swot": merged_swot,
+            "bcg": analysis.get("bcg") or [],
+            "pestel": analysis.get("pestel") or {},
+            "financial_context": financial_context,
+            "generated_at": datetime.now().isoformat()
+        }
+        
+        if errors:
+            # Résultat partiel : renvoyé mais pas mis en cache
+            result["section_errors"] = errors
+            _logger.warning("⚠️ [STRATEGIC FACTS] Analyse partielle pour %s (%s section(s) en erreur)", company, len(errors))
+            return result
+        
+        # Mise en cache
+        self._cache_put(company, cache_key, result)
+        
+        _logger.info("✅ [STRATEGIC FACTS] Analyse générée et mise en cache pour %s", company)
+        return result
+
+    def get_strategic_analysis_bulk(
+        self,
+        companies: List[Tuple[str, Optional[str]]],
+        force_refresh: bool = False,
+        max_concurrency: int = 4
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Génère les analyses stratégiques de plusieurs entreprises dans une seule boucle asyncio.
+
+        Args:
+            companies: Liste de tuples (company, ticker)
+            force_refresh: Force le recalcul même si en cache
+            max_concurrency: Nombre max d'entreprises analysées simultanément
+                             (chacune déclenche 3 appels LLM)
+
+        Returns:
+            Dictionnaire {company: analyse} (même structure que get_strategic_analysis)
+        """
+        if len(companies) == 1:
+            company, ticker = companies[0]
+            return {company: self.get_strategic_analysis(company, ticker, force_refresh)}
+
+        async def _run_all():
+            semaphore = asyncio.Semaphore(max_concurrency)
+
+            async def _run_one(company, ticker):
+                async with semaphore:
+                    return await self.aget_strategic_analysis(company, ticker, force_refresh)
+
+            return await asyncio.gather(*(_run_one(c, t) for c, t in companies))
+
+        _logger.info("🔄 [STRATEGIC FACTS] Analyse groupée de %s entreprises...", len(companies))
+        results = _run_sync(_run_all())
+        return {company: result for (company, _), result in zip(companies, results)}
+
+    def _empty_analysis(self, company: str, ticker: Optional[str], error: str) -> Dict[str, Any]:
+        """Retourne une structure vide en cas d'erreur."""
+        return {
+            "company": company,
+            "ticker": ticker,
+            "error": error,
+            "swot": {
+                "strengths": [],
+                "weaknesses": [],
+                "opportunities": [],
+                "threats": []
+            },
+            "bcg": [],
+            "pestel": {},
+            "financial_context": "",
+            "generated_at": datetime.now().isoformat()
+        }
+    
+    def clear_cache(self, company: Optional[str] = None):
+        """
+        Vide le cache.
+        
+        Args:
+            company: Si spécifié, vide uniquement le cache de cette entreprise : son cache mémoire,
+                     et ses prochains appels ignorent le cache SQLite (non indexé par entreprise)
+                     jusqu'à expiration des entrées antérieures (TTL).
+        """
+        if company:
+            company_key = self._company_key(company)
+            for key in self._cache_by_company.pop(company_key, set()):
+                self._cache.pop(key, None)
+                self._cache_expiry.pop(key, None)
+            self._l2_bypass_until[company_key] = time.monotonic() + self._cache_ttl_seconds
+            _logger.info("🗑️ [STRATEGIC FACTS] Cache vidé pour %s", company)
+        else:
+            self._cache.clear()
+            self._cache_expiry.clear()
+            self._cache_by_company.clear()
+            self._l2_bypass_until.clear()
+            if self._llm_cache is not None:
+                self._llm_cache.clear()
+            _logger.info("🗑️ [STRATEGIC FACTS] Cache entièrement vidé")
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Retourne les statistiques du cache."""
+        return {
+            "entries": len(self._cache),
+            "companies": list(self._cache_by_company),
+            "ttl_minutes": self._cache_ttl_seconds / 60
+        }
+
+
+    
+    def generate_market_sizing_facts(self, scope: str) -> List[Dict[str, Any]]:
+        """
+        Génère des estimations de marché (TAM/SAM/SOM) chiffrées via Mistral.
+        NOUVELLE LOGIQUE : Génération de multiples perspectives (Secondaire, Bottom-Up, Supply-Led).
+        """
+        _logger.info("🔄 [MARKET GENERATION] Estimation MULTI-MÉTHODES du marché pour : %s", scope)
+        
+        try:
+            response = self._invoke_capped(_MARKET_SIZING_TEMPLATE, {"scope": scope}, "market_sizing")
+            return self._build_market_sizing_facts(self._parse_llm_json(response))
+
+        except Exception as e:
+            _logger.error("❌ [MARKET GENERATION] Erreur: %s", e, exc_info=_DEBUG)
+            return []
+
+    async def agenerate_market_sizing_facts(self, scope: str) -> List[Dict[str, Any]]:
+        """Version asynchrone de `generate_market_sizing_facts` (chain.ainvoke)."""
+        _logger.info("🔄 [MARKET GENERATION] Estimation MULTI-MÉTHODES du marché pour : %s", scope)
+        
+        try:
+            response = await self._ainvoke_capped(_MARKET_SIZING_TEMPLATE, {"scope": scope}, "market_sizing")
+            return self._build_market_sizing_facts(self._parse_llm_json(response))
+
+        except Exception as e:
+            _logger.error("❌ [MARKET GENERATION] Erreur: %s", e, exc_info=_DEBUG)
+            return []
+
+    def _build_market_sizing_facts(self, data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Convertit le JSON d'estimation multi-méthodes en facts granulaires."""
+        facts = []
+        ts = time.time_ns() // 1_000_000_000
+        
+        # 0. SCOPE DEFINITION FACT (NEW)
+        if "scope_definition" in data:
+            sd = data["scope_definition"]
+            facts.append({
+                "id": f"scope_def_{ts}",
+                "category": "scope_definition",
+                "key": "market_scope_definition",
+                "value": sd, # Store the whole dict
+                "unit": "N/A",
+                "source": "Moteur Sémantique",
+                "confidence": "high",
+                "notes": "Définition explicite du périmètre avant calcul."
+            })
+
+        # 1. SECONDARY TAM FACT
+        if "secondary_tam" in data and data["secondary_tam"].get("value"):
+            st = data["secondary_tam"]
+            facts.append({
+                "id": f"gen_tam_sec_{ts}",
+                "category": "market_estimation",
+                "key": "tam_global_market", # Standard key for Engine
+                "value": st["value"],
+                "unit": st["unit"],
+                "source": st.get("source", "Analyste IA"),
+                "source_type": "Secondaire",
+                "retrieval_method": "Rapport",
+                "confidence": "high" if st.get("confidence", 0) > 0.7 else "medium",
+                "notes": st.get("desc", f"Scope Source: {st.get('scope_match', 'N/A')}. Year: {st.get('year')}"),
+                "derivation": "secondary", # NEW FIELD
+                "coherence_score": st.get("confidence", 0.5)
+            })
+
+        # 2-3. BRIQUES BOTTOM-UP ET SUPPLY-LED
+        for block, field, id_suffix, key, source_type, derivation, default_source, default_notes, unit in _MARKET_BRICK_SPEC:
+            if block in data and data[block].get(field):
+                brick = data[block][field]
+                facts.append({
+                    "id": f"gen_{id_suffix}_{ts}",
+                    "category": "market_estimation",
+                    "key": key,
+                    "value": brick["value"],
+                    "unit": unit or brick["unit"],
+                    "source": brick.get("source", default_source),
+                    "source_type": source_type,
+                    "notes": brick.get("desc", default_notes),
+                    "derivation": derivation
+                })
+
+        # 4. RATIOS
+        if "ratios" in data:
+            r = data["ratios"]
+            for prefix, default_pct, key, source, confidence, default_notes in _MARKET_RATIO_SPEC:
+                facts.append({
+                    "id": f"gen_{prefix}_{ts}",
+                    "category": "market_estimation",
+                    "key": key,
+                    "value": (r.get(f"{prefix}_pct", default_pct) / 100.0),
+                    "unit": "%",
+                    "source": source,
+                    "confidence": confidence,
+                    "notes": r.get(f"{prefix}_desc", default_notes)
+                })
+
+        _logger.info("✅ [MARKET GENERATION] %s Facts Granulaires Générés", len(facts))
+        return facts
+
+    def find_competitors(self, scope: str) -> List[str]:
+        """
+        Identifies top 5 public competitors tickers for the given scope using Mistral.
+        Returns a list of tickers (e.g. ['SAP', 'ORCL', 'CRM']).
+        """
+        _logger.info("🕵️‍♂️ [COMPETITORS] Recherche des concurrents pour : %s", scope)
+        
+        try:
+            response = self._invoke_capped(_COMPETITORS_TEMPLATE, {"scope": scope}, "competitors", **_COMPETITORS_CALL)
+            return self._clean_competitor_tickers(self._parse_llm_json(response))
+            
+        except Exception as e:
+            _logger.error("❌ [COMPETITORS] Erreur: %s", e, exc_info=_DEBUG)
+            # Fallback list depends on scope, but return empty safe
+            return ["SAP", "ORCL", "MSFT"] # Generic Fallback
+
+    async def afind_competitors(self, scope: str) -> List[str]:
+        """Async version of `find_competitors` (chain.ainvoke)."""
+        _logger.info("🕵️‍♂️ [COMPETITORS] Recherche des concurrents pour : %s", scope)
+        
+        try:
+            response = await self._ainvoke_capped(_COMPETITORS_TEMPLATE, {"scope": scope}, "competitors", **_COMPETITORS_CALL)
+            return self._clean_competitor_tickers(self._parse_llm_json(response))
+            
+        except Exception as e:
+            _logger.error("❌ [COMPETITORS] Erreur: %s", e, exc_info=_DEBUG)
+            return ["SAP", "ORCL", "MSFT"] # Generic Fallback
+
+    def _clean_competitor_tickers(self, tickers: List[Any]) -> List[str]:
+        """Basic cleaning of the LLM ticker list."""
+        valid_tickers = [t.strip().upper() for t in tickers if isinstance(t, str) and len(t) < 10]
+        _logger.info("✅ [COMPETITORS] Trouvés : %s", valid_tickers)
+        return valid_tickers
+
+    def full_analysis(self, company: str, ticker: Optional[str], scope: str, force_refresh: bool = False) -> Dict[str, Any]:
+        """
+        Analyse complète pour un dashboard : stratégie (SWOT/BCG/PESTEL), dimensionnement
+        du marché et concurrents. Version synchrone de `afull_analysis`.
+        """
+        return _run_sync(self.afull_analysis(company, ticker, scope, force_refresh))
+
+    async def afull_analysis(self, company: str, ticker: Optional[str], scope: str, force_refresh: bool = False) -> Dict[str, Any]:
+        """
+        Lance les trois générations en parallèle (asyncio.gather) :
+        latence totale ≈ max des appels au lieu de leur somme.
+        
+        Returns:
+            {"strategic_analysis": Dict, "market_sizing_facts": List[Dict], "competitors": List[str]}
+        """
+        strategic, market_facts, competitors = await asyncio.gather(
+            self.aget_strategic_analysis(company, ticker, force_refresh),
+            self.agenerate_market_sizing_facts(scope),
+            self.afind_competitors(scope)
+        )
+        return {
+            "strategic_analysis": strategic,
+            "market_sizing_facts": market_facts,
+            "competitors": competitors
+        }
+
+    def generate_company_market_analysis(self, company_name: str, company_context: str = "", force_refresh: bool = False) -> Dict[str, Any]:
+        """
+        Version synchrone de `agenerate_company_market_analysis`.
+        
+        NOUVELLE MÉTHODE - Analyse de marché centrée sur une entreprise.
+        
+        Méthodologie KPMG en 7 étapes :
+        1. Point de départ : l'entreprise (core business, marché de référence)
+        2. Placement dans le marché (périmètre précis)
+        3. Segmentation multi-axes
+        4. Dynamiques & tendances
+        5. Lien entreprise ↔ segments
+        6. Règles méthodologiques strictes
+        7. Format de sortie structuré
+        
+        Args:
+            company_name: Nom de l'entreprise (ex: "Doctolib", "Mirakl")
+            company_context: Contexte additionnel (secteur, offres, clients...)
+            force_refresh: Ignore les caches (mémoire et SQLite) et relance l'appel LLM
+            
+        Returns:
+            Analyse structurée avec facts vérifiables
+        """
+        return _run_sync(self.agenerate_company_market_analysis(company_name, company_context, force_refresh))
+
+    def generate_company_market_analysis_bulk(
+        self,
+        companies: List[Tuple[str, str]],
+        force_refresh: bool = False,
+        max_concurrency: int = 8
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Génère les analyses de marché de plusieurs entreprises dans une seule boucle asyncio.
+        Les appels LLM se chevauchent : la durée totale tend vers celle de l'appel le plus long.
+
+        Args:
+            companies: Liste de tuples (company_name, company_context)
+            force_refresh: Force le recalcul même si en cache
+            max_concurrency: Nombre max d'appels LLM simultanés (limite les 429 du fournisseur)
+
+        Returns:
+            Dictionnaire {company_name: résultat} (même structure que generate_company_market_analysis)
+        """
+        async def _run_all():
+            semaphore = asyncio.Semaphore(max_concurrency)
+
+            async def _run_one(company_name, company_context):
+                async with semaphore:
+                    return await self.agenerate_company_market_analysis(company_name, company_context, force_refresh)
+
+            return await asyncio.gather(*(_run_one(n, c) for n, c in companies), return_exceptions=True)
+
+        _logger.info("🏢 [MARKET ANALYSIS] Analyse groupée de %s entreprises...", len(companies))
+        results = _run_sync(_run_all())
+        return {
+            name: {"success": False, "error": str(result), "facts": []} if isinstance(result, BaseException) else result
+            for (name, _), result in zip(companies, results)
+        }
+
+    def generate_bundled_market_analysis(self, company_name: str, country: str, year: str, company_context: str = "") -> Dict[str, Any]:
+        """
+        Analyse de marché centrée entreprise + market sizing contextuel pour une même entreprise.
+        Version synchrone de `agenerate_bundled_market_analysis`.
+        """
+        return _run_sync(self.agenerate_bundled_market_analysis(company_name, country, year, company_context))
+
+    async def agenerate_bundled_market_analysis(self, company_name: str, country: str, year: str, company_context: str = "") -> Dict[str, Any]:
+        """
+        Lance les deux générations en parallèle (asyncio.gather, même pool de connexions) :
+        latence totale ≈ max des deux appels au lieu de leur somme.
+        
+        Returns:
+            {"analysis": résultat de generate_company_market_analysis,
+             "sizing": résultat de generate_contextual_market_sizing}
+        """
+        analysis, sizing = await asyncio.gather(
+            self.agenerate_company_market_analysis(company_name, company_context),
+            self.agenerate_contextual_market_sizing(company_name, country, year, company_context)
+        )
+        return {
+            "analysis": analysis,
+            "sizing": sizing
+        }
+
+    async def agenerate_company_market_analysis(
+        self,
+        company_name: str,
+        company_context: str = "",
+        force_refresh: bool = False,
+        on_section: Optional[Callable[[str, Any], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Analyse de marché centrée entreprise (appel LLM non bloquant via `ainvoke`).
+        Mêmes arguments et même structure de retour que `generate_company_market_analysis`.
+        
+        Args:
+            on_section: Callback optionnel appelé avec (section, contenu) dès qu'une section
+                        racine du JSON (executive_summary, market_mapping...) est complète.
+                        La réponse est alors streamée (`astream`), sans passer par le cache SQLite.
+                        Un appel rattaché à une génération déjà en cours ne reçoit que le résultat final.
+        """
+        # Clé normalisée : "Doctolib " et "doctolib" partagent la même entrée
+        normalized = f"{self._company_key(company_name)}|{(company_context or '').strip()}"
+        cache_key = "ma_" + hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).hexdigest()
+        if not force_refresh and cache_key in self._cache and self._is_cache_valid(cache_key):
+            _logger.info("🏢 [MARKET ANALYSIS] Cache hit pour %s", company_name)
+            self._cache.move_to_end(cache_key)
+            return self._cache[cache_key]
+        
+        # Même analyse déjà en cours (appels concurrents) : attendre son résultat plutôt que relancer le LLM
+        loop = asyncio.get_running_loop()
+        pending = self._inflight.get(cache_key)
+        if not force_refresh and pending is not None and pending.get_loop() is loop:
+            _logger.info("🏢 [MARKET ANALYSIS] Analyse déjà en cours pour %s, en attente du résultat", company_name)
+            return await asyncio.shield(pending)
+        
+        future = loop.create_future()
+        self._inflight[cache_key] = future
+        try:
+            result = await self._generate_company_market_analysis(
+                company_name, company_context, cache_key, force_refresh, on_section
+            )
+        except BaseException:
+            future.cancel()
+            raise
+        finally:
+            if self._inflight.get(cache_key) is future:
+                del self._inflight[cache_key]
+        future.set_result(result)
+        return result
+    
+    async def _generate_company_market_analysis(
+        self,
+        company_name: str,
+        company_context: str,
+        cache_key: str,
+        force_refresh: bool,
+        on_section: Optional[Callable[[str, Any], None]]
+    ) -> Dict[str, Any]:
+        """Génère l'analyse (appel LLM, parsing, conversion en facts) et la met en cache."""
+        _logger.info("🏢 [MARKET ANALYSIS] Analyse centrée entreprise pour : %s", company_name)
+        
+        try:
+            # L2 persistant (SQLite) ignoré en cas de force_refresh ou de clear_cache(company) récent
+            chain = self._get_chain(_COMPANY_ANALYSIS_TEMPLATE, use_cache=self._use_l2(company_name, force_refresh), json_mode=True)
+            variables = {
+                "company_name": company_name,
+                "company_context": company_context or "Pas de contexte additionnel fourni."
+            }
+            if on_section is None:
+                response = await chain.ainvoke(variables)
+            else:
+                # Streaming : chaque section est publiée dès sa fermeture, sans attendre la fin
+                scanner = _JsonSectionScanner()
+                response = None
+                async for chunk in chain.astream(variables):
+                    response = chunk if response is None else response + chunk
+                    for section, content in scanner.feed(chunk.content):
+                        on_section(section, content)
+            
+            # Parsing du JSON (balises ```json retirées en une passe, orjson si disponible ;
+            # réparation ou relance unique si invalide)
+            analysis = await self._aparse_llm_json_or_retry(chain, variables, response, "company_context")
+            # Contrôle de forme avant conversion : erreur explicite plutôt qu'un crash dans le convertisseur
+            _validate_market_analysis(analysis)
+            
+            # Ajouter métadonnées
+            analysis["_meta"] = {
+                "company": company_name,
+                "generated_at": _now_iso(),
+                "model": "mistral-small",
+                "methodology": "KPMG Market Sizing v2.0"
+            }
+            
+            # Convertir en Facts pour le facts_manager
+            facts = self._convert_market_analysis_to_facts(analysis, company_name)
+            
+            _logger.info("✅ [MARKET ANALYSIS] Analyse générée : %s facts extraits", len(facts))
+            
+            result = {
+                "company": company_name,
+                "analysis": analysis,
+                "facts": facts,
+                "success": True
+            }
+            self._cache_put(company_name, cache_key, result)
+            return result
+            
+        except json.JSONDecodeError as e:
+            _logger.error("❌ [MARKET ANALYSIS] Erreur parsing JSON: %s", e)
+            return {"success": False, "error": f"Parsing error: {e}", "facts": []}
+        except _SchemaError as e:
+            _logger.error("❌ [MARKET ANALYSIS] Réponse hors schéma: %s", e)
+            return {"success": False, "error": f"Schema error: {e}", "facts": []}
+        except Exception as e:
+            _logger.error("❌ [MARKET ANALYSIS] Erreur: %s", e, exc_info=_DEBUG)
+            return {"success": False, "error": str(e), "facts": []}
+    
+    def _convert_market_analysis_to_facts(self, analysis: Dict, company: str) -> List[Dict]:
+        """Convertit l'analyse en facts structurés pour le facts_manager."""
+        ts = time.time_ns() // 1_000_000_000
+        
+        # 1. Facts de sizing (périmètre commun aux trois métriques, lu une seule fois)
+        mapping = analysis.get("market_mapping", {})
+        sizing = mapping.get("market_size", {})
+        sizing_notes = f"Marché: {mapping.get('market_name', company)}, Périmètre: {mapping.get('perimeter', {}).get('geography', 'N/A')}"
+        sizing_facts = (
+            Fact(
+                id=f"ma_{company}_{metric}_{ts}",
+                category="market_estimation",
+                key=fact_key,
+                value=data["value"],
+                unit=data.get("unit", "EUR"),
+                source=data.get("source", "Analyse IA"),
+                source_type="Secondaire",
+                confidence=data.get("confidence", "medium"),
+                notes=sizing_notes
+            )
+            for metric, fact_key in (("tam", "tam_global_market"), ("sam", "sam_percent"), ("som", "som_share"))
+            if (data := sizing.get(metric, {})) and data.get("value")
+        )
+        
+        # 2. Facts des hypothèses
+        methodology = analysis.get("methodology", {})
+        used_facts = (
+            Fact(
+                id=fact_data.get("fact_id", f"fact_{ts}"),
+                category="market_estimation",
+                key=_slug(fact_data.get("description", "")),
+                value=fact_data["value"],
+                unit=fact_data.get("unit", "EUR"),
+                source=fact_data.get("source", "Analyse"),
+                source_type=_source_type_label(fact_data.get("source_type", "secondaire")),
+                confidence=fact_data.get("confidence", "medium"),
+                notes=f"Date: {fact_data.get('date', 'N/A')}"
+            )
+            for fact_data in methodology.get("facts_used", [])
+            if fact_data.get("value")
+        )
+        
+        # 3. Hypothèses comme facts qualifiés
+        hypothesis_facts = (
+            Fact(
+                id=assumption.get("assumption_id", f"hyp_{ts}"),
+                category="hypothesis",
+                key=_slug(assumption.get("description", "")[:50]),
+                value=assumption.get("description", ""),
+                unit="N/A",
+                source="Hypothèse Analyste",
+                source_type="Hypothèse",
+                confidence="low",
+                notes=f"Justification: {assumption.get('justification', 'N/A')}. Impact si faux: {assumption.get('impact_if_wrong', 'N/A')}"
+            )
+            for assumption in methodology.get("assumptions", [])
+        )
+        
+        # Générateurs enchaînés en une seule passe ; conversion en dicts uniquement à la sortie
+        return [fact.as_dict() for fact in itertools.chain(sizing_facts, used_facts, hypothesis_facts)]
+
+    def generate_sectoral_market_sizing(self, market_description: str, country: str, year: str, additional_context: str = "") -> Dict[str, Any]:
+        """
+        MÉTHODE DE MARKET SIZING SECTORIEL - Sans entreprise cible
+        
+        Contrairement à generate_contextual_market_sizing qui calcule le potentiel captif
+        par une entreprise spécifique (SOM), cette méthode estime la TAILLE TOTALE du marché
+        (TAM/SAM) de manière agnostique.
+        
+        Méthodologie :
+        1. Définition du périmètre sectoriel
+        2. Estimation multi-méthodes (Top-Down, Bottom-Up, Supply-Led)
+        3. Triangulation des résultats
+        4. Structure du marché (segments, acteurs types)
+        
+        Args:
+            market_description: Description du marché (ex: "Téléconsultation médicale")
+            country: Pays / zone géographique
+            year: Année de référence
+            additional_context: Contexte additionnel (régulation, périmètre, etc.)
+            
+        Returns:
+            Analyse structurée avec estimation TAM/SAM sectorielle
+        """
+        _logger.info("📊 [SECTORAL SIZING] Marché: %s | Pays: %s | Année: %s", market_description, country, year)
+        
+        try:
+            chain = self._get_chain(_SECTORAL_SIZING_TEMPLATE)
+            response = chain.invoke({
+                "market_description": market_description,
+                "country": country,
+                "year": year,
+                "additional_context": additional_context or "Pas de contexte additionnel fourni."
+            })
+            
+            # Parsing du JSON
+            analysis = self._parse_llm_json(response)
+            
+            # Ajouter métadonnées
+            analysis["_meta"] = {
+                "mode": "sectoral",
+                "market": market_description,
+                "country": country,
+                "year": year,
+                "generated_at": _now_iso(),
+                "model": "mistral-small",
+                "methodology": "KPMG Sectoral Market Sizing v1.0"
+            }
+            
+            # ═════════════════════════════════════════════
+            # VALIDATION DE QUALITÉ (même que mode contextuel)
+            # ═════════════════════════════════════════════
+            facts_used = analysis.get("facts_used", [])
+            source_quality = self._validate_source_quality(facts_used)
+            
+            if "source_quality_audit" not in analysis:
+                analysis["source_quality_audit"] = {}
+            analysis["source_quality_audit"].update(source_quality)
+    
+            _logger.info("📊 [SOURCE QUALITY] Score: %s/100", source_quality['quality_score'])
+            if source_quality['critical_gaps']:
+                _logger.warning("⚠️ [SOURCE QUALITY] Gaps critiques: %s", len(source_quality['critical_gaps']))
+            
+            # Auto-downgrade confiance si gaps
+            if not source_quality['is_valid']:
+                reliability = analysis.get("reliability", {})
+                current_conf = reliability.get("overall_confidence", "MEDIUM").upper()
+                
+                if current_conf == "HIGH":
+                    reliability["overall_confidence"] = "MEDIUM"
+                    reliability["confidence_justification"] = f"[AUTO-DÉGRADÉE] Gaps sources. " + reliability.get("confidence_justification", "")
+                    _logger.warning("⚠️ [AUTO-DOWNGRADE] HIGH → MEDIUM")
+                elif current_conf == "MEDIUM":
+                    reliability["overall_confidence"] = "LOW"
+                    reliability["confidence_justification"] = f"[AUTO-DÉGRADÉE] Gaps sources. " + reliability.get("confidence_justification", "")
+                    _logger.warning("⚠️ [AUTO-DOWNGRADE] MEDIUM → LOW")
+                
+                analysis["reliability"] = reliability
+            
+            # Détection marché régulé
+            market_name = analysis.get("market_definition", {}).get("market_name", market_description)
+            regulatory_detection = self._detect_regulatory_context(market_name)
+            
+            if regulatory_detection['is_regulated']:
+                _logger.info("🏛️ [REGULATORY] Marché régulé: %s", regulatory_detection['sector'])
+                
+                regulatory_impact = analysis.get("regulatory_impact", {})
+                if not regulatory_impact or not regulatory_impact.get("key_mechanisms"):
+                    _logger.warning("⚠️ [REGULATORY] Impact réglementaire non documenté!")
+                    reliability = analysis.get("reliability", {})
+                    uncertainties = reliability.get("key_uncertainties", [])
+                    uncertainties.append(f"Impact réglementaire non documenté ({regulatory_detection['sector']})")
+                    reliability["key_uncertainties"] = uncertainties
+                    analysis["reliability"] = reliability
+            
+            #
+
+            facts = self._convert_sectoral_sizing_to_facts(analysis, market_description, country, year)
+            
+            _logger.info("✅ [SECTORAL SIZING] Analyse générée : %s facts extraits", len(facts))
+            
+            return {
+                "analysis": analysis,
+                "facts": facts,
+                "success": True
+            }
+            
+        except json.JSONDecodeError as e:
+            _logger.error("❌ [SECTORAL SIZING] Erreur parsing JSON: %s", e)
+            return {"success": False, "error": f"Parsing error: {e}", "facts": []}
+        except Exception as e:
+            _logger.error("❌ [SECTORAL SIZING] Erreur: %s", e, exc_info=_DEBUG)
+            return {"success": False, "error": str(e), "facts": []}
+    
+    def _convert_sectoral_sizing_to_facts(self, analysis: Dict, market: str, country: str, year: str) -> List[Dict]:
+        """Convertit l'analyse sectorielle en facts structurés."""
+        facts = []
+        ts = time.time_ns() // 1_000_000_000
+        
+        # 1. Estimation finale (TAM)
+        calc = analysis.get("calculation", {})
+        final = calc.get("final_estimate", {})
+        if final.get("value"):
+            facts.append({
+                "id": f"sec_{country}_{year}_tam_{ts}",
+                "category": "market_estimation",
+                "key": f"tam_{country.lower()}_{year}",
+                "value": final["value"],
+                "unit": final.get("unit", "EUR"),
+                "source": "Triangulation Multi-Méthodes KPMG",
+                "source_type": "Synthèse",
+                "confidence": analysis.get("reliability", {}).get("overall_confidence", "medium").lower(),
+                "notes": f"Marché: {market}, Fourchette: {final.get('range_low', 'N/A')} - {final.get('range_high', 'N/A')} {final.get('unit', 'EUR')}"
+            })
+        
+        # 2. Résultats par méthode
+        methods = analysis.get("estimation_methods", {})
+        for method_name, method_data in methods.items():
+            if method_data.get("result"):
+                facts.append({
+                    "id": f"sec_{method_name}_{ts}",
+                    "category": "market_estimation",
+                    "key": f"tam_{method_name}_{country.lower()}",
+                    "value": method_data["result"],
+                    "unit": "EUR",
+                    "source": method_data.get("methodology", method_name),
+                    "source_type": "Calcul",
+                    "confidence": method_data.get("confidence", "medium"),
+                    "notes": f"Méthode: {method_name}"
+                })
+        
+        # 3. Facts utilisés
+        for fact_data in analysis.get("facts_used", []):
+            if fact_data.get("value"):
+                facts.append({
+                    "id": fact_data.get("fact_id", f"fact_sec_{ts}"),
+                    "category": "market_estimation",
+                    "key": fact_data.get("key", "unknown"),
+                    "value": fact_data["value"],
+                    "unit": fact_data.get("unit", "EUR"),
+                    "source": fact_data.get("source", "Analyse"),
+                    "source_type": _source_type_label(fact_data.get("source_type", "secondaire")),
+                    "confidence": fact_data.get("confidence", "medium"),
+                    "notes": fact_data.get("notes", "")
+                })
+        
+        return facts
+
+    def generate_contextual_market_sizing(self, company_name: str, country: str, year: str, additional_context: str = "", force_refresh: bool = False) -> Dict[str, Any]:
+        """
+        Version synchrone de `agenerate_contextual_market_sizing`.
+        
+        MÉTHODE DE MARKET SIZING CONTEXTUEL - Bottom-Up Local
+        
+        Méthodologie rigoureuse de sizing basée sur :
+        1. Verrouillage du contexte (entreprise + pays + année)
+        2. Définition du marché spécifique à l'entreprise
+        3. Utilisation stricte de la base de facts centralisée
+        4. Reconstruction bottom-up locale
+        5. Calcul explicite et transparent
+        6. Comparaison et validation contextuelle
+        7. Évaluation de fiabilité
+        
+        Args:
+            company_name: Nom de l'entreprise cible
+            country: Pays / zone géographique
+            year: Année de référence
+            additional_context: Contexte additionnel (offres, modèle éco, etc.)
+            force_refresh: Si True, ignore les caches (mémoire et SQLite) et relance le LLM
+            
+        Returns:
+            Analyse structurée avec estimation bottom-up locale
+        """
+        return _run_sync(self.agenerate_contextual_market_sizing(company_name, country, year, additional_context, force_refresh))
 
-Réponds UNIQUEMENT avec du JSON valide, aucun texte autour.
-""")
+    async def agenerate_contextual_market_sizing(self, company_name: str, country: str, year: str, additional_context: str = "", force_refresh: bool = False) -> Dict[str, Any]:
+        """
+        Market sizing contextuel (appel LLM non bloquant via `ainvoke`).
+        Mêmes arguments et même structure de retour que `generate_contextual_market_sizing`.
+        """
+        cache_key = self._input_cache_key("cs_", company_name, country, year, additional_context or "")
+        if not force_refresh and (cached := self._cache_get(cache_key)) is not None:
+            _logger.info("📊 [CONTEXTUAL SIZING] Cache hit pour %s (%s, %s)", company_name, country, year)
+            return cached
+        
+        _logger.info("📊 [CONTEXTUAL SIZING] Entreprise: %s | Pays: %s | Année: %s", company_name, country, year)
         
         try:
-            llm = self._get_llm()
-            chain = prompt | llm
-            response = chain.invoke({
+            chain = self._get_chain(_CONTEXTUAL_SIZING_TEMPLATE, use_cache=self._use_l2(company_name, force_refresh), json_mode=True)
+            variables = {
                 "company_name": company_name,
                 "country": country,
                 "year": year,
                 "additional_context": additional_context or "Pas de contexte additionnel fourni."
-            })
-            
-            # Parsing du JSON
-            content = response.content.strip()
-            if content.startswith("```json"):
-                content = content.replace("```json", "").replace("```", "")
-            if content.startswith("```"):
-                content = content.replace("```", "")
+            }
+            response = await chain.ainvoke(variables)
             
-            analysis = json.loads(content)
+            # Parsing du JSON (balises ```json retirées en une passe, orjson si disponible ;
+            # réparation ou relance unique si invalide)
+            analysis = await self._aparse_llm_json_or_retry(chain, variables, response, "additional_context")
+            _validate_contextual_sizing(analysis)
             
             # Ajouter métadonnées
             analysis["_meta"] = {
                 "company": company_name,
                 "country": country,
                 "year": year,
-                "generated_at": datetime.now().isoformat(),
+                "generated_at": _now_iso(),
                 "model": "mistral-small",
                 "methodology": "KPMG Contextual Market Sizing v1.0"
             }
             
+            # Contexte verrouillé renseigné depuis les entrées (le schéma ne les fait plus recopier au modèle)
+            context_lock = analysis.setdefault("context_lock", {})
+            context_lock.update({"company": company_name, "country": country, "year": year})
+            
             # ═════════════════════════════════════════════
             # PHASE 1: VALIDATION DE QUALITÉ DES SOURCES
             # ═════════════════════════════════════════════
@@ -2137,11 +3201,11 @@ Réponds UNIQUEMENT avec du JSON valide, aucun texte autour.
             analysis["source_quality_audit"].update(source_quality)
             
             # Logging de qualité
-            print(f"📊 [SOURCE QUALITY] Score: {source_quality['quality_score']}/100")
+            _logger.info("📊 [SOURCE QUALITY] Score: %s/100", source_quality['quality_score'])
             if source_quality['critical_gaps']:
-                print(f"⚠️ [SOURCE QUALITY] Gaps critiques détectés: {len(source_quality['critical_gaps'])}")
+                _logger.warning("⚠️ [SOURCE QUALITY] Gaps critiques détectés: %s", len(source_quality['critical_gaps']))
                 for gap in source_quality['critical_gaps']:
-                    print(f"   - {gap}")
+                    _logger.warning("   - %s", gap)
             
             # Dégrader automatiquement la confiance si gaps critiques
             if not source_quality['is_valid']:
@@ -2151,11 +3215,11 @@ Réponds UNIQUEMENT avec du JSON valide, aucun texte autour.
                 if current_confidence == "HIGH":
                     reliability["overall_confidence"] = "MEDIUM"
                     reliability["confidence_justification"] = f"[AUTO-DÉGRADÉE HIGH→MEDIUM] Gaps critiques de sources détectés. " + reliability.get("confidence_justification", "")
-                    print(f"⚠️ [AUTO-DOWNGRADE] Confiance abaissée: HIGH → MEDIUM (gaps de sources)")
+                    _logger.warning("⚠️ [AUTO-DOWNGRADE] Confiance abaissée: HIGH → MEDIUM (gaps de sources)")
                 elif current_confidence == "MEDIUM":
                     reliability["overall_confidence"] = "LOW"
                     reliability["confidence_justification"] = f"[AUTO-DÉGRADÉE MEDIUM→LOW] Gaps critiques de sources détectés. " + reliability.get("confidence_justification", "")
-                    print(f"⚠️ [AUTO-DOWNGRADE] Confiance abaissée: MEDIUM → LOW (gaps de sources)")
+                    _logger.warning("⚠️ [AUTO-DOWNGRADE] Confiance abaissée: MEDIUM → LOW (gaps de sources)")
                 
                 analysis["reliability"] = reliability
             
@@ -2168,12 +3232,12 @@ Réponds UNIQUEMENT avec du JSON valide, aucun texte autour.
             regulatory_detection = self._detect_regulatory_context(market_name)
             
             if regulatory_detection['is_regulated']:
-                print(f"🏛️ [REGULATORY] Marché régulé détecté: {regulatory_detection['sector']}")
+                _logger.info("🏛️ [REGULATORY] Marché régulé détecté: %s", regulatory_detection['sector'])
                 
                 # Vérifier si regulatory_impact est documenté
                 regulatory_impact = analysis.get("regulatory_impact", {})
                 if not regulatory_impact or not regulatory_impact.get("key_regulations"):
-                    print(f"⚠️ [REGULATORY] Impact réglementaire non documenté pour marché régulé!")
+                    _logger.warning("⚠️ [REGULATORY] Impact réglementaire non documenté pour marché régulé!")
                     
                     # Ajouter warning dans reliability
                     reliability = analysis.get("reliability", {})
@@ -2183,7 +3247,7 @@ Réponds UNIQUEMENT avec du JSON valide, aucun texte autour.
                     
                     # Dégrader confiance si pas déjà LOW
                     if reliability.get("overall_confidence", "").upper() not in ["LOW"]:
-                        print(f"⚠️ [AUTO-DOWNGRADE] Confiance abaissée (marché régulé sans doc)")
+                        _logger.warning("⚠️ [AUTO-DOWNGRADE] Confiance abaissée (marché régulé sans doc)")
                     
                     analysis["reliability"] = reliability
             
@@ -2191,94 +3255,103 @@ Réponds UNIQUEMENT avec du JSON valide, aucun texte autour.
 
             facts = self._convert_contextual_sizing_to_facts(analysis, company_name, country, year)
             
-            print(f"✅ [CONTEXTUAL SIZING] Analyse générée : {len(facts)} facts extraits")
+            _logger.info("✅ [CONTEXTUAL SIZING] Analyse générée : %s facts extraits", len(facts))
             
-            return {
+            result = {
+                "company": company_name,
                 "analysis": analysis,
                 "facts": facts,
                 "success": True
             }
+            self._cache_put(company_name, cache_key, result)
+            return result
             
         except json.JSONDecodeError as e:
-            print(f"❌ [CONTEXTUAL SIZING] Erreur parsing JSON: {e}")
+            _logger.error("❌ [CONTEXTUAL SIZING] Erreur parsing JSON: %s", e)
             return {"success": False, "error": f"Parsing error: {e}", "facts": []}
+        except _SchemaError as e:
+            _logger.error("❌ [CONTEXTUAL SIZING] Réponse hors schéma: %s", e)
+            return {"success": False, "error": f"Schema error: {e}", "facts": []}
         except Exception as e:
-            print(f"❌ [CONTEXTUAL SIZING] Erreur: {e}")
-            import traceback
-            traceback.print_exc()
+            _logger.error("❌ [CONTEXTUAL SIZING] Erreur: %s", e, exc_info=_DEBUG)
             return {"success": False, "error": str(e), "facts": []}
     
     def _convert_contextual_sizing_to_facts(self, analysis: Dict, company: str, country: str, year: str) -> List[Dict]:
         """Convertit l'analyse contextuelle en facts structurés."""
         facts = []
-        ts = int(datetime.now().timestamp())
+        ts = time.time_ns() // 1_000_000_000
+        country_slug = country.lower()
         
-        # 1. Estimation finale
+        # 1. Estimation finale (lecture défensive : sans fastjsonschema, la validation est inactive)
         calc = analysis.get("calculation", {})
         final = calc.get("final_estimate", {})
         if final.get("value"):
-            facts.append({
-                "id": f"ctx_{company}_{country}_{year}_final_{ts}",
-                "category": "market_estimation",
-                "key": f"market_size_{country.lower()}_{year}",
-                "value": final["value"],
-                "unit": final.get("unit", "EUR"),
-                "source": f"Analyse Bottom-Up KPMG ({country})",
-                "source_type": "Primaire",
-                "confidence": analysis.get("reliability", {}).get("overall_confidence", "medium").lower(),
-                "notes": f"Entreprise: {company}, Fourchette: {final.get('range_low', 'N/A')} - {final.get('range_high', 'N/A')} {final.get('unit', 'EUR')}"
-            })
+            facts.append(Fact(
+                id=f"ctx_{company}_{country}_{year}_final_{ts}",
+                category="market_estimation",
+                key=f"market_size_{country_slug}_{year}",
+                value=final["value"],
+                unit=final.get("unit", "EUR"),
+                source=f"Analyse Bottom-Up KPMG ({country})",
+                source_type="Primaire",
+                confidence=analysis.get("reliability", {}).get("overall_confidence", "medium").lower(),
+                notes=f"Entreprise: {company}, Fourchette: {final.get('range_low', 'N/A')} - {final.get('range_high', 'N/A')} {final.get('unit', 'EUR')}"
+            ))
         
         # 2. Facts utilisés dans l'analyse
-        for fact_data in analysis.get("facts_used", []):
-            if fact_data.get("value"):
-                facts.append({
-                    "id": fact_data.get("fact_id", f"fact_ctx_{ts}"),
-                    "category": "market_estimation",
-                    "key": fact_data.get("description", "").replace(" ", "_").lower()[:50],
-                    "value": fact_data["value"],
-                    "unit": fact_data.get("unit", "EUR"),
-                    "source": fact_data.get("source", "Analyse"),
-                    "source_type": fact_data.get("source_type", "secondaire").capitalize(),
-                    "confidence": "high" if fact_data.get("source_type") == "primaire" else "medium",
-                    "notes": f"Pays: {fact_data.get('country', country)}, Date: {fact_data.get('date', year)}"
-                })
+        facts += [
+            Fact(
+                id=fact_data.get("fact_id", f"fact_ctx_{ts}"),
+                category="market_estimation",
+                key=_slug(fact_data.get("description", "")),
+                value=value,
+                unit=fact_data.get("unit", "EUR"),
+                source=fact_data.get("source", "Analyse"),
+                source_type=_source_type_label(fact_data.get("source_type", "secondaire")),
+                confidence="high" if fact_data.get("source_type") == "primaire" else "medium",
+                notes=f"Pays: {fact_data.get('country', country)}, Date: {fact_data.get('date', year)}"
+            )
+            for fact_data in analysis.get("facts_used") or ()
+            if (value := fact_data.get("value"))
+        ]
         
         # 3. Bottom-up data points
         bu = analysis.get("bottom_up_reconstruction", {})
         addr_pop = bu.get("addressable_population", {})
         if addr_pop.get("final_addressable_units"):
-            facts.append({
-                "id": f"ctx_{company}_{country}_units_{ts}",
-                "category": "market_estimation",
-                "key": f"addressable_units_{country.lower()}",
-                "value": addr_pop["final_addressable_units"],
-                "unit": "unités",
-                "source": addr_pop.get("total_units_source", "Analyse"),
-                "source_type": "Secondaire",
-                "confidence": "medium",
-                "notes": f"Total avant filtres: {addr_pop.get('total_units_in_country', 'N/A')}"
-            })
+            facts.append(Fact(
+                id=f"ctx_{company}_{country}_units_{ts}",
+                category="market_estimation",
+                key=f"addressable_units_{country_slug}",
+                value=addr_pop["final_addressable_units"],
+                unit="unités",
+                source=addr_pop.get("total_units_source", "Analyse"),
+                source_type="Secondaire",
+                confidence="medium",
+                notes=f"Total avant filtres: {addr_pop.get('total_units_in_country', 'N/A')}"
+            ))
         
         # 4. Prix unitaire local
         unit_val = bu.get("local_unit_value", {})
         if unit_val.get("annual_price_local"):
-            facts.append({
-                "id": f"ctx_{company}_{country}_price_{ts}",
-                "category": "market_estimation",
-                "key": f"unit_price_{country.lower()}",
-                "value": unit_val["annual_price_local"],
-                "unit": unit_val.get("currency", "EUR"),
-                "source": unit_val.get("price_source", "Estimation"),
-                "source_type": "Secondaire",
-                "confidence": "medium",
-                "notes": f"Ajustement: {unit_val.get('adjustment_rationale', 'N/A')}"
-            })
-        
-        return facts
-
-    def generate_market_segmentation(self, company_name: str, offerings: str, country: str, year: str, market_sizing_context: str = "") -> Dict[str, Any]:
+            facts.append(Fact(
+                id=f"ctx_{company}_{country}_price_{ts}",
+                category="market_estimation",
+                key=f"unit_price_{country_slug}",
+                value=unit_val["annual_price_local"],
+                unit=unit_val.get("currency", "EUR"),
+                source=unit_val.get("price_source", "Estimation"),
+                source_type="Secondaire",
+                confidence="medium",
+                notes=f"Ajustement: {unit_val.get('adjustment_rationale', 'N/A')}"
+            ))
+        
+        return [fact.as_dict() for fact in facts]
+
+    def generate_market_segmentation(self, company_name: str, offerings: str, country: str, year: str, market_sizing_context: str = "", force_refresh: bool = False) -> Dict[str, Any]:
         """
+        Version synchrone de `agenerate_market_segmentation`.
+        
         SEGMENTATION DES ENTREPRISES CONCURRENTES
         
         Méthodologie : Segmenter les entreprises qui captent la valeur du marché,
@@ -2293,221 +3366,75 @@ Réponds UNIQUEMENT avec du JSON valide, aucun texte autour.
             country: Pays / zone géographique
             year: Année de référence
             market_sizing_context: Résultats du Market Sizing (définition, unités, segments demande, ordres de grandeur)
+            force_refresh: Si True, ignore les caches (mémoire et SQLite) et relance le LLM
             
         Returns:
             Segmentation des entreprises concurrentes avec lien au sizing
         """
-        print(f"🎯 [COMPANY SEGMENTATION] Entreprise: {company_name} | Offres: {offerings} | Pays: {country}")
+        return _run_sync(self.agenerate_market_segmentation(company_name, offerings, country, year, market_sizing_context, force_refresh))
+
+    async def agenerate_market_segmentation(
+        self,
+        company_name: str,
+        offerings: str,
+        country: str,
+        year: str,
+        market_sizing_context: str = "",
+        force_refresh: bool = False,
+        on_section: Optional[Callable[[str, Any], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Segmentation des entreprises concurrentes (appel LLM non bloquant via `ainvoke`).
+        Mêmes arguments et même structure de retour que `generate_market_segmentation`.
         
-        prompt = ChatPromptTemplate.from_template("""
-Tu es un assistant d'analyse stratégique senior utilisé par un cabinet de conseil.
-Ta mission est de segmenter un marché par TYPES D'ENTREPRISES CONCURRENTES,
-en t'appuyant explicitement sur les résultats du module d'estimation de taille de marché.
-
-⚠️ ATTENTION : Tu ne segmentes PAS les clients. Tu segmentes les ENTREPRISES qui captent la valeur du marché.
-
-═══════════════════════════════════════════════════════════════
-📌 CONTEXTE
-═══════════════════════════════════════════════════════════════
-Entreprise de référence : {company_name}
-Offre / périmètre : {offerings}
-Pays / Zone : {country}
-Année : {year}
-
-📊 RÉSULTATS DU MARKET SIZING (à utiliser obligatoirement) :
-{market_sizing_context}
-═══════════════════════════════════════════════════════════════
-
-🔒 PRINCIPE FONDAMENTAL :
-Segmenter les entreprises selon la manière dont elles CAPTURENT LA VALEUR, pas selon leur branding.
-Chaque segment = un sous-espace économique du market sizing + logique de revenus distincte + poids économique différenciable.
-
-📋 FORMAT DE SORTIE JSON STRICT :
-{{
-    "context_lock": {{
-        "reference_company": "{company_name}",
-        "offering_scope": "{offerings}",
-        "country": "{country}",
-        "year": "{year}",
-        "market_sizing_available": true,
-        "market_sizing_summary": "Résumé du sizing utilisé",
-        "total_market_value": 500000000,
-        "market_unit": "EUR",
-        "missing_sizing_elements": []
-    }},
-    
-    "segmentation_logic": {{
-        "primary_axis": {{
-            "axis_name": "Axe principal de segmentation",
-            "axis_type": "economic_unit|monetization|value_level|functional_scope|integration_degree",
-            "justification": "Pourquoi cet axe est structurant économiquement",
-            "link_to_sizing": "Comment cet axe se traduit en différences de taille de marché"
-        }},
-        "secondary_axes": [
-            {{
-                "axis_name": "Axe secondaire",
-                "axis_type": "type",
-                "relevance": "Pertinence pour différencier les entreprises"
-            }}
-        ],
-        "rejected_axes": [
-            {{
-                "axis_name": "Axe rejeté",
-                "reason": "Pourquoi cet axe n'est pas économiquement justifié"
-            }}
-        ]
-    }},
-    
-    "company_segments": [
-        {{
-            "segment_id": "SEG_01",
-            "segment_name": "Nom du type d'entreprise",
-            "description": "Description du type d'entreprise",
-            "value_creation_logic": "Comment ces entreprises créent de la valeur",
-            "target_economic_unit": "par médecin|par établissement|par acte|par patient|etc.",
-            "revenue_model": "abonnement|commission|usage|licence|freemium",
-            "pricing_position": "low_arpu_volume|mid_market|premium",
-            "functional_scope": "pure_play|plateforme_elargie|solution_integree",
-            "integration_degree": "standalone|suite|infrastructure",
-            "market_share_captured": {{
-                "value": 150000000,
-                "unit": "EUR",
-                "percentage_of_total": 30,
-                "source": "Lien avec hypothèse du sizing",
-                "confidence": "HIGH|MEDIUM|LOW"
-            }},
-            "representative_players": ["Acteur 1", "Acteur 2", "Acteur 3"],
-            "entry_barriers": ["Barrière 1", "Barrière 2"],
-            "growth_dynamics": "Description de la dynamique (croissance, maturité, déclin)",
-            "why_structurally_different": "Pourquoi ces entreprises sont économiquement différentes des autres"
-        }}
-    ],
-    
-    "reference_company_positioning": {{
-        "current_segments": [
-            {{
-                "segment_id": "SEG_01",
-                "presence_level": "dominant|challenger|niche|absent",
-                "estimated_share_in_segment": 25,
-                "strategic_importance": "core|adjacent|peripheral"
-            }}
-        ],
-        "core_market_segments": ["SEG_01", "SEG_02"],
-        "credible_adjacent_segments": [
-            {{
-                "segment_id": "SEG_03",
-                "expansion_feasibility": "HIGH|MEDIUM|LOW",
-                "strategic_rationale": "Pourquoi ce segment est adjacent crédible"
-            }}
-        ],
-        "out_of_scope_segments": [
-            {{
-                "segment_id": "SEG_04",
-                "reason": "Pourquoi hors scope réaliste"
-            }}
-        ]
-    }},
-    
-    "market_value_distribution": {{
-        "segments_by_value": [
-            {{
-                "segment_id": "SEG_01",
-                "value_captured": 150000000,
-                "percentage": 30,
-                "trend": "growing|stable|declining"
-            }}
-        ],
-        "concentration_analysis": "Analyse de la concentration du marché",
-        "value_migration_trends": "Vers où migre la valeur du marché"
-    }},
-    
-    "visualizations": {{
-        "market_map": {{
-            "type": "bubble_chart",
-            "x_axis": "Degré d'intégration",
-            "y_axis": "Valeur captée",
-            "bubble_size": "Nombre d'acteurs",
-            "data": [
-                {{"segment": "SEG_01", "x": 2, "y": 4, "size": 15}}
-            ]
-        }},
-        "value_chain": {{
-            "stages": ["Acquisition", "Activation", "Rétention", "Expansion"],
-            "segment_focus": {{"SEG_01": "Acquisition", "SEG_02": "Rétention"}}
-        }},
-        "market_share_pie": {{
-            "segments": ["SEG_01", "SEG_02", "SEG_03"],
-            "values": [30, 25, 20]
-        }}
-    }},
-    
-    "reliability": {{
-        "overall_confidence": "HIGH|MEDIUM|LOW",
-        "confidence_justification": "Justification",
-        "sizing_granularity": "HIGH|MEDIUM|LOW",
-        "hypothesis_traceability": "HIGH|MEDIUM|LOW",
-        "segment_boundary_clarity": "HIGH|MEDIUM|LOW",
-        "local_competitive_coherence": "HIGH|MEDIUM|LOW",
-        "key_limitations": ["Limitation 1", "Limitation 2"]
-    }},
-    
-    "facts_and_hypotheses": {{
-        "sizing_facts_used": [
-            {{
-                "fact_id": "SIZING_001",
-                "description": "Fait du sizing utilisé",
-                "value": "Valeur",
-                "source": "Source",
-                "used_for_segment": "SEG_01"
-            }}
-        ],
-        "new_hypotheses": [
-            {{
-                "hypothesis_id": "HYP_SEG_001",
-                "description": "Hypothèse formulée pour la segmentation",
-                "justification": "Pourquoi raisonnable",
-                "impact_if_wrong": "Conséquence"
-            }}
-        ]
-    }}
-}}
-
-🚨 RÈGLES STRICTES :
-1. Chaque segment = entreprises qui captent la valeur de la MÊME façon
-2. Si deux types d'entreprises captent la même valeur de la même façon → les REGROUPER
-3. 4 à 8 segments maximum, mutuellement exclusifs
-4. INTERDICTION de segments non quantifiables si le sizing permet la quantification
-5. Pour chaque segment : "Pourquoi ces entreprises sont-elles STRUCTURELLEMENT DIFFÉRENTES économiquement ?"
-
-Réponds UNIQUEMENT avec du JSON valide, aucun texte autour.
-""")
+        Args:
+            on_section: Callback optionnel appelé avec (section, contenu) dès qu'une section
+                        racine du JSON (company_segments, reference_company_positioning...) est complète.
+                        La réponse est alors streamée (`astream`), sans passer par le cache SQLite.
+        """
+        cache_key = self._input_cache_key("seg_", company_name, offerings, country, year, market_sizing_context or "")
+        if not force_refresh and (cached := self._cache_get(cache_key)) is not None:
+            _logger.info("🎯 [COMPANY SEGMENTATION] Cache hit pour %s (%s, %s)", company_name, country, year)
+            return cached
+        
+        _logger.info("🎯 [COMPANY SEGMENTATION] Entreprise: %s | Offres: %s | Pays: %s", company_name, offerings, country)
         
         try:
-            llm = self._get_llm()
-            chain = prompt | llm
-            response = chain.invoke({
+            chain = self._get_chain(_COMPANY_SEGMENTATION_TEMPLATE, use_cache=self._use_l2(company_name, force_refresh))
+            variables = {
                 "company_name": company_name,
                 "offerings": offerings,
                 "country": country,
                 "year": year,
                 "market_sizing_context": market_sizing_context or "Market sizing non fourni - utiliser estimations génériques du secteur."
+            }
+            if on_section is None:
+                response = await chain.ainvoke(variables)
+            else:
+                # Streaming : les segments sont publiés dès la fermeture de leur section,
+                # pendant que le modèle génère encore le positionnement et les visualisations
+                scanner = _JsonSectionScanner()
+                response = None
+                async for chunk in chain.astream(variables):
+                    response = chunk if response is None else response + chunk
+                    for section, content in scanner.feed(chunk.content):
+                        on_section(section, content)
+            
+            # Parsing du JSON (orjson si disponible)
+            analysis = self._parse_llm_json(response)
+            analysis.setdefault("context_lock", {}).update({
+                "reference_company": company_name,
+                "offering_scope": offerings,
+                "country": country,
+                "year": year
             })
             
-            # Parsing du JSON
-            content = response.content.strip()
-            if content.startswith("```json"):
-                content = content.replace("```json", "").replace("```", "")
-            if content.startswith("```"):
-                content = content.replace("```", "")
-            
-            analysis = json.loads(content)
-            
             # Ajouter métadonnées
             analysis["_meta"] = {
                 "company": company_name,
                 "country": country,
                 "year": year,
-                "generated_at": datetime.now().isoformat(),
+                "generated_at": _now_iso(),
                 "model": "mistral-small",
                 "methodology": "KPMG Company Segmentation v1.0"
             }
@@ -2515,62 +3442,64 @@ Réponds UNIQUEMENT avec du JSON valide, aucun texte autour.
             # Convertir en Facts
             facts = self._convert_company_segmentation_to_facts(analysis, company_name, country, year)
             
-            print(f"✅ [COMPANY SEGMENTATION] Analyse générée : {len(analysis.get('company_segments', []))} segments")
+            _logger.info("✅ [COMPANY SEGMENTATION] Analyse générée : %s segments", len(analysis.get('company_segments', [])))
             
-            return {
+            result = {
+                "company": company_name,
                 "analysis": analysis,
                 "facts": facts,
                 "success": True
             }
+            self._cache_put(company_name, cache_key, result)
+            return result
             
         except json.JSONDecodeError as e:
-            print(f"❌ [COMPANY SEGMENTATION] Erreur parsing JSON: {e}")
+            _logger.error("❌ [COMPANY SEGMENTATION] Erreur parsing JSON: %s", e)
             return {"success": False, "error": f"Parsing error: {e}", "facts": []}
         except Exception as e:
-            print(f"❌ [COMPANY SEGMENTATION] Erreur: {e}")
-            import traceback
-            traceback.print_exc()
+            _logger.error("❌ [COMPANY SEGMENTATION] Erreur: %s", e, exc_info=_DEBUG)
             return {"success": False, "error": str(e), "facts": []}
-    
-    def _convert_company_segmentation_to_facts(self, analysis: Dict, company: str, country: str, year: str) -> List[Dict]:
-        """Convertit la segmentation des entreprises en facts structurés."""
-        facts = []
-        ts = int(datetime.now().timestamp())
-        
-        # 1. Facts des segments d'entreprises
-        for seg in analysis.get("company_segments", []):
-            seg_id = seg.get("segment_id", f"seg_{ts}")
-            market_share = seg.get("market_share_captured", {})
-            
-            if market_share.get("value"):
-                facts.append({
-                    "id": f"{seg_id}_{company}_{country}_{ts}",
-                    "category": "company_segmentation",
-                    "key": f"segment_value_{seg.get('segment_name', '').replace(' ', '_').lower()}",
-                    "value": market_share["value"],
-                    "unit": market_share.get("unit", "EUR"),
-                    "source": market_share.get("source", "Analyse"),
-                    "source_type": "Secondaire",
-                    "confidence": market_share.get("confidence", "medium").lower(),
-                    "notes": f"Segment: {seg.get('segment_name', 'N/A')}, Part: {market_share.get('percentage_of_total', 0)}%, Modèle: {seg.get('revenue_model', 'N/A')}"
-                })
+    
+    def _convert_company_segmentation_to_facts(self, analysis: Dict, company: str, country: str, year: str) -> List[Dict]:
+        """Convertit la segmentation des entreprises en facts structurés."""
+        ts = time.time_ns() // 1_000_000_000
+        
+        # 1. Facts des segments d'entreprises (segments sans valeur captée ignorés)
+        segment_facts = (
+            Fact(
+                id=f"{seg.get('segment_id', f'seg_{ts}')}_{company}_{country}_{ts}",
+                category="company_segmentation",
+                key=f"segment_value_{seg.get('segment_name', '').replace(' ', '_').lower()}",
+                value=market_share["value"],
+                unit=market_share.get("unit", "EUR"),
+                source=market_share.get("source", "Analyse"),
+                source_type="Secondaire",
+                confidence=market_share.get("confidence", "medium").lower(),
+                notes=f"Segment: {seg.get('segment_name', 'N/A')}, Part: {market_share.get('percentage_of_total', 0)}%, Modèle: {seg.get('revenue_model', 'N/A')}"
+            )
+            for seg in analysis.get("company_segments") or ()
+            if (market_share := seg.get("market_share_captured") or {}).get("value")
+        )
         
         # 2. Distribution de valeur
         dist = analysis.get("market_value_distribution", {})
-        for seg_val in dist.get("segments_by_value", []):
-            facts.append({
-                "id": f"dist_{seg_val.get('segment_id')}_{ts}",
-                "category": "company_segmentation",
-                "key": f"market_distribution_{seg_val.get('segment_id', '').lower()}",
-                "value": seg_val.get("percentage", 0),
-                "unit": "%",
-                "source": "Analyse segmentation",
-                "source_type": "Secondaire",
-                "confidence": "medium",
-                "notes": f"Valeur: {seg_val.get('value_captured', 0)} EUR, Tendance: {seg_val.get('trend', 'N/A')}"
-            })
+        distribution_facts = (
+            Fact(
+                id=f"dist_{seg_val.get('segment_id')}_{ts}",
+                category="company_segmentation",
+                key=f"market_distribution_{seg_val.get('segment_id', '').lower()}",
+                value=seg_val.get("percentage", 0),
+                unit="%",
+                source="Analyse segmentation",
+                source_type="Secondaire",
+                confidence="medium",
+                notes=f"Valeur: {seg_val.get('value_captured', 0)} EUR, Tendance: {seg_val.get('trend', 'N/A')}"
+            )
+            for seg_val in dist.get("segments_by_value") or ()
+        )
         
-        return facts
+        # Générateurs enchaînés : une seule liste construite, sans listes intermédiaires concaténées
+        return [fact.as_dict() for fact in itertools.chain(segment_facts, distribution_facts)]
 
 
     # =========================================================================
@@ -2582,9 +3511,12 @@ Réponds UNIQUEMENT avec du JSON valide, aucun texte autour.
         country: str, 
         year: str, 
         market_sizing_context: str = "",
-        segmentation_context: str = ""
+        segmentation_context: str = "",
+        force_refresh: bool = False
     ) -> Dict[str, Any]:
         """
+        Version synchrone de `agenerate_competitive_analysis`.
+        
         ANALYSE CONCURRENTIELLE DYNAMIQUE - Facts-First Protocol
         
         Génère une analyse concurrentielle complète en s'appuyant sur :
@@ -2599,113 +3531,41 @@ Réponds UNIQUEMENT avec du JSON valide, aucun texte autour.
         - Bloc 4: Lecture de la demande (gaps)
         - Bloc 5: Recommandation stratégique
         
+        Args:
+            force_refresh: Si True, ignore les caches (mémoire et SQLite) et relance le LLM
+        
         Returns:
             Analyse structurée avec traçabilité des sources
         """
-        print(f"\n{'='*60}")
-        print(f"🎯 [COMPETITIVE ANALYSIS] Lancement pour {company_name} ({country}, {year})")
-        print(f"{'='*60}")
+        return _run_sync(self.agenerate_competitive_analysis(company_name, country, year, market_sizing_context, segmentation_context, force_refresh))
+
+    async def agenerate_competitive_analysis(
+        self, 
+        company_name: str, 
+        country: str, 
+        year: str, 
+        market_sizing_context: str = "",
+        segmentation_context: str = "",
+        force_refresh: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Analyse concurrentielle (appel LLM non bloquant via `ainvoke`).
+        Mêmes arguments et même structure de retour que `generate_competitive_analysis`.
+        """
+        cache_key = self._input_cache_key("comp_", company_name, country, year, market_sizing_context or "", segmentation_context or "")
+        if not force_refresh and (cached := self._cache_get(cache_key)) is not None:
+            _logger.info("🎯 [COMPETITIVE ANALYSIS] Cache hit pour %s (%s, %s)", company_name, country, year)
+            return cached
         
-        llm = self._get_llm()
+        _logger.info("\n%s\n🎯 [COMPETITIVE ANALYSIS] Lancement pour %s (%s, %s)\n%s", _RULE, company_name, country, year, _RULE)
         
         # Build context from dependencies
         sizing_info = market_sizing_context if market_sizing_context else "Aucun market sizing disponible."
         segmentation_info = segmentation_context if segmentation_context else "Aucune segmentation disponible."
         
-        prompt_template = ChatPromptTemplate.from_messages([
-            ("system", """Tu es un expert en intelligence concurrentielle et stratégie d'entreprise.
-Tu dois produire une analyse concurrentielle STRUCTURÉE et FACTUELLE pour une entreprise donnée.
-
-RÈGLES ABSOLUES:
-1. Ne jamais inventer de données chiffrées sans source.
-2. Distinguer clairement: FAIT CONFIRMÉ vs DÉCLARÉ vs SUPPOSÉ.
-3. Être conservateur sur les estimations de revenus (ordres de grandeur uniquement).
-4. Identifier les GAPS réels (besoins non couverts), pas le marketing.
-5. La recommandation doit être TRAÇABLE (basée sur les gaps et le positionnement).
-
-CONTEXTE DISPONIBLE:
-- Market Sizing: {sizing_context}
-- Segmentation Entreprises: {segmentation_context}
-
-FORMAT DE SORTIE: JSON STRICT (pas de texte avant/après)."""),
-            ("human", """Génère une analyse concurrentielle complète pour:
-- Entreprise de référence: {company}
-- Pays/Marché: {country}
-- Année: {year}
-
-Structure JSON attendue:
-{{
-  "context_summary": {{
-    "reference_company": "{company}",
-    "market_scope": "description courte du périmètre",
-    "analysis_date": "{year}"
-  }},
-  "actors": [
-    {{
-      "name": "Nom de l'acteur",
-      "typology": "Leader|Challenger|Niche|Emergent",
-      "geography": "Local|Régional|Global",
-      "revenue_order": "< 10M€|10-50M€|50-200M€|200M-1B€|> 1B€",
-      "core_offering": "Description courte de l'offre principale",
-      "source": "D'où vient cette information",
-      "confidence": "high|medium|low"
-    }}
-  ],
-  "offerings_benchmark": {{
-    "key_features": ["Feature 1", "Feature 2", "Feature 3", "Feature 4", "Feature 5"],
-    "matrix": [
-      {{
-        "actor": "Nom",
-        "features": {{
-          "Feature 1": {{"status": "confirmed|declared|absent", "notes": "détail optionnel"}},
-          "Feature 2": {{"status": "confirmed|declared|absent", "notes": ""}}
-        }}
-      }}
-    ]
-  }},
-  "positioning_clusters": [
-    {{
-      "actor": "Nom",
-      "claimed_value": "Proposition de valeur déclarée",
-      "cluster": "Cost Leader|Premium|Innovator|Service-Centric|Generalist",
-      "integration_level": "Verticale|Horizontale|Spécialisée",
-      "economic_model": "SaaS|License|Usage|Hybrid"
-    }}
-  ],
-  "market_expectations": [
-    {{
-      "criterion": "Besoin/Attente du marché",
-      "importance": "Critical|High|Medium|Low",
-      "coverage": "met|partial|unmet",
-      "gap_signal": true/false,
-      "explanation": "Pourquoi ce statut"
-    }}
-  ],
-  "recommendation": {{
-    "strategy_title": "Titre de la recommandation (ex: Cibler le segment X)",
-    "rationale": "Explication de pourquoi cette stratégie",
-    "avoid": "Ce qu'il faut éviter et pourquoi",
-    "alternative_considered": "Alternative envisagée mais rejetée",
-    "alternative_rejection_reason": "Pourquoi l'alternative n'est pas optimale",
-    "confidence": "HIGH|MEDIUM|LOW",
-    "key_assumptions": ["Hypothèse 1", "Hypothèse 2"]
-  }},
-  "reliability": {{
-    "overall_confidence": "HIGH|MEDIUM|LOW",
-    "data_sources_count": N,
-    "primary_sources": ["Source 1", "Source 2"],
-    "key_limitations": ["Limitation 1", "Limitation 2"],
-    "data_freshness": "Description de la fraîcheur des données"
-  }}
-}}
-
-Génère 4-6 acteurs pertinents pour ce marché.
-Identifie 4-6 attentes marché dont au moins 2 gaps (coverage=unmet ou partial).""")
-        ])
-        
         try:
-            chain = prompt_template | llm
-            response = chain.invoke({
+            chain = self._get_chain(_COMPETITIVE_ANALYSIS_TEMPLATE, use_cache=self._use_l2(company_name, force_refresh))
+            response = await chain.ainvoke({
                 "company": company_name,
                 "country": country,
                 "year": year,
@@ -2713,22 +3573,20 @@ Identifie 4-6 attentes marché dont au moins 2 gaps (coverage=unmet ou partial).
                 "segmentation_context": segmentation_info
             })
             
-            raw_content = response.content.strip()
-            print(f"📥 [COMPETITIVE ANALYSIS] Réponse LLM reçue ({len(raw_content)} chars)")
+            _logger.debug("📥 [COMPETITIVE ANALYSIS] Réponse LLM reçue (%s chars)", len(response.content))
             
-            # JSON Extraction
-            if "```json" in raw_content:
-                raw_content = raw_content.split("```json")[1].split("```")[0].strip()
-            elif "```" in raw_content:
-                raw_content = raw_content.split("```")[1].split("```")[0].strip()
+            # JSON Extraction (orjson si disponible)
+            analysis = self._parse_llm_json(response)
+            _logger.info("✅ [COMPETITIVE ANALYSIS] Parsing JSON réussi")
             
-            analysis = json.loads(raw_content)
-            print(f"✅ [COMPETITIVE ANALYSIS] Parsing JSON réussi")
+            # Contexte renseigné depuis les entrées (le schéma ne les fait plus recopier au modèle)
+            analysis.setdefault("context_summary", {}).update({"reference_company": company_name, "analysis_date": year})
             
             # Convert to facts for traceability
             facts = self._convert_competitive_analysis_to_facts(analysis, company_name, country, year)
             
-            return {
+            result = {
+                "company": company_name,
                 "success": True,
                 "analysis": analysis,
                 "facts": facts,
@@ -2736,70 +3594,77 @@ Identifie 4-6 attentes marché dont au moins 2 gaps (coverage=unmet ou partial).
                     "company": company_name,
                     "country": country,
                     "year": year,
-                    "generated_at": datetime.now().isoformat(),
+                    "generated_at": _now_iso(),
                     "method": "LLM-Dynamic"
                 }
             }
+            self._cache_put(company_name, cache_key, result)
+            return result
             
         except json.JSONDecodeError as e:
-            print(f"❌ [COMPETITIVE ANALYSIS] Erreur parsing JSON: {e}")
+            _logger.error("❌ [COMPETITIVE ANALYSIS] Erreur parsing JSON: %s", e)
             return {"success": False, "error": f"Parsing error: {e}", "facts": []}
         except Exception as e:
-            print(f"❌ [COMPETITIVE ANALYSIS] Erreur: {e}")
-            import traceback
-            traceback.print_exc()
+            _logger.error("❌ [COMPETITIVE ANALYSIS] Erreur: %s", e, exc_info=_DEBUG)
             return {"success": False, "error": str(e), "facts": []}
     
     def _convert_competitive_analysis_to_facts(self, analysis: Dict, company: str, country: str, year: str) -> List[Dict]:
         """Convertit l'analyse concurrentielle en facts structurés pour traçabilité."""
-        facts = []
-        ts = int(datetime.now().timestamp())
-        
-        # 1. Facts des acteurs
-        for actor in analysis.get("actors", []):
-            facts.append({
-                "id": f"comp_actor_{actor.get('name', '').replace(' ', '_').lower()}_{ts}",
-                "category": "competition",
-                "key": f"competitor_{actor.get('name', '').replace(' ', '_').lower()}",
-                "value": actor.get("typology", "Unknown"),
-                "unit": "",
-                "source": actor.get("source", "LLM Analysis"),
-                "source_type": "Secondaire",
-                "confidence": actor.get("confidence", "medium"),
-                "notes": f"Geo: {actor.get('geography', 'N/A')}, Revenue: {actor.get('revenue_order', 'N/A')}, Core: {actor.get('core_offering', 'N/A')}"
-            })
+        ts = time.time_ns() // 1_000_000_000
+        
+        # 1. Facts des acteurs (slug du nom calculé une seule fois, partagé par l'id et la clé)
+        actor_facts = (
+            Fact(
+                id=f"comp_actor_{name_slug}_{ts}",
+                category="competition",
+                key=f"competitor_{name_slug}",
+                value=actor.get("typology", "Unknown"),
+                unit="",
+                source=actor.get("source", "LLM Analysis"),
+                source_type="Secondaire",
+                confidence=actor.get("confidence", "medium"),
+                notes=f"Geo: {actor.get('geography', 'N/A')}, Revenue: {actor.get('revenue_order', 'N/A')}, Core: {actor.get('core_offering', 'N/A')}"
+            )
+            for actor in analysis.get("actors") or ()
+            for name_slug in (actor.get("name", "").replace(" ", "_").lower(),)
+        )
         
         # 2. Facts des gaps marché
-        for exp in analysis.get("market_expectations", []):
-            if exp.get("gap_signal"):
-                facts.append({
-                    "id": f"comp_gap_{exp.get('criterion', '').replace(' ', '_').lower()}_{ts}",
-                    "category": "competition",
-                    "key": f"market_gap_{exp.get('criterion', '').replace(' ', '_').lower()}",
-                    "value": exp.get("coverage", "unknown"),
-                    "unit": "",
-                    "source": "Market Analysis",
-                    "source_type": "Analyse",
-                    "confidence": "medium",
-                    "notes": f"Importance: {exp.get('importance', 'N/A')}, Explication: {exp.get('explanation', 'N/A')}"
-                })
+        gap_facts = (
+            Fact(
+                id=f"comp_gap_{criterion_slug}_{ts}",
+                category="competition",
+                key=f"market_gap_{criterion_slug}",
+                value=exp.get("coverage", "unknown"),
+                unit="",
+                source="Market Analysis",
+                source_type="Analyse",
+                confidence="medium",
+                notes=f"Importance: {exp.get('importance', 'N/A')}, Explication: {exp.get('explanation', 'N/A')}"
+            )
+            for exp in analysis.get("market_expectations") or ()
+            if exp.get("gap_signal")
+            for criterion_slug in (exp.get("criterion", "").replace(" ", "_").lower(),)
+        )
         
         # 3. Fact de la recommandation
         rec = analysis.get("recommendation", {})
-        if rec.get("strategy_title"):
-            facts.append({
-                "id": f"comp_recommendation_{company.replace(' ', '_').lower()}_{ts}",
-                "category": "competition",
-                "key": "strategic_recommendation",
-                "value": rec.get("strategy_title", "N/A"),
-                "unit": "",
-                "source": "Strategic Analysis",
-                "source_type": "Analyse",
-                "confidence": rec.get("confidence", "medium").lower(),
-                "notes": f"Rationale: {rec.get('rationale', 'N/A')[:100]}..."
-            })
-        
-        return facts
+        recommendation_facts = (
+            Fact(
+                id=f"comp_recommendation_{company.replace(' ', '_').lower()}_{ts}",
+                category="competition",
+                key="strategic_recommendation",
+                value=rec.get("strategy_title", "N/A"),
+                unit="",
+                source="Strategic Analysis",
+                source_type="Analyse",
+                confidence=rec.get("confidence", "medium").lower(),
+                notes=f"Rationale: {rec.get('rationale', 'N/A')[:100]}..."
+            ),
+        ) if rec.get("strategy_title") else ()
+        
+        # Générateurs enchaînés : une seule liste construite, sans listes intermédiaires concaténées
+        return [fact.as_dict() for fact in itertools.chain(actor_facts, gap_facts, recommendation_facts)]
 
 
     # =========================================================================
@@ -2810,11 +3675,14 @@ Identifie 4-6 attentes marché dont au moins 2 gaps (coverage=unmet ou partial).
         company_name: str, 
         country: str, 
         year: str, 
-        market_sizing_context: str = "",
-        segmentation_context: str = "",
-        competitive_context: str = ""
+        market_sizing_context: Union[str, Dict[str, Any]] = "",
+        segmentation_context: Union[str, Dict[str, Any]] = "",
+        competitive_context: Union[str, Dict[str, Any]] = "",
+        force_refresh: bool = False
     ) -> Dict[str, Any]:
         """
+        Version synchrone de `agenerate_market_trends`.
+        
         ANALYSE DES TENDANCES DU MARCHÉ - KPMG Consultant Methodology
         
         Produit 5-7 tendances clés du marché pour l'horizon 2-5 ans.
@@ -2828,154 +3696,245 @@ Identifie 4-6 attentes marché dont au moins 2 gaps (coverage=unmet ou partial).
         - Horizon (court/moyen/long terme)
         - Type (structurelle vs conjoncturelle)
         
+        Args:
+            market_sizing_context, segmentation_context, competitive_context: Résultats des modules
+                précédents, en texte ou en dict (sérialisé en JSON compact)
+            force_refresh: Si True, ignore les caches (mémoire et SQLite) et relance le LLM
+        
         Returns:
             Analyse structurée des tendances avec signaux faibles et incertitudes
         """
-        print(f"\n{'='*60}")
-        print(f"📈 [MARKET TRENDS] Analyse des tendances pour {company_name} ({country}, {year})")
-        print(f"{'='*60}")
+        return _run_sync(self.agenerate_market_trends(company_name, country, year, market_sizing_context, segmentation_context, competitive_context, force_refresh))
+
+    async def agenerate_market_trends(
+        self, 
+        company_name: str, 
+        country: str, 
+        year: str, 
+        market_sizing_context: Union[str, Dict[str, Any]] = "",
+        segmentation_context: Union[str, Dict[str, Any]] = "",
+        competitive_context: Union[str, Dict[str, Any]] = "",
+        force_refresh: bool = False,
+        on_section: Optional[Callable[[str, Any], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Analyse des tendances du marché (appel LLM non bloquant via `ainvoke`).
+        Mêmes arguments et même structure de retour que `generate_market_trends`.
         
-        llm = self._get_llm()
+        Args:
+            on_section: Callback optionnel appelé avec (section, contenu) au fil du streaming (`astream`,
+                        sans cache SQLite) : ("market_trends[]", tendance) dès que chaque tendance est
+                        complète, puis chaque section racine (market_trends, weak_signals...) à sa fermeture.
+                        Un appel rattaché à une génération déjà en cours ne reçoit que le résultat final.
+        """
+        # Contextes compactés avant la clé de cache : deux saisies qui ne diffèrent que
+        # par la mise en forme partagent la même entrée
+        market_sizing_context = _compact_context(market_sizing_context)
+        segmentation_context = _compact_context(segmentation_context)
+        competitive_context = _compact_context(competitive_context)
+        cache_key = self._input_cache_key(
+            "tr_", company_name, country, year,
+            market_sizing_context, segmentation_context, competitive_context
+        )
+        if not force_refresh and (cached := self._cache_get(cache_key)) is not None:
+            _logger.info("📈 [MARKET TRENDS] Cache hit pour %s (%s, %s)", company_name, country, year)
+            return cached
+        
+        # Mêmes entrées déjà en cours (double clic, étude groupée) : attendre ce résultat plutôt que relancer le LLM
+        loop = asyncio.get_running_loop()
+        pending = self._inflight.get(cache_key)
+        if not force_refresh and pending is not None and pending.get_loop() is loop:
+            _logger.info("📈 [MARKET TRENDS] Analyse déjà en cours pour %s, en attente du résultat", company_name)
+            return await asyncio.shield(pending)
+        
+        future = loop.create_future()
+        self._inflight[cache_key] = future
+        try:
+            result = await self._generate_market_trends(
+                company_name, country, year,
+                market_sizing_context, segmentation_context, competitive_context,
+                cache_key, force_refresh, on_section
+            )
+        except BaseException:
+            future.cancel()
+            raise
+        finally:
+            if self._inflight.get(cache_key) is future:
+                del self._inflight[cache_key]
+        future.set_result(result)
+        return result
+
+    async def _generate_market_trends(
+        self,
+        company_name: str,
+        country: str,
+        year: str,
+        market_sizing_context: str,
+        segmentation_context: str,
+        competitive_context: str,
+        cache_key: str,
+        force_refresh: bool,
+        on_section: Optional[Callable[[str, Any], None]]
+    ) -> Dict[str, Any]:
+        """Génère l'analyse des tendances (appel LLM, parsing, contrôle du schéma) et la met en cache."""
+        _logger.info("\n%s\n📈 [MARKET TRENDS] Analyse des tendances pour %s (%s, %s)\n%s", _RULE, company_name, country, year, _RULE)
         
         # Build context
         sizing_info = market_sizing_context if market_sizing_context else "Aucun market sizing disponible."
         seg_info = segmentation_context if segmentation_context else "Aucune segmentation disponible."
         comp_info = competitive_context if competitive_context else "Aucune analyse concurrentielle disponible."
         
-        prompt_template = ChatPromptTemplate.from_messages([
-            ("system", """Tu es un consultant senior en stratégie chez KPMG.
-Tu dois produire une analyse des TENDANCES DU MARCHÉ pour un comité de direction.
-
-RÈGLES ABSOLUES:
-1. AUCUNE RECOMMANDATION - tu décris le marché, tu ne conseilles pas.
-2. Approche neutre et analytique.
-3. Données sourcées et datées quand possible.
-4. Si information incertaine → le signaler explicitement.
-5. Ne PAS répéter les éléments du sizing ou de la concurrence.
-6. Distinguer tendances STRUCTURELLES (fond de marché) vs CONJONCTURELLES (cycle, macro).
-
-CONTEXTE DISPONIBLE:
-- Market Sizing: {sizing_context}
-- Segmentation: {segmentation_context}
-- Analyse Concurrentielle: {competitive_context}
-
-FORMAT DE SORTIE: JSON STRICT (pas de texte avant/après)."""),
-            ("human", """Génère une analyse des tendances clés du marché pour:
-- Entreprise de référence: {company}
-- Pays/Marché: {country}
-- Année: {year}
-
-Structure JSON attendue:
-{{
-  "context": {{
-    "market_scope": "Description concise du périmètre de marché analysé",
-    "analysis_horizon": "2-5 ans",
-    "reference_date": "{year}"
-  }},
-  
-  "market_trends": [
-    {{
-      "trend_id": "TREND_001",
-      "title": "Intitulé clair et non marketing (ex: Consolidation des acteurs B2B)",
-      "description": "Description factuelle et synthétique en 3-4 lignes maximum. Données chiffrées si disponibles.",
-      "driver": "technologique|réglementaire|économique|comportemental|ESG",
-      "driver_detail": "Précision sur le driver (ex: IA générative, RGPD, inflation...)",
-      "maturity": "émergente|en accélération|mature",
-      "horizon": "court terme (0-2 ans)|moyen terme (2-5 ans)|long terme (5+ ans)",
-      "type": "structurelle|conjoncturelle",
-      "is_weak_signal": false,
-      "uncertainty_level": "faible|moyen|élevé",
-      "uncertainty_reason": "Raison de l'incertitude si niveau moyen ou élevé",
-      "sources": ["Source 1 (date)", "Source 2 (date)"],
-      "geographic_scope": "Local ({country})|Européen|Global"
-    }}
-  ],
-  
-  "weak_signals": [
-    {{
-      "signal_id": "SIGNAL_001",
-      "signal": "Description du signal faible détecté",
-      "potential_impact": "Impact potentiel si le signal se confirme",
-      "monitoring_indicators": ["Indicateur 1 à surveiller", "Indicateur 2"],
-      "emergence_timeline": "6-12 mois|1-2 ans|2-3 ans"
-    }}
-  ],
-  
-  "market_debates": [
-    {{
-      "debate_id": "DEBATE_001",
-      "topic": "Zone d'incertitude ou de débat sur le marché",
-      "position_a": "Position ou scénario A",
-      "position_b": "Position ou scénario B",
-      "consensus_level": "aucun|émergent|fort",
-      "key_uncertainties": ["Incertitude qui départagera les positions"]
-    }}
-  ],
-  
-  "structural_vs_cyclical_summary": {{
-    "structural_trends_count": N,
-    "cyclical_trends_count": M,
-    "dominant_drivers": ["Driver 1", "Driver 2"],
-    "market_maturity_assessment": "Description de la maturité globale du marché"
-  }},
-  
-  "reliability": {{
-    "overall_confidence": "HIGH|MEDIUM|LOW",
-    "data_freshness": "Description de la fraîcheur des données",
-    "geographic_coverage": "Niveau de couverture géographique des sources",
-    "key_limitations": ["Limitation 1", "Limitation 2"]
-  }}
-}}
-
-Génère 5-7 tendances clés pertinentes pour l'horizon 2-5 ans.
-Identifie 1-3 signaux faibles.
-Mentionne 1-2 zones d'incertitude ou débats du marché.""")
-        ])
-        
         try:
-            chain = prompt_template | llm
-            response = chain.invoke({
+            chain = self._get_chain(_MARKET_TRENDS_TEMPLATE, use_cache=self._use_l2(company_name, force_refresh), json_mode=True)
+            variables = {
                 "company": company_name,
                 "country": country,
                 "year": year,
                 "sizing_context": sizing_info,
                 "segmentation_context": seg_info,
                 "competitive_context": comp_info
-            })
-            
-            raw_content = response.content.strip()
-            print(f"📥 [MARKET TRENDS] Réponse LLM reçue ({len(raw_content)} chars)")
-            
-            # JSON Extraction
-            if "```json" in raw_content:
-                raw_content = raw_content.split("```json")[1].split("```")[0].strip()
-            elif "```" in raw_content:
-                raw_content = raw_content.split("```")[1].split("```")[0].strip()
-            
-            analysis = json.loads(raw_content)
-            print(f"✅ [MARKET TRENDS] Parsing JSON réussi - {len(analysis.get('market_trends', []))} tendances")
+            }
+            if on_section is None:
+                response = await _ainvoke_with_backoff(chain, variables)
+            else:
+                # Streaming : chaque tendance est publiée dès sa fermeture, sans attendre
+                # les signaux faibles, débats et indicateurs de fiabilité
+                scanner = _JsonSectionScanner(item_keys=("market_trends",))
+                response = None
+                async for chunk in chain.astream(variables):
+                    response = chunk if response is None else response + chunk
+                    for section, content in scanner.feed(chunk.content):
+                        on_section(section, content)
+            
+            _logger.debug("📥 [MARKET TRENDS] Réponse LLM reçue (%s chars)", len(response.content))
+            
+            # JSON Extraction (bloc ```json retiré en une passe, orjson si disponible) puis contrôle du schéma
+            analysis = _validate_market_trends(self._parse_llm_json(response))
+            _logger.info("✅ [MARKET TRENDS] Parsing JSON réussi - %s tendances", len(analysis.get('market_trends', [])))
+            
+            # Date de référence renseignée depuis les entrées (le schéma ne la fait plus recopier au modèle)
+            analysis.setdefault("context", {})["reference_date"] = year
             
-            return {
+            result = {
+                "company": company_name,
                 "success": True,
                 "analysis": analysis,
                 "metadata": {
                     "company": company_name,
                     "country": country,
                     "year": year,
-                    "generated_at": datetime.now().isoformat(),
+                    "generated_at": _now_iso(),
                     "method": "LLM-KPMG-Trends"
                 }
             }
+            self._cache_put(company_name, cache_key, result)
+            return result
             
         except json.JSONDecodeError as e:
-            print(f"❌ [MARKET TRENDS] Erreur parsing JSON: {e}")
+            _logger.error("❌ [MARKET TRENDS] Erreur parsing JSON: %s", e)
             return {"success": False, "error": f"Parsing error: {e}"}
+        except _SchemaError as e:
+            _logger.error("❌ [MARKET TRENDS] Réponse hors schéma: %s", e)
+            return {"success": False, "error": f"Schema error: {e}"}
         except Exception as e:
-            print(f"❌ [MARKET TRENDS] Erreur: {e}")
-            import traceback
-            traceback.print_exc()
+            _logger.error("❌ [MARKET TRENDS] Erreur: %s", e, exc_info=_DEBUG)
             return {"success": False, "error": str(e)}
 
+    # =========================================================================
+    # ÉTUDE DE MARCHÉ COMPLÈTE - Sizing → Segmentation ∥ Concurrence → Tendances
+    # =========================================================================
+    @staticmethod
+    def _result_context(result: Dict[str, Any], *paths: str) -> str:
+        """
+        Extraits d'un résultat réussi passés comme contexte à l'étape suivante : seuls les
+        chemins demandés ("calculation.final_estimate"...) sont sérialisés, en JSON compact,
+        pour limiter les tokens relus par chaque prompt en aval.
+        """
+        if not result.get("success"):
+            return ""
+        context = {}
+        for path in paths:
+            value = result.get("analysis", {})
+            for part in path.split("."):
+                value = value.get(part) if isinstance(value, dict) else None
+            if value is not None:
+                context[part] = value
+        return json.dumps(context, ensure_ascii=False, separators=(",", ":"))
+
+    def generate_market_study(self, company_name: str, offerings: str, country: str, year: str, additional_context: str = "") -> Dict[str, Any]:
+        """
+        Enchaîne market sizing contextuel, segmentation, analyse concurrentielle et tendances.
+        Version synchrone de `agenerate_market_study`.
+        """
+        return _run_sync(self.agenerate_market_study(company_name, offerings, country, year, additional_context))
+
+    async def agenerate_market_study(self, company_name: str, offerings: str, country: str, year: str, additional_context: str = "") -> Dict[str, Any]:
+        """
+        Étude de marché complète en trois étapes au lieu de quatre appels successifs :
+        1. Market sizing contextuel (définition du marché + estimation finale, sérialisées une
+           fois et partagées telles quelles par les trois prompts suivants)
+        2. Segmentation et analyse concurrentielle en parallèle (asyncio.gather) :
+           la concurrence ne dépend que du sizing, sa segmentation en entrée est optionnelle
+        3. Tendances, à partir des trois résultats
+        
+        Returns:
+            {"sizing", "segmentation", "competitive", "trends"} : résultats des générateurs
+            correspondants (un module en échec n'interrompt pas les suivants)
+        """
+        sizing = await self.agenerate_contextual_market_sizing(company_name, country, year, additional_context)
+        sizing_context = self._result_context(sizing, "market_definition", "calculation.final_estimate")
+        
+        segmentation, competitive = await asyncio.gather(
+            self.agenerate_market_segmentation(company_name, offerings, country, year, sizing_context),
+            self.agenerate_competitive_analysis(company_name, country, year, sizing_context)
+        )
+        
+        trends = await self.agenerate_market_trends(
+            company_name, country, year,
+            sizing_context,
+            self._result_context(segmentation, "company_segments"),
+            self._result_context(competitive, "context_summary")
+        )
+        return {
+            "sizing": sizing,
+            "segmentation": segmentation,
+            "competitive": competitive,
+            "trends": trends
+        }
+
+    def generate_market_study_bulk(
+        self,
+        studies: List[Tuple[str, str, str, str]],
+        max_concurrency: int = 5
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Lance plusieurs études de marché dans une seule boucle asyncio.
+        Chaque étude enchaîne jusqu'à deux appels LLM simultanés : le sémaphore borne le nombre
+        d'études en vol pour rester sous les limites de débit du fournisseur.
+
+        Args:
+            studies: Liste de tuples (company_name, offerings, country, year)
+            max_concurrency: Nombre max d'études menées simultanément
+
+        Returns:
+            Dictionnaire {company_name: résultat} (même structure que generate_market_study)
+        """
+        async def _run_all():
+            semaphore = asyncio.Semaphore(max_concurrency)
+
+            async def _run_one(company_name, offerings, country, year):
+                async with semaphore:
+                    return await self.agenerate_market_study(company_name, offerings, country, year)
+
+            return await asyncio.gather(*(_run_one(*study) for study in studies), return_exceptions=True)
+
+        _logger.info("📚 [MARKET STUDY] Études groupées pour %s entreprises...", len(studies))
+        results = _run_sync(_run_all())
+        return {
+            study[0]: {"success": False, "error": str(result)} if isinstance(result, BaseException) else result
+            for study, result in zip(studies, results)
+        }
+
 
 # Singleton global pour l'application
 strategic_facts_service = StrategicFactsService()
@@ -13,6 +13,13 @@ class MockFactsManager:
     def get_facts(self, key):
         return [f for f in self.facts if f["key"] == key]
 
+    def get_facts_map(self, keys):
+        keys = set(keys)
+        facts_map = {}
+        for f in self.facts:
+            if f["key"] in keys: facts_map.setdefault(f["key"], f)
+        return facts_map
+
 # Define test facts
 facts = [
     # Macro
@@ -82,5 +89,42 @@ def test_engine():
     print("\nWaterfall Data Head:")
     print(wf.head())
 
+    # 4. Sensitivity (volume is a pure factor of the segmented pricing formula -> ±20%)
+    sens = engine.perform_sensitivity_analysis(demand_comp)
+    vol_test = next(t for t in sens["tests"] if t["hypothesis"] == "Total Potential Customers")
+    print(f"\nSensitivity Volume: {vol_test}")
+    assert vol_test["low_scenario"]["delta_pct"] == -20.0
+    assert vol_test["high_scenario"]["delta_pct"] == 20.0
+
+def test_reality_factor_not_reused_after_run():
+    # Friction memoized for one run only: a direct component call sees updated facts
+    run_facts = [
+        {"key": "total_potential_customers", "value": 100.0, "confidence": "high", "source_type": "CRM"},
+        {"key": "average_price", "value": 7500.0, "confidence": "high", "source_type": "Sales"},
+    ]
+    engine = MarketEstimationEngine(MockFactsManager(run_facts))
+    engine.get_all_estimations()
+    run_facts.append({"key": "sales_cycle_months", "value": 14.0, "confidence": "high", "source_type": "Sales"})
+
+    direct = engine.get_demand_estimation().estimated_value
+    fresh = engine.get_all_estimations()[1].estimated_value
+    print(f"\nDirect: {direct} | Fresh run: {fresh}")
+    assert direct == fresh
+    assert direct < 750000.0
+
+def test_early_exit_threshold_below_floor_rejected():
+    # Below 30%, an early exit no longer implies LOW confidence: the threshold is rejected
+    engine = MarketEstimationEngine(MockFactsManager(facts))
+    demand = engine.get_demand_estimation()
+    try:
+        engine.perform_sensitivity_analysis(demand, early_exit_threshold=10)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("early_exit_threshold < 30 should raise ValueError")
+    assert not engine.perform_sensitivity_analysis(demand, early_exit_threshold=30)["early_terminated"]
+
 if __name__ == "__main__":
     test_engine()
+    test_reality_factor_not_reused_after_run()
+    test_early_exit_threshold_below_floor_rejected()
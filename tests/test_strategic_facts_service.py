@@ -0,0 +1,127 @@
+
+import json
+import random
+import asyncio
+
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+
+import strategic_facts_service
+from strategic_facts_service import _JsonSectionScanner, StrategicFactsService
+
+# Document streamé : chaînes contenant accolades, crochets, virgules et guillemets échappés,
+# tableaux imbriqués, et tableau suivi élément par élément ("market_trends")
+document = {
+    "context": {"market_scope": "Santé {numérique}, [B2B]", "quote": "il a dit \"oui, non\" \\ fin"},
+    "market_trends": [
+        {"trend_id": "T1", "title": "a,b}", "sources": ["x]", ",", "\"[{"], "matrix": [[1, 2], [3, [4, 5]]]},
+        {"trend_id": "T2", "title": "c", "sources": []},
+        [1, {"nested": ["]", "}"]}]
+    ],
+    "weak_signals": [],
+    "empty_trends": [],
+    "reliability": {"overall_confidence": "HIGH", "notes": ["\\\"", "}]"]}
+}
+
+expected = [
+    ("context", document["context"]),
+    ("market_trends[]", document["market_trends"][0]),
+    ("market_trends[]", document["market_trends"][1]),
+    ("market_trends[]", document["market_trends"][2]),
+    ("market_trends", document["market_trends"]),
+    ("weak_signals", []),
+    ("empty_trends", []),
+    ("reliability", document["reliability"]),
+]
+
+def test_json_section_scanner_random_chunks():
+    text = "```json\n" + json.dumps(document, indent=2, ensure_ascii=False) + "\n```"
+    rng = random.Random(42)
+    for _ in range(200):
+        # Découpage aléatoire, y compris au milieu d'une séquence d'échappement ou de la balise ```json
+        cuts = sorted(rng.sample(range(1, len(text)), rng.randint(1, len(text) // 2)))
+        chunks = [text[i:j] for i, j in zip([0] + cuts, cuts + [len(text)])]
+
+        scanner = _JsonSectionScanner(item_keys=("market_trends", "empty_trends"))
+        emitted = []
+        for chunk in chunks:
+            emitted.extend(scanner.feed(chunk))
+        assert emitted == expected
+
+def test_json_section_scanner_without_item_keys():
+    scanner = _JsonSectionScanner()
+    emitted = [pair for c in json.dumps(document) for pair in scanner.feed(c)]
+    assert emitted == [pair for pair in expected if not pair[0].endswith("[]")]
+
+def test_memory_cache_lru_ttl_and_company_index(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(strategic_facts_service.time, "monotonic", lambda: clock[0])
+    svc = StrategicFactsService(cache_ttl_minutes=1, max_cache_entries=2)
+
+    def put(company, key):
+        svc._cache_put(company, key, {"company": company, "key": key})
+
+    def check_consistent():
+        # Index par entreprise et échéances alignés sur le contenu du cache
+        assert set(svc._cache_expiry) == set(svc._cache)
+        assert {k for keys in svc._cache_by_company.values() for k in keys} == set(svc._cache)
+        assert all(keys for keys in svc._cache_by_company.values())
+
+    # Éviction LRU : la lecture de "a1" le protège, "a2" (le plus ancien non lu) est évincé
+    put("A", "a1")
+    put("A", "a2")
+    assert svc._cache_get("a1")["key"] == "a1"
+    put("B", "b1")
+    assert list(svc._cache) == ["a1", "b1"]
+    assert svc._cache_by_company == {"a": {"a1"}, "b": {"b1"}}
+    check_consistent()
+
+    # Expiration (TTL 60s) : entrée invisible à l'échéance, purgée à la prochaine insertion
+    clock[0] += 30
+    put("B", "b2")  # évince "a1" (LRU) : l'entreprise A disparaît de l'index
+    assert list(svc._cache) == ["b1", "b2"]
+    assert "a" not in svc._cache_by_company
+    clock[0] += 30
+    assert svc._cache_get("b1") is None
+    assert svc._cache_get("b2")["key"] == "b2"
+    put("C", "c1")
+    assert list(svc._cache) == ["b2", "c1"]
+    assert svc._cache_by_company == {"b": {"b2"}, "c": {"c1"}}
+    check_consistent()
+
+    # Vidage ciblé : entrées et index de l'entreprise retirés, les autres intactes
+    svc.clear_cache("B")
+    assert list(svc._cache) == ["c1"]
+    assert svc._cache_by_company == {"c": {"c1"}}
+    check_consistent()
+
+    # Entreprise normalisée : même clé réécrite sous "Apple" puis " apple ", un seul index
+    put("Apple", "ma_apple")
+    put(" apple ", "ma_apple")
+    assert svc._cache_by_company == {"c": {"c1"}, "apple": {"ma_apple"}}
+    check_consistent()
+    svc.clear_cache("APPLE")
+    assert list(svc._cache) == ["c1"]
+    check_consistent()
+
+def test_strategic_analysis_missing_section_is_an_error():
+    # Réponses LLM simulées par template : BCG sans sa clé racine, PESTEL mal typé
+    outputs = {
+        id(strategic_facts_service._SWOT_TEMPLATE): {"swot": {"strengths": [{"item": "a"}], "weaknesses": [], "opportunities": [], "threats": []}},
+        id(strategic_facts_service._BCG_TEMPLATE): {"segments": [{"name": "S"}]},
+        id(strategic_facts_service._PESTEL_TEMPLATE): {"pestel": ["Legal"]},
+    }
+    svc = StrategicFactsService()
+    svc._get_chain = lambda template, **kwargs: RunnableLambda(
+        lambda variables: AIMessage(content=json.dumps(outputs[id(template)]))
+    )
+    result = asyncio.run(svc.aget_strategic_analysis("Acme"))
+    assert result["swot"]["strengths"] == [{"item": "a"}]
+    assert [e.split(":")[0] for e in result["section_errors"]] == ["bcg", "pestel"]
+    assert result["bcg"] == [] and result["pestel"] == {}
+    assert not svc._cache  # résultat partiel jamais mis en cache
+
+if __name__ == "__main__":
+    test_json_section_scanner_random_chunks()
+    test_json_section_scanner_without_item_keys()
+    test_strategic_analysis_missing_section_is_an_error()